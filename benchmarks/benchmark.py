@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+
+'''
+A script to time pyDMNrules against the bundled example workbooks and compare the times with a stored baseline.
+
+
+SYNOPSIS
+$ python3 benchmarks/benchmark.py [-s scale] [-R rules] [-r repeats] [-k keyword] [-b baseline] [-w] [-t tolerance]
+
+REQUIRED
+
+
+OPTIONS
+-s scale|--scale=scale
+The number of rows in the synthetic DataFrames passed to decidePandas() (may be repeated - default 10000).
+Use -s 10000 -s 100000 -s 1000000 for scaling curves
+
+-R rules|--rules=rules
+The number of rules in each Decision Table of the synthetic rules made by generate.py (may be repeated - default 100 and 1000).
+The synthetic rules have 10 Decision Tables, each testing 3 inputs - use -R 5000 for very large Decision Tables
+
+-r repeats|--repeats=repeats
+The number of times each benchmark is run, keeping the fastest time (default 3).
+Benchmarks that take more than a second are only run once
+
+-k keyword|--keyword=keyword
+Only run the benchmarks with this keyword in their name (may be repeated)
+
+-b baseline|--baseline=baseline
+The name of the baseline file of benchmark times (default benchmarks/baseline.json)
+
+-w|--write
+Write the benchmark times to the baseline file, rather than comparing them with the baseline
+
+-t tolerance|--tolerance=tolerance
+The ratio of the benchmark time to the baseline time above which a benchmark has regressed (default 1.25).
+The script exits with status 1 if any benchmark has regressed
+'''
+
+# Import all the modules that make life easy
+import os
+import sys
+import argparse
+import json
+import time
+import csv
+import platform
+import tempfile
+import datetime
+import numpy as np
+import pandas as pd
+
+# Time the pyDMNrules in this repository, not an installed copy
+repoDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, repoDir)
+import pyDMNrules
+import generate
+
+# The synthetic rules, generated on demand
+workDir = None
+syntheticRules = {}
+
+
+def repoFile(filename):
+    '''
+Return the path of a file in the repository
+    '''
+    return os.path.join(repoDir, filename)
+
+
+def loaded(filename):
+    '''
+Return a DMN with the rules from this workbook or DMN XML file loaded
+    '''
+    dmnRules = pyDMNrules.DMN()
+    if filename.endswith('.dmn'):
+        status = dmnRules.loadXML(repoFile(filename))
+    else:
+        status = dmnRules.load(repoFile(filename))
+    if 'errors' in status:
+        print(filename, 'has errors', status['errors'], file=sys.stderr)
+        sys.exit(1)
+    return dmnRules
+
+
+def hpvRows():
+    '''
+Return every combination of some HPV participant data
+    '''
+    rows = []
+    for age in [20, 36, 50, 75]:
+        for inTestOfCure in [True, False]:
+            for hpv in ['V0', 'V1', 'V2', 'V9']:
+                for risk in ['low', 'high']:
+                    rows.append({'Participant Age':age, 'In Test of Cure':inTestOfCure, 'Hysterectomy Flag':False, 'Cancer Flag':False,
+                                 'HPV-V':hpv, 'Current Participant Risk Category':risk})
+    return rows
+
+
+def simulationRows():
+    '''
+Return every combination of some simulation.dmn data
+    '''
+    rows = []
+    for season in ['Fall', 'Winter', 'Spring', 'Summer']:
+        for guests in [1, 4, 8]:
+            for children in [True, False]:
+                rows.append({'Season':season, 'How many guests':guests, 'Guests with children':children})
+    return rows
+
+
+def applicantRows():
+    '''
+Return every combination of some Example1.xlsx data
+    '''
+    rows = []
+    for age in [18, 24, 25, 40, 60, 61, 75]:
+        for history in ['good', 'bad']:
+            rows.append({'Applicant Age':age, 'Medical History':history})
+    return rows
+
+
+def orderRows():
+    '''
+Return every combination of some ExampleRows.xlsx/ExampleColumns.xlsx/ExampleCrosstab.xlsx data
+    '''
+    rows = []
+    for customer in ['Business', 'Private', 'Government']:
+        for orderSize in [1, 9, 10, 11, 50]:
+            for delivery in ['sameday', 'slow']:
+                rows.append({'Customer':customer, 'OrderSize':orderSize, 'Delivery':delivery})
+    return rows
+
+
+def subacuteExtract():
+    '''
+Return the Subacute extract, prepared for the AN-SNAP grouper, as a DataFrame
+    '''
+    dfInput = pd.read_excel(repoFile('SubacuteExtract.xlsx'))
+    dfInput['Long term care'] = False
+    dfInput.loc[dfInput['Length of Stay'] > 92, 'Long term care'] = True
+    dfInput['First Phase'] = False
+    thisPatient = thisEpisode = None
+    for index, row in dfInput.iterrows():
+        if ((row['Patient UR'] != thisPatient) or (row['Episode Start Date'] != thisEpisode)):
+            thisPatient = row['Patient UR']
+            thisEpisode = row['Episode Start Date']
+            if row['Phase Type'] == 'Unstable':
+                dfInput.loc[index, 'First Phase'] = True
+    return dfInput
+
+
+def costingExtract():
+    '''
+Return the grouped Subacute extract, prepared for the NWAU21 calculator, as a DataFrame
+    '''
+    dtype = {'Expected AN-SNAP V4 code':str, 'Hospital Remoteness':str, 'Postcode':str, 'SA2':str,
+             'Funding Source':str, 'Indigenous Status':str, 'State':str}
+    return pd.read_csv(repoFile('subAcuteExtract.csv'), dtype=dtype)
+
+
+def costingRows():
+    '''
+Return the grouped Subacute extract, prepared for the NWAU21 calculator, as a list of dictionaries
+    '''
+    rows = []
+    with open(repoFile('subAcuteExtract.csv'), 'r', newline='') as csvInFile:
+        for row in csv.DictReader(csvInFile):
+            for col in row:
+                if row[col] in ['TRUE', 'True', 'true']:
+                    row[col] = True
+                elif row[col] in ['FALSE', 'False', 'false']:
+                    row[col] = False
+                elif row[col] in ['NULL', 'Null', 'null']:
+                    row[col] = None
+            data = {}
+            for col in ['Care Type', 'Hospital Remoteness', 'Postcode', 'SA2', 'Dialysis Flag', 'RadioTherapy Flag', 'Funding Source', 'Indigenous Status', 'State']:
+                data[col] = row[col]
+            data['Same Day Admission'] = row['Same-day admitted care']
+            data['AN-SNAP V4.0'] = row['Expected AN-SNAP V4 code']
+            data['Length of Stay'] = int(float(row['Length of Stay']))
+            data['Patient Age'] = int(float(row['Patient Age']))
+            rows.append(data)
+    return rows
+
+
+def scaled(dfInput, rows, seed):
+    '''
+Return a synthetic DataFrame of this many rows, sampled (with replacement) from dfInput
+    '''
+    return dfInput.sample(rows, replace=True, random_state=seed).reset_index(drop=True)
+
+
+def hpvFrame(rows, seed):
+    '''
+Return a synthetic DataFrame of this many rows of random HPV participant data
+    '''
+    rng = np.random.default_rng(seed)
+    dfInput = pd.DataFrame()
+    dfInput['Participant Age'] = rng.integers(20, 80, rows)
+    dfInput['In Test of Cure'] = rng.choice([True, False], rows)
+    dfInput['Hysterectomy Flag'] = False
+    dfInput['Cancer Flag'] = False
+    dfInput['HPV-V'] = rng.choice(['V0', 'V1', 'V2', 'V9'], rows)
+    dfInput['Current Participant Risk Category'] = rng.choice(['low', 'high'], rows)
+    return dfInput
+
+
+def glossaryRows(dmnRules, dfInput):
+    '''
+Return the rows of dfInput as a list of dictionaries of just the Glossary Variables (missing values are None)
+    '''
+    columns = [column for column in dfInput.columns if column in dmnRules.glossary]
+    dfInput = dfInput[columns].astype(object)
+    return dfInput.where(pd.notna(dfInput), None).to_dict('records')
+
+
+def decideAll(dmnRules, rows):
+    '''
+Return a function that makes a decision for each of these rows
+    '''
+    def run():
+        for data in rows:
+            dmnRules.decide(data)
+    return run
+
+
+def synthetic(rules, execute):
+    '''
+Return the base name of the files (.xlsx, .dmn and .csv) of a synthetic set of 10 Decision Tables of this many rules.
+The Decision Tables are Unique, or, with Execute chains, Unique, Any, First and Rule order in turn
+    '''
+    global workDir
+
+    if (rules, execute) not in syntheticRules:
+        if workDir is None:
+            workDir = tempfile.TemporaryDirectory()
+        baseName = os.path.join(workDir.name, 'synthetic{!s}_{!s}'.format(rules, execute))
+        if execute == 1:
+            spec = generate.makeRules(tables=10, rules=rules, inputs=3)
+        else:
+            spec = generate.makeRules(tables=10, rules=rules, inputs=3, hitPolicies=['U', 'A', 'F', 'R'], execute=execute)
+        generate.writeWorkbook(spec, baseName + '.xlsx')
+        generate.writeXML(spec, baseName + '.dmn')
+        generate.makeData(spec, 1000).to_csv(baseName + '.csv', index=False)
+        syntheticRules[(rules, execute)] = baseName
+    return syntheticRules[(rules, execute)]
+
+
+def benchmarks(scales, sizes):
+    '''
+Return the list of benchmarks - (name, setup), where setup() returns the function to be timed
+    '''
+    marks = []
+    for workbook in ['Example1.xlsx', 'ExampleRows.xlsx', 'ExampleColumns.xlsx', 'ExampleCrosstab.xlsx', 'ExampleExecuteByRows1.xlsx',
+                     'ExampleHPV.xlsx', 'AN-SNAP V4 grouper (DMN).xlsx', 'Subacute NWAU21 calculator (DMN).xlsx']:
+        marks.append(('load/' + workbook, lambda workbook=workbook: (lambda: loaded(workbook))))
+    marks.append(('loadXML/simulation.dmn', lambda: (lambda: loaded('simulation.dmn'))))
+    marks.append(('decide/Example1.xlsx', lambda: decideAll(loaded('Example1.xlsx'), applicantRows())))
+    for workbook in ['ExampleRows.xlsx', 'ExampleColumns.xlsx', 'ExampleCrosstab.xlsx']:
+        marks.append(('decide/' + workbook, lambda workbook=workbook: decideAll(loaded(workbook), orderRows())))
+    marks.append(('decide/ExampleHPV.xlsx', lambda: decideAll(loaded('ExampleHPV.xlsx'), hpvRows())))
+    marks.append(('decide/simulation.dmn', lambda: decideAll(loaded('simulation.dmn'), simulationRows())))
+    def decideGrouper():
+        dmnRules = loaded('AN-SNAP V4 grouper (DMN).xlsx')
+        return decideAll(dmnRules, glossaryRows(dmnRules, subacuteExtract()) * 50)
+    marks.append(('decide/AN-SNAP V4 grouper (DMN).xlsx', decideGrouper))
+    marks.append(('decide/Subacute NWAU21 calculator (DMN).xlsx', lambda: decideAll(loaded('Subacute NWAU21 calculator (DMN).xlsx'), costingRows() * 10)))
+    def decideTables():
+        dmnRules = loaded('ExampleHPV.xlsx')
+        rows = hpvRows()
+        def run():
+            for data in rows:
+                dmnRules.decideTables(data, ['FirstTestOfCervicalRisk'])
+        return run
+    marks.append(('decideTables/ExampleHPV.xlsx', decideTables))
+    def runTest():
+        dmnRules = loaded('Therapy.xlsx')
+        return lambda: dmnRules.test()
+    marks.append(('test/Therapy.xlsx', runTest))
+    for rules in sizes:
+        marks.append(('load/synthetic/{!s} rules'.format(rules), lambda rules=rules: (lambda baseName: (lambda: loaded(baseName + '.xlsx')))(synthetic(rules, 1))))
+        marks.append(('loadXML/synthetic/{!s} rules'.format(rules), lambda rules=rules: (lambda baseName: (lambda: loaded(baseName + '.dmn')))(synthetic(rules, 1))))
+        marks.append(('decide/synthetic/{!s} rules'.format(rules),
+                      lambda rules=rules: (lambda baseName: decideAll(loaded(baseName + '.xlsx'), pd.read_csv(baseName + '.csv').to_dict('records')))(synthetic(rules, 1))))
+        marks.append(('decide/synthetic/{!s} rules (Execute chains)'.format(rules),
+                      lambda rules=rules: (lambda baseName: decideAll(loaded(baseName + '.xlsx'), pd.read_csv(baseName + '.csv').to_dict('records')))(synthetic(rules, 5))))
+    costingHeadings = {'Expected AN-SNAP V4 code':'AN-SNAP V4.0', 'Same-day admitted care':'Same Day Admission'}
+    for rows in scales:
+        marks.append(('decidePandas/{!s}/ExampleHPV.xlsx'.format(rows),
+                      lambda rows=rows: (lambda dmnRules, dfInput: (lambda: dmnRules.decidePandas(dfInput)))(loaded('ExampleHPV.xlsx'), hpvFrame(rows, 1))))
+        marks.append(('decidePandas/{!s}/AN-SNAP V4 grouper (DMN).xlsx'.format(rows),
+                      lambda rows=rows: (lambda dmnRules, dfInput: (lambda: dmnRules.decidePandas(dfInput)))(loaded('AN-SNAP V4 grouper (DMN).xlsx'), scaled(subacuteExtract(), rows, 1))))
+        marks.append(('decidePandas/{!s}/Subacute NWAU21 calculator (DMN).xlsx'.format(rows),
+                      lambda rows=rows: (lambda dmnRules, dfInput: (lambda: dmnRules.decidePandas(dfInput, headings=costingHeadings)))(loaded('Subacute NWAU21 calculator (DMN).xlsx'), scaled(costingExtract(), rows, 1))))
+    return marks
+
+
+def timeIt(function, repeats):
+    '''
+Return the fastest time, in seconds, of repeated runs of function (slow functions are only run once)
+    '''
+    best = None
+    for repeat in range(repeats):
+        started = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - started
+        if (best is None) or (elapsed < best):
+            best = elapsed
+        if elapsed > 1.0:
+            break
+    return best
+
+
+# The main code
+if __name__ == '__main__':
+    '''
+The main code
+Parse the command line arguments, run the benchmarks and compare them with, or save them as, the baseline
+    '''
+
+    # Get the script name (without the '.py' extension)
+    progName = os.path.basename(sys.argv[0])
+    progName = progName[0:-3]        # Strip off the .py ending
+
+    # Define the command line options
+    parser = argparse.ArgumentParser(prog=progName)
+    parser.add_argument('-s', '--scale', type=int, action='append', help='The number of rows in the synthetic decidePandas() DataFrames')
+    parser.add_argument('-R', '--rules', type=int, action='append', help='The number of rules in each synthetic Decision Table')
+    parser.add_argument('-r', '--repeats', type=int, default=3, help='The number of times each benchmark is run')
+    parser.add_argument('-k', '--keyword', action='append', default=[], help='Only run the benchmarks with this keyword in their name')
+    parser.add_argument('-b', '--baseline', default=os.path.join(repoDir, 'benchmarks', 'baseline.json'), help='The name of the baseline file')
+    parser.add_argument('-w', '--write', action='store_true', help='Write the benchmark times to the baseline file')
+    parser.add_argument('-t', '--tolerance', type=float, default=1.25, help='The slow down, from the baseline, which is a regression')
+
+    # Parse the command line options
+    args = parser.parse_args()
+    scales = args.scale
+    if scales is None:
+        scales = [10000]
+    sizes = args.rules
+    if sizes is None:
+        sizes = [100, 1000]
+
+    # Read the baseline
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as baselineFile:
+            baseline = json.load(baselineFile)
+    baseTimes = baseline.get('benchmarks', {})
+
+    # Run the benchmarks
+    times = {}
+    regressions = []
+    print('{:<65} {:>10} {:>10} {:>7}'.format('benchmark', 'seconds', 'baseline', 'ratio'))
+    for (name, setup) in benchmarks(scales, sizes):
+        if (len(args.keyword) > 0) and not any([keyword in name for keyword in args.keyword]):
+            continue
+        function = setup()
+        times[name] = timeIt(function, args.repeats)
+        if name in baseTimes:
+            ratio = times[name] / baseTimes[name]
+            print('{:<65} {:>10.4f} {:>10.4f} {:>7.2f}'.format(name, times[name], baseTimes[name], ratio))
+            if ratio > args.tolerance:
+                regressions.append(name)
+        else:
+            print('{:<65} {:>10.4f} {:>10} {:>7}'.format(name, times[name], '-', '-'))
+
+    # Save or compare with the baseline
+    if args.write:
+        baseTimes.update(times)
+        baseline['benchmarks'] = dict(sorted(baseTimes.items()))
+        baseline['python'] = platform.python_version()
+        baseline['platform'] = platform.platform()
+        baseline['date'] = datetime.date.today().isoformat()
+        with open(args.baseline, 'w') as baselineFile:
+            json.dump(baseline, baselineFile, indent=4)
+            baselineFile.write('\n')
+        print('Baseline written to', args.baseline)
+    elif len(regressions) > 0:
+        print('Regressions (more than {!s} times the baseline):'.format(args.tolerance))
+        for name in regressions:
+            print('    ' + name)
+        sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,307 @@
+#!/usr/bin/env python
+
+'''
+A script to generate large, synthetic DMN rules (an Excel workbook and a DMN XML file) and matching input data,
+for measuring how load(), loadXML() and decide() scale with the size of the rules.
+
+
+SYNOPSIS
+$ python3 benchmarks/generate.py [-T tables] [-R rules] [-I inputs] [-G glossary] [-p hitPolicy] [-r ranges] [-e execute] [-n rows] [-S seed] baseName
+
+REQUIRED
+baseName
+The name (without extension) of the generated files - baseName.xlsx, baseName.dmn and baseName.csv
+
+
+OPTIONS
+-T tables|--tables=tables
+The number of Decision Tables (default 10)
+
+-R rules|--rules=rules
+The number of rules in each Decision Table (default 100)
+
+-I inputs|--inputs=inputs
+The number of inputs tested in each Decision Table (default 3)
+
+-G glossary|--glossary=glossary
+The number of input Variables in the Glossary, shared across the Decision Tables (default - just enough for every Decision Table to test different inputs)
+
+-p hitPolicy|--hitPolicy=hitPolicy
+The hit policy of the Decision Tables - U, A, F, R, C, C+, C<, C> or C# (may be repeated, the hit policies are used in turn - default U)
+
+-r ranges|--ranges=ranges
+The fraction of the input Variables that are numbers tested against ranges - the rest are text tested for equality (default 0.5)
+
+-e execute|--execute=execute
+The number of Decision Tables in each Execute chain (default 1 - no Execute chains)
+
+-n rows|--rows=rows
+The number of rows of input data (default 1000)
+
+-S seed|--seed=seed
+The seed for the random number generator (default 1)
+'''
+
+# Import all the modules that make life easy
+import os
+import sys
+import argparse
+import random
+import math
+from xml.sax.saxutils import escape
+import openpyxl
+from openpyxl.styles import Border, Side
+import pandas as pd
+
+
+# The XML names for the pyDMNrules hit policies
+XMLhitPolicies = {'U':('UNIQUE', None), 'A':('ANY', None), 'F':('FIRST', None), 'R':('RULE ORDER', None), 'C':('COLLECT', None),
+                  'C+':('COLLECT', 'SUM'), 'C<':('COLLECT', 'MIN'), 'C>':('COLLECT', 'MAX'), 'C#':('COLLECT', 'COUNT')}
+
+
+def makeRules(tables=10, rules=100, inputs=3, glossary=None, hitPolicies=None, ranges=0.5, execute=1, seed=1):
+    '''
+Return the specification of a set of synthetic DMN rules
+
+Every Decision Table tests 'inputs' input Variables, chosen from a Glossary of 'glossary' input Variables, and sets one output Variable.
+Each input Variable takes 'base' different values (the smallest base for which there are at least 'rules' combinations of input values)
+which are either text ("K0", "K1", ...) tested for equality, or numbers tested against ranges ([0..10), [10..20), ...).
+Each rule tests for a different combination of input values, so no two rules in a Decision Table overlap.
+Decision Tables are grouped into Execute chains of 'execute' Decision Tables - the Decision runs the first Decision Table in each chain,
+and every rule in a Decision Table Executes the next Decision Table in its chain.
+    '''
+    if hitPolicies is None:
+        hitPolicies = ['U']
+    for hitPolicy in hitPolicies:
+        if hitPolicy not in XMLhitPolicies:
+            raise ValueError("Unsupported hit policy '{!s}'".format(hitPolicy))
+    if (tables < 1) or (rules < 1) or (inputs < 1) or (execute < 1):
+        raise ValueError('tables, rules, inputs and execute must be at least 1')
+    if glossary is None:
+        glossary = tables * inputs
+    if glossary < inputs:
+        raise ValueError('glossary must be at least inputs')
+    rng = random.Random(seed)
+    base = max(2, math.ceil(rules ** (1.0 / inputs)))
+    while base ** inputs < rules:
+        base += 1
+
+    # The Glossary - the input Variables, then one output Variable for each Decision Table
+    spec = {}
+    spec['base'] = base
+    spec['inputs'] = []
+    rangeVariables = int(round(glossary * ranges))
+    for variable in range(glossary):
+        spec['inputs'].append(('Input {!s}'.format(variable + 1), variable < rangeVariables))
+    spec['outputs'] = ['Output {!s}'.format(table + 1) for table in range(tables)]
+
+    # The Decision Tables
+    spec['tables'] = []
+    for table in range(tables):
+        thisTable = {}
+        thisTable['name'] = 'Table {!s}'.format(table + 1)
+        thisTable['hitPolicy'] = hitPolicies[table % len(hitPolicies)]
+        if glossary == tables * inputs:
+            thisTable['inputs'] = list(range(table * inputs, (table + 1) * inputs))
+        else:
+            thisTable['inputs'] = sorted(rng.sample(range(glossary), inputs))
+        thisTable['output'] = table
+        if ((table + 1) % execute != 0) and (table + 1 < tables):
+            thisTable['execute'] = 'Table {!s}'.format(table + 2)
+        else:
+            thisTable['execute'] = None
+        thisTable['rules'] = []
+        for combination in rng.sample(range(base ** inputs), rules):
+            values = []
+            for thisInput in range(inputs):
+                values.append(combination % base)
+                combination //= base
+            thisTable['rules'].append(values)
+        spec['tables'].append(thisTable)
+    spec['decisions'] = [thisTable['name'] for table, thisTable in enumerate(spec['tables']) if table % execute == 0]
+    return spec
+
+
+def inputTest(spec, variable, value):
+    '''
+Return the S-FEEL test of this input Variable for this value
+    '''
+    if spec['inputs'][variable][1]:
+        return '[{!s}..{!s})'.format(value * 10, (value + 1) * 10)
+    return '"K{!s}"'.format(value)
+
+
+def writeWorkbook(spec, workbook):
+    '''
+Write the synthetic DMN rules as an Excel workbook - a Glossary, a Decision and one worksheet for each Decision Table
+    '''
+    double = Side(style='double')
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Glossary'
+    ws.cell(row=2, column=2, value='Glossary')
+    ws.cell(row=3, column=2, value='Variable')
+    ws.cell(row=3, column=3, value='Business Concept')
+    ws.cell(row=3, column=4, value='Attribute')
+    row = 4
+    for concept, variables in [('Input', [name for (name, isRange) in spec['inputs']]), ('Output', spec['outputs'])]:
+        for thisVariable, variable in enumerate(variables):
+            ws.cell(row=row, column=2, value=variable)
+            if thisVariable == 0:
+                ws.cell(row=row, column=3, value=concept)
+            ws.cell(row=row, column=4, value=variable.replace(' ', '').lower())
+            row += 1
+
+    ws = wb.create_sheet('Decision')
+    ws.cell(row=2, column=2, value='Decision - synthetic rules')
+    ws.cell(row=3, column=2, value='Decisions')
+    ws.cell(row=3, column=3, value='Execute Decision Tables')
+    for row, table in enumerate(spec['decisions']):
+        ws.cell(row=row + 4, column=2, value='Decide ' + table)
+        ws.cell(row=row + 4, column=3, value=table)
+
+    for thisTable in spec['tables']:
+        ws = wb.create_sheet(thisTable['name'])
+        ws.cell(row=2, column=2, value=thisTable['name'])
+        headings = [thisTable['hitPolicy']] + [spec['inputs'][variable][0] for variable in thisTable['inputs']]
+        if thisTable['execute'] is not None:
+            headings.append('Execute')
+        headings.append(spec['outputs'][thisTable['output']])
+        lastInput = len(thisTable['inputs']) + 2
+        for col, heading in enumerate(headings):
+            cell = ws.cell(row=3, column=col + 2, value=heading)
+            cell.border = Border(left=Side(), right=(double if (col + 2 == lastInput) else Side()), top=Side(), bottom=double)
+        for rule, values in enumerate(thisTable['rules']):
+            row = rule + 4
+            ws.cell(row=row, column=2, value=rule + 1)
+            for col, variable in enumerate(thisTable['inputs']):
+                cell = ws.cell(row=row, column=col + 3, value=inputTest(spec, variable, values[col]))
+                if col + 3 == lastInput:
+                    cell.border = Border(left=Side(), right=double, top=Side(), bottom=Side())
+            col = lastInput + 1
+            if thisTable['execute'] is not None:
+                ws.cell(row=row, column=col, value='"' + thisTable['execute'] + '"')
+                col += 1
+            ws.cell(row=row, column=col, value=rule + 1)
+    wb.save(workbook)
+
+
+def writeXML(spec, DMNxmlFile):
+    '''
+Write the synthetic DMN rules as a DMN compliant XML file - one decision for each Decision Table.
+DMN has no Execute, so each Decision Table in an Execute chain requires the decision of the previous Decision Table in its chain
+    '''
+    required = {}
+    for thisTable in spec['tables']:
+        if thisTable['execute'] is not None:
+            required[thisTable['execute']] = thisTable['name']
+    lines = []
+    lines.append('<?xml version="1.0" encoding="UTF-8"?>')
+    lines.append('<definitions xmlns="https://www.omg.org/spec/DMN/20191111/MODEL/" id="synthetic" name="Synthetic rules" namespace="http://pyDMNrules/synthetic">')
+    for name, isRange in spec['inputs']:
+        thisId = name.replace(' ', '').lower()
+        lines.append('\t<inputData id="{!s}" name="{!s}">'.format(thisId, name))
+        lines.append('\t\t<variable name="{!s}" typeRef="{!s}"/>'.format(name, 'number' if isRange else 'string'))
+        lines.append('\t</inputData>')
+    for thisTable in spec['tables']:
+        tableId = thisTable['name'].replace(' ', '').lower()
+        lines.append('\t<decision id="{!s}" name="{!s}">'.format(tableId, thisTable['name']))
+        if thisTable['name'] in required:
+            lines.append('\t\t<informationRequirement id="{!s}Requires">'.format(tableId))
+            lines.append('\t\t\t<requiredDecision href="#{!s}"/>'.format(required[thisTable['name']].replace(' ', '').lower()))
+            lines.append('\t\t</informationRequirement>')
+        (hitPolicy, aggregation) = XMLhitPolicies[thisTable['hitPolicy']]
+        if aggregation is None:
+            lines.append('\t\t<decisionTable id="{!s}Table" hitPolicy="{!s}">'.format(tableId, hitPolicy))
+        else:
+            lines.append('\t\t<decisionTable id="{!s}Table" hitPolicy="{!s}" aggregation="{!s}">'.format(tableId, hitPolicy, aggregation))
+        for variable in thisTable['inputs']:
+            (name, isRange) = spec['inputs'][variable]
+            thisId = name.replace(' ', '').lower()
+            lines.append('\t\t\t<input id="{!s}{!s}" label="{!s}">'.format(tableId, thisId, name))
+            lines.append('\t\t\t\t<inputExpression id="{!s}{!s}Expression" typeRef="{!s}">'.format(tableId, thisId, 'number' if isRange else 'string'))
+            lines.append('\t\t\t\t\t<text>{!s}</text>'.format(thisId))
+            lines.append('\t\t\t\t</inputExpression>')
+            lines.append('\t\t\t</input>')
+        output = spec['outputs'][thisTable['output']]
+        lines.append('\t\t\t<output id="{!s}Output" label="{!s}" name="{!s}" typeRef="number"/>'.format(tableId, output, output.replace(' ', '').lower()))
+        for rule, values in enumerate(thisTable['rules']):
+            lines.append('\t\t\t<rule id="{!s}Rule{!s}">'.format(tableId, rule + 1))
+            for col, variable in enumerate(thisTable['inputs']):
+                lines.append('\t\t\t\t<inputEntry id="{!s}Rule{!s}Input{!s}">'.format(tableId, rule + 1, col + 1))
+                lines.append('\t\t\t\t\t<text>{!s}</text>'.format(escape(inputTest(spec, variable, values[col]))))
+                lines.append('\t\t\t\t</inputEntry>')
+            lines.append('\t\t\t\t<outputEntry id="{!s}Rule{!s}Output">'.format(tableId, rule + 1))
+            lines.append('\t\t\t\t\t<text>{!s}</text>'.format(rule + 1))
+            lines.append('\t\t\t\t</outputEntry>')
+            lines.append('\t\t\t</rule>')
+        lines.append('\t\t</decisionTable>')
+        lines.append('\t</decision>')
+    lines.append('</definitions>')
+    with open(DMNxmlFile, 'wt', newline='') as xmlFile:
+        xmlFile.write('\n'.join(lines) + '\n')
+
+
+def makeData(spec, rows=1000, seed=1):
+    '''
+Return a DataFrame of input data for the synthetic DMN rules - one column for each input Variable.
+Each row copies the input values of a randomly chosen rule in each Decision Table in turn, so most rows match rules,
+but Decision Tables that share input Variables can overwrite each other's values
+    '''
+    rng = random.Random(seed)
+    data = {}
+    for name, isRange in spec['inputs']:
+        data[name] = []
+    for row in range(rows):
+        values = {}
+        for variable in range(len(spec['inputs'])):
+            values[variable] = rng.randrange(spec['base'])
+        for thisTable in spec['tables']:
+            rule = rng.choice(thisTable['rules'])
+            for col, variable in enumerate(thisTable['inputs']):
+                values[variable] = rule[col]
+        for variable, (name, isRange) in enumerate(spec['inputs']):
+            if isRange:
+                data[name].append(values[variable] * 10 + rng.randrange(10))
+            else:
+                data[name].append('K{!s}'.format(values[variable]))
+    return pd.DataFrame(data)
+
+
+# The main code
+if __name__ == '__main__':
+    '''
+The main code
+Parse the command line arguments, generate the rules and write the Excel workbook, DMN XML file and CSV file of input data
+    '''
+
+    # Get the script name (without the '.py' extension)
+    progName = os.path.basename(sys.argv[0])
+    progName = progName[0:-3]        # Strip off the .py ending
+
+    # Define the command line options
+    parser = argparse.ArgumentParser(prog=progName)
+    parser.add_argument('baseName', help='The name (without extension) of the generated files')
+    parser.add_argument('-T', '--tables', type=int, default=10, help='The number of Decision Tables')
+    parser.add_argument('-R', '--rules', type=int, default=100, help='The number of rules in each Decision Table')
+    parser.add_argument('-I', '--inputs', type=int, default=3, help='The number of inputs tested in each Decision Table')
+    parser.add_argument('-G', '--glossary', type=int, help='The number of input Variables in the Glossary')
+    parser.add_argument('-p', '--hitPolicy', action='append', help='The hit policy of the Decision Tables (may be repeated)')
+    parser.add_argument('-r', '--ranges', type=float, default=0.5, help='The fraction of the input Variables that are tested against ranges')
+    parser.add_argument('-e', '--execute', type=int, default=1, help='The number of Decision Tables in each Execute chain')
+    parser.add_argument('-n', '--rows', type=int, default=1000, help='The number of rows of input data')
+    parser.add_argument('-S', '--seed', type=int, default=1, help='The seed for the random number generator')
+
+    # Parse the command line options
+    args = parser.parse_args()
+    try:
+        spec = makeRules(args.tables, args.rules, args.inputs, args.glossary, args.hitPolicy, args.ranges, args.execute, args.seed)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+    # Write the rules and the data
+    writeWorkbook(spec, args.baseName + '.xlsx')
+    writeXML(spec, args.baseName + '.dmn')
+    makeData(spec, args.rows, args.seed).to_csv(args.baseName + '.csv', index=False)
+    sys.exit(0)
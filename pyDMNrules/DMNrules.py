@@ -3,11 +3,23 @@
 # -----------------------------------------------------------------------------
 
 import sys
+import os
 import re
 import csv
 import io
 import datetime
 import copy
+import math
+import time
+import asyncio
+import collections
+import collections.abc
+import threading
+import bisect
+import heapq
+import pickle
+import concurrent.futures
+import numpy
 import pySFeel
 import openpyxl
 from openpyxl import load_workbook
@@ -15,11 +27,156 @@ from openpyxl import utils
 from pandas import Series, DataFrame
 import pandas
 import xml.etree.ElementTree as et
+import importlib.metadata
+
+
+wordChar = re.compile(r'\w')        # The characters that make up words (for r'\b')
+compiledMagic = b'pyDMNrules compiled rules\n'      # The first bytes of every saveCompiled() file
+compiledFormat = 3         # The saveCompiled() file format - increment when the pickled state changes
+
+workerRules = None         # The rules loaded in a decidePandas() worker process
+
+
+def contextProperty(name, initial):
+    # A DMN attribute that is held in the per-thread evaluation context (see DMN.context)
+    def getter(self):
+        context = self.context
+        if not hasattr(context, name):
+            setattr(context, name, initial())
+        return getattr(context, name)
+    def setter(self, value):
+        setattr(self.context, name, value)
+    return property(getter, setter)
+
+
+def initWorker(rules):
+    # Initialize a decidePandas() worker process with its own copy of the pickled rules
+    global workerRules
+    workerRules = pickle.loads(rules)
+
+
+def decidePandasChunk(dfChunk, args):
+    # Decide a chunk of rows in a decidePandas() worker process - args is (columns, outputs, kwargs)
+    (columns, outputs, kwargs) = args
+    return workerRules.decidePandasRows(dfChunk, columns, outputs, kwargs)
+
+
+def decideIterChunk(chunk, outputs, finalOnly):
+    # Decide a chunk of input dictionaries in a decideIter() worker process
+    return [workerRules.decide(data, outputs, finalOnly) for data in chunk]
+
+
+def decideBatch(rules, batch):
+    # Decide a batch of AsyncDMN requests - (data, outputs, finalOnly) - with these rules
+    return [rules.decide(data, outputs, finalOnly) for (data, outputs, finalOnly) in batch]
+
+
+def decideWorkerBatch(batch):
+    # Decide a batch of AsyncDMN requests in an AsyncDMN worker process
+    return decideBatch(workerRules, batch)
+
+
+class DecisionResult(collections.abc.MutableMapping):
+    """
+    The 'Result' of a decision
+
+    A mapping of every Glossary Variable to it's value when the Decision Table was executed.
+    The values are fetched from a snapshot of the pySFeel variables the first time they are needed,
+    so Variables that are never looked at cost nothing. decide() and decideTables() return the 'Result' as a plain dictionary.
+
+    """
+
+    def __init__(self, variableItems, frame):
+        self.variableItems = variableItems      # Glossary Variable -> BusinessConcept.Attribute (shared, in Glossary order)
+        self.frame = frame                      # The snapshot of the pySFeel variables
+        self.diff = {}                          # The values that have been fetched, or assigned, or added
+        self.deleted = set()
+
+    def __getitem__(self, variable):
+        if variable in self.diff:
+            return self.diff[variable]
+        if (variable not in self.variableItems) or (variable in self.deleted):
+            raise KeyError(variable)
+        value = self.frame.get(self.variableItems[variable])
+        if isinstance(value, str):
+            if (len(value) > 0) and (value[0] == '"') and (value[-1] == '"'):
+                value = value[1:-1]
+        self.diff[variable] = value
+        return value
+
+    def __setitem__(self, variable, value):
+        self.deleted.discard(variable)
+        self.diff[variable] = value
+
+    def __delitem__(self, variable):
+        if variable not in self:
+            raise KeyError(variable)
+        self.diff.pop(variable, None)
+        self.deleted.add(variable)
+
+    def __contains__(self, variable):
+        return (variable in self.diff) or ((variable in self.variableItems) and (variable not in self.deleted))
+
+    def __iter__(self):
+        for variable in self.variableItems:
+            if variable not in self.deleted:
+                yield variable
+        for variable in self.diff:
+            if variable not in self.variableItems:
+                yield variable
+
+    def __len__(self):
+        return len(self.variableItems) - len(self.deleted) + len([variable for variable in self.diff if variable not in self.variableItems])
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def project(self, variables):
+        # Return a Result of just these Variables, sharing this Result's snapshot
+        variableItems = {}
+        for variable in variables:
+            if variable in self.variableItems:
+                variableItems[variable] = self.variableItems[variable]
+        result = DecisionResult(variableItems, self.frame)
+        for variable in variables:
+            if variable in self.diff:
+                result.diff[variable] = self.diff[variable]
+            elif variable in self.deleted:
+                result.deleted.add(variable)
+        return result
+
+    def __getstate__(self):
+        # Fetch every value, so the snapshot isn't needed any more
+        for variable in list(self):
+            self[variable]
+        state = self.__dict__.copy()
+        state['frame'] = {}
+        return state
+
 
 class DMN():
 
+    # The evaluation context. Every thread gets it's own pySFeel lexer and parser (the parser holds the values of the variables),
+    # list of errors, list of results and Decision Table status, so decide() never changes the loaded rules
+    # (glossary, decisionTables, rules, decisions and compiled tests) and one DMN can be shared by many threads
+    lexer = contextProperty('lexer', pySFeel.SFeelLexer)
+    parser = contextProperty('parser', pySFeel.SFeelParser)
+    errors = contextProperty('errors', list)
+    allResults = contextProperty('allResults', list)
+    tableStatus = contextProperty('tableStatus', dict)
+    recursionCount = contextProperty('recursionCount', dict)
+    profile = contextProperty('profile', lambda: None)
+
 
     def __init__(self):
+        self.context = threading.local()
+        self.cacheSize = 0              # The maximum number of decisions in the decision cache (0 means no caching)
+        self.cacheTTL = None            # The number of seconds a decision stays in the decision cache (None means forever)
+        self.cacheLock = threading.Lock()
+        self.clearCache()
+        self.profiler = None            # The function called with the profile of each Decision Table run (None means no profiling)
+        self.coverage = None            # The rule coverage counts (None means rule coverage isn't being collected)
+        self.coverageLock = threading.Lock()
         self.lexer = pySFeel.SFeelLexer()
         self.parser = pySFeel.SFeelParser()
         # self.glossary is a dictionary of dictionaries (one per variable).
@@ -70,7 +227,30 @@ class DMN():
         ]
 
 
+    def __getstate__(self):
+        # The evaluation context (pySFeel lexer and parser etc.) can't be pickled - a new one is created when the rules are unpickled
+        # The workbook isn't needed to make decisions, so it isn't pickled either (and test() can't be run)
+        state = self.__dict__.copy()
+        for name in ['context', 'wb', 'wbt', 'cache', 'cacheLock', 'profiler', 'coverage', 'coverageLock']:
+            if name in state:
+                del state[name]
+        state['testIsLoaded'] = False
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.context = threading.local()
+        self.cacheLock = threading.Lock()
+        self.clearCache()
+        self.profiler = None
+        self.coverage = None
+        self.coverageLock = threading.Lock()
+
+
     def sfeel(self, text):
+        if self.profiler is not None:
+            self.profileCount('sfeelParses')
         failed = False
         (status, returnVal) = self.parser.sFeelParse(text)
         if 'errors' in status:
@@ -80,6 +260,94 @@ class DMN():
         return (failed, returnVal)
 
 
+    def compileSfeel(self, text):
+        # Compile some S-FEEL text so that it can be evaluated repeatedly by sfeelCompiled()
+        # pySFeel evaluates S-FEEL as it parses it (there is no intermediate AST)
+        # so the compiled form is the lexed token stream, which is the bulk of the cost of sfeel()
+        # Text that does not lex cleanly is left uncompiled and sfeelCompiled() falls back to sfeel()
+        if (text is None) or (text == '') or text.isspace():
+            return (text, None)
+        tokens = []
+        for token in self.lexer.tokenize(text):
+            if token.type == 'ERROR':
+                return (text, None)
+            tokens.append(token)
+        return (text, tuple(tokens))
+
+
+    def sfeelCompiled(self, compiled):
+        # Evaluate some S-FEEL text that was compiled by compileSfeel()
+        (text, tokens) = compiled
+        if tokens is None:
+            return self.sfeel(text)
+        if self.profiler is not None:
+            self.profileCount('sfeelEvaluations')
+        failed = False
+        self.parser.clearErrors()
+        returnVal = self.parser.parse(iter(tokens))
+        parseErrors = self.parser.collectErrors()
+        if len(parseErrors) > 0:
+            self.errors += parseErrors
+            self.errors += ['in text "' + text + '"']
+            failed = True
+        return (failed, returnVal)
+
+
+    def glossaryMatchers(self):
+        # Return the matchers that replaceVariable() and replaceItems() use to find every Variable, or BusinessConcept.Attribute, in one pass
+        # and the lengths of all the BusinessConcept.Attributes. These are rebuilt whenever the Glossary changes.
+        # Variables are only ever added to a Glossary, so the Glossary dictionaries, and their sizes, identify their contents
+        signature = (self.glossary, len(self.glossary), self.glossaryItems, len(self.glossaryItems))
+        matchers = getattr(self, 'matchers', None)
+        if (matchers is None) or (matchers[0] is not signature[0]) or (matchers[1] != signature[1]) or (matchers[2] is not signature[2]) or (matchers[3] != signature[3]):
+            itemLengths = sorted(set(len(item) for item in self.glossaryItems))
+            self.matchers = signature + (self.buildMatcher(self.glossary), self.buildMatcher(self.glossaryItems), itemLengths)
+        return self.matchers[4:]
+
+
+    def buildMatcher(self, names):
+        # Build a matcher for these names, being a regular expression that finds every place where any of the names starts
+        # and a trie of the names - a dictionary of characters, each pointing to a dictionary of the following characters
+        # The key '' marks the end of a name
+        trie = {}
+        for name in names:
+            node = trie
+            for char in name:
+                node = node.setdefault(char, {})
+            node[''] = name
+        if len(names) == 0:
+            starts = re.compile(r'(?!)')
+        else:
+            starts = re.compile('(?=' + '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True)) + ')')
+        return (starts, trie)
+
+
+    def isWordBoundary(self, text, at, start, end):
+        # Check if 'at' is a word boundary (r'\b') in text[start:end]
+        before = (at > start) and (wordChar.match(text[at - 1]) is not None)
+        after = (at < end) and (wordChar.match(text[at]) is not None)
+        return before != after
+
+
+    def matchNames(self, matcher, text, at, start, end):
+        # Return the names in this matcher that are in text[start:end] at 'at', as whole words, shortest first
+        # (the names that re.search(r'\b' + name + r'\b', text[start:end]) would find at 'at')
+        (starts, trie) = matcher
+        names = []
+        node = trie
+        thisAt = at
+        while thisAt < end:
+            node = node.get(text[thisAt])
+            if node is None:
+                break
+            thisAt += 1
+            if ('' in node) and self.isWordBoundary(text, thisAt, start, end):
+                names.append(node[''])
+        if (len(names) > 0) and not self.isWordBoundary(text, at, start, end):
+            return []
+        return names
+
+
     def replaceVariable(self, text):
         # print('relaceVariable', "'{}'".format(text), len(text))
         # Replace all instance of a Variable in this text with it's BusinessConcept.Attribute
@@ -114,39 +382,43 @@ class DMN():
             searchTo = text[at:].find('"')      # Stop replacing at the next string
             if searchTo == -1:
                 searchTo = to - at
-            # Look for any variable at this spot
-            for thisLen in sorted(self.glossaryLen, reverse=True):          # Look for the longest match first
-                for variable in self.glossaryLen[thisLen]:
-                    thisVariable = re.sub(r'\.', r'\\.', variable)
-                    match = re.search(r'\b' + thisVariable + r'\b', text[at:at + searchTo])
-                    if match is not None:
-                        # We don't prohibit using the same 'name' for a Variable AND a Business Concept AND an Attribute
-                        # So BusinessConcept.Attribute could be BusinessConcept.Variable or Variable.Attribute
-                        # Neither of which is a match - BusinessConcept.Attribute is replace with a value later
-                        found = True
-                        for item in self.glossaryItems:                 # Check every BusinessConcept.Attribute combination
-                            if text[at + match.start():].startswith(item):  # Check that we haven't hit BusinessConcept.Attribute
-                                found = False
-                                break
-                            if text[at:at + match.end()].endswith(item):    # Or landed on BusinessConcept.Attribute
-                                found = False
-                                break
-                        if not found:
-                            continue
-                        # Check for a variable with a dot operator
-                        thisDotOperator = None
-                        for i in range(len(self.DMNdotOperators)):
-                            if text[at + match.start() + len(variable):].startswith(self.DMNdotOperators[i]):
-                                thisDotOperator = self.DMNdotOperators[i]
-                                break
-                        if ((foundAt == -1) or (match.start() < foundAt)):                  # First found or nearer find
-                            foundAt = match.start()
-                            dotOperator = thisDotOperator
-                            if dotOperator is not None:
-                                foundLen = len(variable) + len(dotOperator)
-                            else:
-                                foundLen = len(variable)
-                            foundVariable = variable
+            # Look for the first place where any variable starts
+            (variableMatcher, itemMatcher, itemLengths) = self.glossaryMatchers()
+            checked = set()
+            for start in variableMatcher[0].finditer(text, at, at + searchTo):
+                thisAt = start.start()
+                for variable in self.matchNames(variableMatcher, text, thisAt, at, at + searchTo):        # Shortest first
+                    if variable in checked:         # Only the first match of each variable counts
+                        continue
+                    checked.add(variable)
+                    # We don't prohibit using the same 'name' for a Variable AND a Business Concept AND an Attribute
+                    # So BusinessConcept.Attribute could be BusinessConcept.Variable or Variable.Attribute
+                    # Neither of which is a match - BusinessConcept.Attribute is replace with a value later
+                    thisEnd = thisAt + len(variable)
+                    found = True
+                    for thisLen in itemLengths:                     # Check every BusinessConcept.Attribute combination
+                        if text[thisAt:thisAt + thisLen] in self.glossaryItems:       # Check that we haven't hit BusinessConcept.Attribute
+                            found = False
+                            break
+                        if (thisLen <= thisEnd - at) and (text[thisEnd - thisLen:thisEnd] in self.glossaryItems):    # Or landed on BusinessConcept.Attribute
+                            found = False
+                            break
+                    if not found:
+                        continue
+                    foundAt = thisAt - at
+                    foundVariable = variable
+                if foundAt != -1:
+                    break
+            if foundAt != -1:
+                # Check for a variable with a dot operator
+                for i in range(len(self.DMNdotOperators)):
+                    if text[at + foundAt + len(foundVariable):].startswith(self.DMNdotOperators[i]):
+                        dotOperator = self.DMNdotOperators[i]
+                        break
+                if dotOperator is not None:
+                    foundLen = len(foundVariable) + len(dotOperator)
+                else:
+                    foundLen = len(foundVariable)
             if foundAt == -1:               # Nothing found
                 newText += text[at:at + searchTo]
                 at += searchTo
@@ -175,6 +447,9 @@ class DMN():
     def data2sfeel(self, coordinate, sheet, text, isTest):
         # Check that a string of text (data) from an Excel spreadsheet cell or DMN XML file, is valid S-FEEL
         # print('data2sfeel():', "'{!s}'".format(text), isTest)
+        started = None
+        if self.profiler is not None:
+            started = time.perf_counter()
 
         # Use the pySFeel tokenizer to look for strings that look like 'names', but aren't in the glossary
         # These become strings, unless there's a reason not to do so - in a context, list filter, function etc.
@@ -191,6 +466,8 @@ class DMN():
         for token in tokens:
             if token.type == 'ERROR':
                 if isTest:
+                    if started is not None:
+                        self.profileTime('data2sfeel', started)
                     return None
                 if not isError:
                     if sheet is None:
@@ -370,6 +647,8 @@ class DMN():
             penultimateTokenValue = lastTokenValue
             lastTokenValue = token.value
         # print('data2sfeel(): returning', thisData)
+        if started is not None:
+            self.profileTime('data2sfeel', started)
         return thisData
 
 
@@ -1181,6 +1460,64 @@ class DMN():
             self.errors.append("Invalid Data '{!r}' - not a valid S-FEEL data type".format(value))
             return None
 
+
+    def value2python(self, value):
+        # Convert a Python value to the value that pySFeel would hold after evaluating value2sfeel(value)
+        # Returns (True, value), or (False, None) if the value has to be passed to pySFeel as FEEL text
+        # (things that don't survive the round trip unchanged, such as FEEL strings and escapes, time zones, non-finite numbers)
+        # Subclasses (numpy.float64, numpy.str_, pandas.Timestamp) are converted to the built in type, or passed as FEEL text,
+        # because pySFeel's comparisons don't work with them
+        if (value is None) or isinstance(value, bool):
+            return (True, value)
+        elif isinstance(value, int):
+            return (True, float(value))
+        elif isinstance(value, float):
+            if math.isfinite(value):
+                return (True, float(value))
+            return (False, None)
+        elif isinstance(value, str):
+            if (value.find('\\') != -1) or ((len(value) > 1) and (value[-1] == '"') and ((value[0] == '"') or (value[:2] == '@"'))):
+                return (False, None)
+            return (True, str(value))
+        elif isinstance(value, list):
+            newValue = []
+            for thisValue in value:
+                (isPython, thisValue) = self.value2python(thisValue)
+                if not isPython:
+                    return (False, None)
+                newValue.append(thisValue)
+            return (True, newValue)
+        elif isinstance(value, dict):
+            newValue = {}
+            for key in value:
+                if not isinstance(key, str) or (re.match(r'^[A-Za-z_][A-Za-z_0-9]*$', key) is None):
+                    return (False, None)
+                (isPython, thisValue) = self.value2python(value[key])
+                if not isPython:
+                    return (False, None)
+                newValue[key] = thisValue
+            return (True, newValue)
+        elif type(value) in [datetime.datetime, datetime.time]:
+            if value.tzinfo is None:
+                return (True, value)
+            return (False, None)
+        elif type(value) == datetime.date:
+            return (True, value)
+        elif type(value) == datetime.timedelta:
+            if (value >= datetime.timedelta(0)) and (value.microseconds == 0):
+                return (True, value)
+            return (False, None)
+        elif isinstance(value, tuple) and (len(value) == 4):
+            (end0, low0, high1, end1) = value
+            if (end0 in ['(', '[', ']']) and (end1 in [')', '[', ']']) and (type(low0) == type(high1)):
+                if (type(low0) in [int, float]) and math.isfinite(low0) and math.isfinite(high1) and (low0 <= high1):
+                    return (True, (end0, float(low0), float(high1), end1))
+                elif (type(low0) == datetime.date) and (low0 <= high1):
+                    return (True, value)
+            return (False, None)
+        return (False, None)
+
+
     def tableSize(self, cell, isDecisionTable):
         # Determine the size of a table
         rows = 1
@@ -2117,7 +2454,7 @@ class DMN():
         return (rows, cols, len(self.rules[table]))
 
 
-    def load(self, rulesBook):
+    def load(self, rulesBook, decisionDAG=False):
         """
         Load a rulesBook
 
@@ -2127,6 +2464,12 @@ class DMN():
         Args:
             param1 (str): The name of the Excel workbook (including path if it is not in the current working directory
 
+            OPTIONAL
+
+            decisionDAG=True
+
+                - compile each Unique, Any and First hit policy Decision Table into a decision DAG (see use())
+
         Returns:
             dict: status
 
@@ -2151,10 +2494,10 @@ class DMN():
             status = {}
             status['errors'] = self.errors
             return status        
-        return self.use(wb)
+        return self.use(wb, decisionDAG)
 
 
-    def use(self, workbook):
+    def use(self, workbook, decisionDAG=False):
         """
         Use a rules workbookook
 
@@ -2164,6 +2507,15 @@ class DMN():
         Args:
             param1 (openpyxl.workbook): An openpyxl workbook (either loaded with openpyxl or created using openpyxl)
 
+            OPTIONAL
+
+            decisionDAG=True
+
+                - compile each Unique, Any and First hit policy Decision Table into a decision DAG,
+                  where every distinct test is a shared condition node,
+                  so that decide() tests each input against each distinct condition at most once, rather than once per rule
+                - status['decisionDAG'] will be a dictionary of the number of condition nodes in each compiled Decision Table
+
         Returns:
             dict: status
 
@@ -2182,6 +2534,7 @@ class DMN():
         """
 
         self.errors = []
+        self.clearCache()
         if not isinstance(workbook, openpyxl.Workbook):
             self.errors.append("workbook is not a valid openpyxl workbook")
             status = {}
@@ -2887,12 +3240,15 @@ class DMN():
                     status['errors'] = self.errors
                     return status
 
+        self.compileRules(decisionDAG)
         self.isLoaded = True
         if 'Test'  in self.wb:
             self.wbt = self.wb
             self.testIsLoaded = True
 
         status = {}
+        if decisionDAG:
+            status['decisionDAG'] = self.countDAGnodes()
         if len(self.errors) > 0:
             status['errors'] = self.errors
         return status
@@ -2948,7 +3304,96 @@ class DMN():
         return theseTables
 
 
-    def loadXML(self, DMNxmlFile):
+    def saveCompiled(self, compiledFile):
+        """
+        Save the compiled rules
+
+        This routine saves the fully processed rules (glossary, Decision Tables, rules, decisions and compiled tests)
+        in a versioned binary file, which can be read back with loadCompiled(), without re-reading the workbook or XML
+
+        Args:
+            param1 (str): The name of the compiled rules file (including path if it is not in the current working directory)
+
+        Returns:
+            dict: status
+
+            'status' is a dictionary of different status information.
+            Currently only status['error'] is implemented.
+            If the key 'error' is present in the status dictionary,
+            then saveCompiled() encountered one or more errors and status['error'] is the list of those errors
+
+        """
+
+        self.errors = []
+        status = {}
+        if not self.isLoaded:
+            self.errors.append('No rules have been loaded')
+            status['errors'] = self.errors
+            return status
+        header = {'format':compiledFormat, 'pySFeel':importlib.metadata.version('pySFeel')}
+        try:
+            with open(compiledFile, 'wb') as compiled:
+                compiled.write(compiledMagic)
+                pickle.dump(header, compiled, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(self, compiled, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self.errors.append("Cannot write compiled rules file '{!s}' - {!s}".format(compiledFile, e))
+            status['errors'] = self.errors
+        return status
+
+
+    def loadCompiled(self, compiledFile):
+        """
+        Load compiled rules
+
+        This routine loads rules saved with saveCompiled(), replacing any rules already loaded
+
+        Args:
+            param1 (str): The name of the compiled rules file (including path if it is not in the current working directory)
+
+        Returns:
+            dict: status
+
+            'status' is a dictionary of different status information.
+            Currently only status['error'] is implemented.
+            If the key 'error' is present in the status dictionary,
+            then loadCompiled() encountered one or more errors and status['error'] is the list of those errors
+
+        NOTE: The compiled rules file must have been saved by the same file format and the same version of pySFeel
+        (the compiled tests are pySFeel tokens); otherwise the workbook or XML file must be loaded again.
+        Compiled rules files are pickles, so only load files from a trusted source.
+
+        """
+
+        self.errors = []
+        status = {}
+        try:
+            with open(compiledFile, 'rb') as compiled:
+                if compiled.read(len(compiledMagic)) != compiledMagic:
+                    self.errors.append("'{!s}' is not a compiled rules file".format(compiledFile))
+                    status['errors'] = self.errors
+                    return status
+                header = pickle.load(compiled)
+                if header.get('format') != compiledFormat:
+                    self.errors.append("Compiled rules file '{!s}' is format {!s}, not format {!s}".format(compiledFile, header.get('format'), compiledFormat))
+                    status['errors'] = self.errors
+                    return status
+                version = importlib.metadata.version('pySFeel')
+                if header.get('pySFeel') != version:
+                    self.errors.append("Compiled rules file '{!s}' was compiled with pySFeel {!s}, not pySFeel {!s}".format(compiledFile, header.get('pySFeel'), version))
+                    status['errors'] = self.errors
+                    return status
+                rules = pickle.load(compiled)
+        except Exception as e:
+            self.errors.append("No readable compiled rules file named '{!s}'!".format(compiledFile))
+            status['errors'] = self.errors
+            return status
+        self.__dict__.clear()
+        self.__setstate__(rules.__getstate__())
+        return status
+
+
+    def loadXML(self, DMNxmlFile, decisionDAG=False):
         """
         Load a DMN compliant XML file
 
@@ -2957,6 +3402,12 @@ class DMN():
         Args:
             param1 (str): The name of the DMN compliant file (including path if it is not in the current working directory
 
+            OPTIONAL
+
+            decisionDAG=True
+
+                - compile each Unique, Any and First hit policy Decision Table into a decision DAG (see use())
+
         Returns:
             dict: status
 
@@ -2978,10 +3429,10 @@ class DMN():
             status['errors'] = self.errors
             return status
         xmlFile.close()        
-        return self.useXML(text)
+        return self.useXML(text, decisionDAG)
 
 
-    def useXML(self, text):
+    def useXML(self, text, decisionDAG=False):
         """
         Use a DMN XML compliant string 
 
@@ -2991,6 +3442,13 @@ class DMN():
         Args:
             param1 (str): A string containing a DMN compliant XML structure
 
+            OPTIONAL
+
+            decisionDAG=True
+
+                - compile each Unique, Any and First hit policy Decision Table into a decision DAG (see use())
+                - status['decisionDAG'] will be a dictionary of the number of condition nodes in each compiled Decision Table
+
         Returns:
             dict: status
 
@@ -3010,6 +3468,7 @@ class DMN():
         self.glossaryNames = ['glossary']
         self.glossaryLoaded = False
         self.isLoaded = False
+        self.clearCache()
 
         self.errors = []
 
@@ -4083,9 +4542,12 @@ class DMN():
             status['errors'] = self.errors
             return status
 
+        self.compileRules(decisionDAG)
         self.isLoaded = True
 
         status = {}
+        if decisionDAG:
+            status['decisionDAG'] = self.countDAGnodes()
         if len(self.errors) > 0:
             status['errors'] = self.errors
         return status
@@ -4110,80 +4572,810 @@ class DMN():
 
 
     def initGlossary(self):
+        # Set every Glossary item to null, and forget any other values, by giving pySFeel a copy of the all null frame of Glossary items
+        # Glossary items are only ever added to a Glossary, so the frame is rebuilt if this is a different, or a larger, Glossary
         if not self.glossaryLoaded:
             self.errors.append('No rulesBook has been loaded')
             return
-        for item in self.glossaryItems:
-            (failed, retVal) = self.sfeel('{} <- null'.format(item))
-            if failed:
-                self.errors.append("Bad S-FEEL when initializing Glossary with '{} <- null'".format(item))
+        if (getattr(self, 'nullFrameItems', None) is not self.glossaryItems) or (len(self.nullFrame) != len(self.glossaryItems)):
+            self.nullFrame = dict.fromkeys(self.glossaryItems)
+            self.nullFrameItems = self.glossaryItems
+        self.parser.names = self.nullFrame.copy()
         return
 
 
-    def getGlossaryNames(self):
-        """
-        Return the Glossary Names
-
-        This routing returns the Glossary Name - the name of the glossary and the annotation headings
+    def compileRules(self, decisionDAG=False):
+        # Compile the S-FEEL that decide() evaluates over and over again, once, when the rules are loaded
+        #  - fetching the value of every Glossary item
+        #  - every input validity test in every Decision Table
+        #  - every test, and every fixed output assignment, in every rule
+        #  - every output expression in every rule (see compileOutput())
+        #  - every Decision Table input test in the Decision
+        # and, optionally, compile single hit Decision Tables into decision DAGs
+        self.compiledItems = {}
+        for variable in self.glossary:
+            item = self.glossary[variable]['item']
+            self.compiledItems[variable] = self.compileSfeel('{}'.format(item))
+        # Glossary items, and Business Concepts, that are simple pySFeel names can have their values set and fetched directly
+        self.nameItems = set()
+        for item in list(self.glossaryItems) + list(self.glossaryConcepts):
+            (text, tokens) = self.compileSfeel('{}'.format(item))
+            if (tokens is not None) and (len(tokens) == 1) and (tokens[0].type == 'NAME') and (tokens[0].value == item):
+                self.nameItems.add(item)
+        # The 'Result' of a decision fetches the value of these from a snapshot of the pySFeel variables, only when needed
+        # (other Variables have to be evaluated when each Decision Table is executed)
+        self.variableItems = {}
+        self.expressionVariables = []
+        for variable in self.glossary:
+            item = self.glossary[variable]['item']
+            self.variableItems[variable] = item
+            if item not in self.nameItems:
+                self.expressionVariables.append(variable)
+        for table in self.decisionTables:
+            compiledValidity = []
+            for (testValidity, validityIsFixed, validityFixedValue) in self.decisionTables[table]['inputValidity']:
+                if (testValidity is None) or validityIsFixed:
+                    compiledValidity.append(None)
+                else:
+                    compiledValidity.append(self.compileSfeel('{}'.format(testValidity)))
+            self.decisionTables[table]['compiledValidity'] = compiledValidity
+            self.decisionTables[table]['validityChecks'] = [self.validityCheck(compiled) for compiled in compiledValidity]
+        for table in self.rules:
+            for thisRule in range(len(self.rules[table])):
+                compiledTests = []
+                for (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) in self.rules[table][thisRule]['tests']:
+                    compiledTest = self.compileSfeel(str(test))
+                    compiledValue = None
+                    compiledIn = None
+                    item = self.glossary[variable]['item']
+                    if (not isFixed) and isinstance(test, str) and test.startswith(item):       # The test may be 'item = list'
+                        restOfTest = test[len(item):].strip()
+                        if restOfTest.startswith('='):
+                            compiledValue = self.compileSfeel(str(restOfTest[1:]))
+                            compiledIn = self.compileSfeel(str(item + ' in ' + restOfTest[1:]))
+                    compiledTests.append((compiledTest, compiledValue, compiledIn))
+                self.rules[table][thisRule]['compiledTests'] = compiledTests
+                compiledOutputs = []
+                for (variable, result, outputIndex, rank, isFixed, fixedValue, coordinate, sheet) in self.rules[table][thisRule]['outputs']:
+                    if isFixed and (variable in self.glossary):
+                        item = self.glossary[variable]['item']
+                        compiledOutputs.append(self.compileSfeel('{} <- {}'.format(item, result)))
+                    else:       # Non-fixed outputs are assembled from the current values of items at decision time
+                        compiledOutputs.append(None)
+                self.rules[table][thisRule]['compiledOutputs'] = compiledOutputs
+                outputExpressions = []
+                for (variable, result, outputIndex, rank, isFixed, fixedValue, coordinate, sheet) in self.rules[table][thisRule]['outputs']:
+                    if (not isFixed) and (variable in self.glossary) and (self.glossary[variable]['item'] in self.nameItems):
+                        outputExpressions.append(self.compileOutput(result))
+                    else:
+                        outputExpressions.append(None)
+                self.rules[table][thisRule]['outputExpressions'] = outputExpressions
+        self.compiledDecisionTests = []
+        for (table, thisDecision, inputTests, decisionAnnotations) in self.decisions:
+            compiledTests = []
+            for (variable, test, isFixed, fixedValue) in inputTests:
+                compiledTests.append(self.compileSfeel('{}'.format(test)))
+            self.compiledDecisionTests.append(compiledTests)
+        for table in self.rules:
+            self.indexRules(table)
+            self.planColumns(table)
+            self.decisionTables[table]['decisionDAG'] = None
+            if decisionDAG:
+                self.buildDAG(table)
+        # Decisions can only be cached if they don't depend upon the current date/time
+        for table in self.decisionTables:
+            texts = [testValidity for (testValidity, validityIsFixed, validityFixedValue) in self.decisionTables[table]['inputValidity']]
+            for thisRule in self.rules.get(table, []):
+                texts += [test for (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) in thisRule['tests']]
+                texts += [result for (variable, result, outputIndex, rank, isFixed, fixedValue, coordinate, sheet) in thisRule['outputs']]
+            self.decisionTables[table]['deterministic'] = self.isDeterministic(texts)
+        texts = []
+        for (table, thisDecision, inputTests, decisionAnnotations) in self.decisions:
+            texts += [test for (variable, test, isFixed, fixedValue) in inputTests]
+        self.decisionDeterministic = self.isDeterministic(texts)
+        return
 
-        Args:
-            None
 
-        Returns:
-            str
+    def isDeterministic(self, texts):
+        # Check that none of these S-FEEL texts call now() or today()
+        for text in texts:
+            if isinstance(text, str) and (re.search(r'\b(now|today)\s*\(', text) is not None):
+                return False
+        return True
 
-        """
-        if not self.isLoaded:
-            return []
-        return self.glossaryNames
 
-    
-    def getGlossary(self):
-        """
-        Return the Glossary and current values
+    def compileOutput(self, result):
+        # Classify and compile an output expression, that isn't a fixed value, for outputValue()
+        #  - ('constant', result, value, None) for a constant expression (including text that isn't S-FEEL, which is a string)
+        #  - ('reference', result, None, [item]) for a reference to a Glossary item
+        #  - ('expression', result, compiled expression, items) for an expression of Glossary items, with constant subexpressions folded
+        # Return None if the output has to be assembled by replacing the Glossary items with their values at decision time
+        if (not isinstance(result, str)) or (result.strip() == ''):
+            return None
+        (text, tokens) = self.compileSfeel(result)
+        if tokens is None:
+            return None
+        items = []
+        for token in tokens:
+            if token.type == 'NAME':
+                if token.value not in self.glossaryItems:
+                    return None
+                if token.value not in items:
+                    items.append(token.value)
+        if len(items) == 0:
+            if not self.isDeterministic([result]):
+                return None
+            errorCount = len(self.errors)
+            (replaced, result) = self.replaceItems(result)
+            if len(replaced) > 0:
+                del self.errors[errorCount:]
+                return None
+            sfeelText = self.data2sfeel(None, None, result, True)           # See if this is valid S-FEEL
+            if sfeelText is None:               # Not valid FEEL - make this a FEEL string
+                result = '"' + result + '"'
+            else:                               # Valid FEEL tokens - check if it is a value FEEL expression
+                (status, tmpResult) = self.parser.sFeelParse(result)
+                if 'errors' in status:          # No - so make it a string
+                    result = '"' + result + '"'
+            (failed, value) = self.sfeel('{}'.format(result))
+            del self.errors[errorCount:]
+            if failed:
+                return None
+            return ('constant', result, value, None)
+        if (len(tokens) == 1) and (tokens[0].type == 'NAME'):
+            return ('reference', result, None, items)
+        return ('expression', result, (text, self.foldConstants(tokens)), items)
 
-        This routine returns the Glossary - each Variable, within each Business Concept.
 
-        Args:
-            None
+    def foldConstants(self, tokens):
+        # Replace every parenthesised subexpression of number literals with its value
+        literals = ['NUMBER', 'MINUS', 'PLUS', 'MULTIPY', 'DIVIDE', 'EXPONENT', 'LPAREN', 'RPAREN']
+        folded = list(tokens)
+        at = 0
+        while at < len(folded):
+            if folded[at].type != 'LPAREN':
+                at += 1
+                continue
+            depth = 0           # Find the matching ')', checking that there are only number literals in between
+            end = at
+            while end < len(folded):
+                if folded[end].type not in literals:
+                    break
+                if folded[end].type == 'LPAREN':
+                    depth += 1
+                elif folded[end].type == 'RPAREN':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                end += 1
+            if (end == len(folded)) or (folded[end].type != 'RPAREN') or (depth != 0) or (end - at < 4):      # Not (a op b ...)
+                at += 1
+                continue
+            errorCount = len(self.errors)
+            self.parser.clearErrors()
+            value = self.parser.parse(iter(folded[at + 1:end]))
+            if (len(self.parser.collectErrors()) > 0) or (type(value) != float) or not math.isfinite(value):
+                del self.errors[errorCount:]
+                at += 1
+                continue
+            valueTokens = list(self.lexer.tokenize('({})'.format(self.value2sfeel(value))))
+            folded[at:end + 1] = valueTokens
+            at += len(valueTokens)
+        return tuple(folded)
 
-        Returns:
-            dict:{keys:Business Concept names, value:dict{keys:Variable names, value:tuple(FEELname, current value, [annotations])}}
 
-        """
-        glossary = {}
-        if not self.isLoaded:
-            return glossary
-        for variable in self.glossary:
-            concept = self.glossary[variable]['concept']
-            if concept not in glossary:
-                glossary[concept] = {}
-            FEELname = self.glossary[variable]['item']
-            (failed, itemValue) = self.sfeel('{}'.format(FEELname))
-            if not failed:
-                glossary[concept][variable] = (FEELname, itemValue, self.glossary[variable]['annotations'])
-        return glossary
+    def roundTrips(self, value):
+        # Check that this value would be unchanged by being replaced with value2sfeel(value) and re-evaluated
+        (isPython, pythonValue) = self.value2python(value)
+        return isPython and (type(pythonValue) == type(value)) and (pythonValue == value)
 
 
-    def getTableGlossary(self, table):
-        """
-        Return the Glossary and current values associated with one Decision Table
+    def outputValue(self, table, thisRule, k):
+        # Evaluate an output of a rule, that isn't a fixed value, using it's compiled expression - returns (result, value)
+        # Returns None if the output has to be assembled by replacing the Glossary items with their values
+        # (the expression has no compiled form, any of the values wouldn't survive that replacement, or the expression fails)
+        outputExpression = self.rules[table][thisRule]['outputExpressions'][k]
+        if outputExpression is None:
+            return None
+        (outputType, result, compiled, items) = outputExpression
+        if outputType == 'constant':
+            return (result, compiled)
+        for item in items:
+            if (item not in self.parser.names) or not self.roundTrips(self.parser.names[item]):
+                return None
+        if outputType == 'reference':
+            return (result, self.parser.names[items[0]])
+        errorCount = len(self.errors)
+        (failed, value) = self.sfeelCompiled(compiled)
+        if failed:
+            del self.errors[errorCount:]
+            return None
+        return (result, value)
 
-        This routine returns the Glossary - each Variable, within each Business Concept.
 
-        Args:
-            decisionTableName
+    def validityCheck(self, compiled):
+        # Return a Python check that matches this compiled input validity test, or None if it has to be evaluated as S-FEEL
+        #  - ('in', item, set of values, None) for 'item in (constant, constant, ...)'
+        #  - ('interval', item, (lowValue, lowClosed, highValue, highClosed), data type) for 'item in' a range of numbers or dates, or a comparison of item
+        if compiled is None:
+            return None
+        (text, tokens) = compiled
+        if (tokens is None) or (len(tokens) < 3) or (tokens[0].type != 'NAME'):
+            return None
+        item = tokens[0].value
+        if (tokens[1].type == 'INFUNC') and (tokens[-1].type == 'RPAREN'):
+            values = set()
+            groups = [[]]
+            for token in tokens[2:-1]:
+                if token.type == 'COMMA':
+                    groups.append([])
+                else:
+                    groups[-1].append(token)
+            if len(groups) > 1:         # A list - S-FEEL 'in' is Python 'in' for a list of constants
+                for group in groups:
+                    if [token.type for token in group] not in [['STRING'], ['NUMBER'], ['MINUS', 'NUMBER'], ['BOOLEAN']]:
+                        return None
+                    self.parser.clearErrors()
+                    value = self.parser.parse(iter(group))
+                    if (len(self.parser.collectErrors()) > 0) or (type(value) not in [bool, float, str]):
+                        return None
+                    values.add(value)
+                return ('in', item, frozenset(values), None)
+            return None
+        interval = self.indexInterval(tokens[1:])
+        if interval is None:
+            return None
+        if interval[0] is not None:
+            boundType = type(interval[0])
+        else:
+            boundType = type(interval[2])
+        return ('interval', item, interval, boundType)
+
+
+    def validInput(self, table, variable, inputIndex, value):
+        # Check the input validity of this value of this input variable - returns (failed, isValid)
+        # Validity lists of constants, and ranges of numbers or dates, are checked in Python, other validity tests are evaluated as S-FEEL
+        (testValidity, validityIsFixed, validityFixedValue) = self.decisionTables[table]['inputValidity'][inputIndex]
+        if testValidity is None:
+            return (False, True)
+        if validityIsFixed:             # The input (Python data) must match a fixed value
+            return (False, value == validityFixedValue)
+        check = self.decisionTables[table]['validityChecks'][inputIndex]
+        if (check is not None) and (check[1] == self.glossary[variable]['item']):
+            (checkType, item, values, boundType) = check
+            if checkType == 'in':
+                if (value is None) or (type(value) in [bool, int, float, str]):
+                    return (False, value in values)
+            elif (type(value) == boundType) and (value == value):         # NaN is left to S-FEEL
+                (lowValue, lowClosed, highValue, highClosed) = values
+                if lowValue is not None:
+                    if (value < lowValue) or ((value == lowValue) and not lowClosed):
+                        return (False, False)
+                if highValue is not None:
+                    if (value > highValue) or ((value == highValue) and not highClosed):
+                        return (False, False)
+                return (False, True)
+        return self.sfeelCompiled(self.decisionTables[table]['compiledValidity'][inputIndex])        # Execute the input validity test of variable as S-FEEL
+
+
+    def itemValue(self, variable):
+        # Fetch the current value of a Glossary Variable - directly from the pySFeel variables if it's item is a simple name
+        item = self.glossary[variable]['item']
+        if (item in self.nameItems) and (item in self.parser.names):
+            return (False, self.parser.names[item])
+        return self.sfeelCompiled(self.compiledItems[variable])
+
+
+    def indexKey(self, value):
+        # The hash key for a value, which must match the S-FEEL equality test
+        # which treats a list of one value as that value, and values of different data types as not equal
+        if isinstance(value, list) and (len(value) == 1):
+            value = value[0]
+        if (value is None) or isinstance(value, (bool, int, float, str)):
+            return (type(value), value)
+        return None
+
+
+    def indexInterval(self, tokens):
+        # Return the interval (lowValue, lowClosed, highValue, highClosed) tested by these tokens, which follow 'item'
+        # These are the comparisons (<, <=, >, >=), 'in' a comparison, or 'in' a range, of numbers or dates
+        # Return None if this isn't a simple test of a number or date interval
+        comparisons = {'LTTHAN':(False, False), 'LTTHANEQUAL':(False, True), 'GTTHAN':(True, False), 'GTTHANEQUAL':(True, True)}
+        literals = ['NUMBER', 'MINUS', 'DATEFUNC', 'STRING', 'RPAREN']
+        brackets = ['LBRACKET', 'RBRACKET', 'LPAREN', 'RPAREN', 'ELLIPSE']
+        if (len(tokens) > 0) and (tokens[0].type in ['IN', 'INFUNC']):
+            if tokens[0].type == 'INFUNC':          # 'in (' is lexed as a single token
+                tokens = tuple(self.lexer.tokenize('(')) + tuple(tokens[1:])
+            else:
+                tokens = tokens[1:]
+            if (len(tokens) > 0) and (tokens[0].type not in comparisons):
+                for token in tokens:
+                    if (token.type not in literals) and (token.type not in brackets):
+                        return None
+                self.parser.clearErrors()
+                interval = self.parser.parse(iter(tokens))
+                if len(self.parser.collectErrors()) > 0:
+                    return None
+                if (not isinstance(interval, tuple)) or (len(interval) != 4):
+                    return None
+                (end0, lowValue, highValue, end1) = interval
+                if (type(lowValue) not in [float, datetime.date]) or (type(lowValue) != type(highValue)):
+                    return None
+                return (lowValue, end0 == '[', highValue, end1 == ']')
+        if (len(tokens) < 2) or (tokens[0].type not in comparisons):
+            return None
+        for token in tokens[1:]:
+            if token.type not in literals:
+                return None
+        self.parser.clearErrors()
+        value = self.parser.parse(iter(tokens[1:]))
+        if len(self.parser.collectErrors()) > 0:
+            return None
+        if type(value) not in [float, datetime.date]:
+            return None
+        (isLow, isClosed) = comparisons[tokens[0].type]
+        if isLow:
+            return (value, isClosed, None, False)
+        else:
+            return (None, False, value, isClosed)
+
+
+    def indexRules(self, table):
+        # Build an index of the rules in this Decision Table, so that decideOneTable() only evaluates candidate rules
+        # For each input
+        #  - tests of the form 'item = constant' are hashed on the value of the constant
+        #  - interval tests of numbers or dates are indexed on the sorted boundaries of all the intervals for that input
+        # A rule is only skipped, because an indexed test fails, if every test before it in the rule is also an indexed test.
+        # Indexed tests cannot raise S-FEEL errors, so skipping the rule cannot hide any errors.
+        # Rules are a bit mask (bit n is rule n), so that the candidate rules remain in rule order.
+        # Inputs are the tested variables, because every test in a Crosstab table has the same inputIndex,
+        # in the order in which they are tested (input column/row, then position in the rule)
+        self.decisionTables[table]['ruleIndex'] = None
+        inputs = {}
+        for thisRule in range(len(self.rules[table])):
+            ruleBit = 1 << thisRule
+            for i in range(len(self.rules[table][thisRule]['tests'])):
+                (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+                if variable not in inputs:
+                    inputs[variable] = {'order':(inputIndex, i), 'validity':set(), 'tested':0, 'equals':0, 'values':{}, 'ranges':0, 'intervals':{}}
+                inputs[variable]['order'] = max(inputs[variable]['order'], (inputIndex, i))
+                inputs[variable]['validity'].add(inputIndex)
+                inputs[variable]['tested'] |= ruleBit
+        inputOrder = sorted(inputs, key=lambda variable: inputs[variable]['order'])
+        for thisRule in range(len(self.rules[table])):
+            ruleBit = 1 << thisRule
+            inOrder = True
+            lastInput = -1
+            for i in range(len(self.rules[table][thisRule]['tests'])):
+                (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+                if inputOrder.index(variable) <= lastInput:         # Tests out of input order can't be indexed
+                    inOrder = False
+                lastInput = inputOrder.index(variable)
+            if not inOrder:
+                continue
+            for i in range(len(self.rules[table][thisRule]['tests'])):
+                (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+                (text, tokens) = self.rules[table][thisRule]['compiledTests'][i][0]
+                if (tokens is None) or (len(tokens) < 3):
+                    continue
+                if (tokens[0].type != 'NAME') or (tokens[0].value != self.glossary[variable]['item']):
+                    continue
+                if tokens[1].type != 'EQUALS':
+                    interval = self.indexInterval(tokens[1:])
+                    if interval is None:
+                        continue
+                    if interval[0] is not None:
+                        boundType = type(interval[0])
+                    else:
+                        boundType = type(interval[2])
+                    inputs[variable]['ranges'] |= ruleBit
+                    if boundType not in inputs[variable]['intervals']:
+                        inputs[variable]['intervals'][boundType] = []
+                    inputs[variable]['intervals'][boundType].append((ruleBit, interval))
+                    continue
+                if [token.type for token in tokens[2:]] not in [['STRING'], ['NUMBER'], ['MINUS', 'NUMBER'], ['BOOLEAN'], ['NULL']]:
+                    continue
+                self.parser.clearErrors()
+                value = self.parser.parse(iter(tokens[2:]))
+                if len(self.parser.collectErrors()) > 0:
+                    continue
+                key = self.indexKey(value)
+                if key is None:
+                    continue
+                inputs[variable]['equals'] |= ruleBit
+                if key not in inputs[variable]['values']:
+                    inputs[variable]['values'][key] = 0
+                inputs[variable]['values'][key] |= ruleBit
+        allRules = (1 << len(self.rules[table])) - 1
+        indexed = False
+        ruleIndex = {}
+        ruleIndex['allRules'] = allRules
+        ruleIndex['inputs'] = []
+        for variable in inputOrder:
+            thisInput = inputs[variable]
+            if (thisInput['equals'] != 0) or (thisInput['ranges'] != 0):
+                indexed = True
+            # For each data type, the sorted boundaries divide the values into segments
+            # Segment 2n + 1 is the boundary value n, segment 2n is the values between boundary n - 1 and boundary n
+            rangeIndex = {}
+            for boundType in thisInput['intervals']:
+                boundaries = set()
+                for (ruleBit, (lowValue, lowClosed, highValue, highClosed)) in thisInput['intervals'][boundType]:
+                    if lowValue is not None:
+                        boundaries.add(lowValue)
+                    if highValue is not None:
+                        boundaries.add(highValue)
+                boundaries = sorted(boundaries)
+                boundaryAt = {}
+                for i in range(len(boundaries)):
+                    boundaryAt[boundaries[i]] = i
+                segments = 2 * len(boundaries) + 1
+                starts = [0] * (segments + 1)
+                ends = [0] * (segments + 1)
+                typeRules = 0
+                for (ruleBit, (lowValue, lowClosed, highValue, highClosed)) in thisInput['intervals'][boundType]:
+                    typeRules |= ruleBit
+                    if lowValue is None:
+                        lowSegment = 0
+                    elif lowClosed:
+                        lowSegment = 2 * boundaryAt[lowValue] + 1
+                    else:
+                        lowSegment = 2 * boundaryAt[lowValue] + 2
+                    if highValue is None:
+                        highSegment = segments - 1
+                    elif highClosed:
+                        highSegment = 2 * boundaryAt[highValue] + 1
+                    else:
+                        highSegment = 2 * boundaryAt[highValue]
+                    if lowSegment <= highSegment:
+                        starts[lowSegment] |= ruleBit
+                        ends[highSegment + 1] |= ruleBit
+                segmentRules = []
+                matching = 0
+                for segment in range(segments):
+                    matching = (matching & ~ends[segment]) | starts[segment]
+                    segmentRules.append(matching)
+                rangeIndex[boundType] = (boundaries, segmentRules, typeRules)
+            # Rules where evaluating this input can't raise an error - the indexed tests, and rules that don't test this input
+            untested = allRules & ~thisInput['tested']
+            validity = sorted(thisInput['validity'])
+            ruleIndex['inputs'].append((variable, validity, thisInput['equals'], thisInput['values'], thisInput['ranges'], rangeIndex, untested))
+        if indexed:
+            self.decisionTables[table]['ruleIndex'] = ruleIndex
+        return
 
-        Returns:
-            dict:{keys:Business Concept names, value:dict{keys:Variable names, value:tuple(FEELname, current value, [annotations])}}
 
-        """
-        glossary = {}
-        if not self.isLoaded:
-            return glossary
-        if table not in self.decisionTables:
-            return glossary
-        if 'inputColumns' in self.decisionTables[table]:
+    def candidateRules(self, table, validated=None):
+        # Return the list of the rules in this Decision Table which may match the current input values (or None for every rule)
+        # The (variable, inputIndex) of every input found to be valid is added to validated
+        if validated is None:
+            validated = set()
+        ruleIndex = self.decisionTables[table].get('ruleIndex')
+        if ruleIndex is None:
+            return None
+        errorCount = len(self.errors)
+        values = {}
+        for (variable, validity, equals, valueRules, ranges, rangeIndex, untested) in ruleIndex['inputs']:
+            (failed, value) = self.itemValue(variable)
+            if failed:
+                del self.errors[errorCount:]
+                return None
+            values[variable] = value
+            # Skipped rules can't report invalid input values, so only use the index if every tested input is valid
+            for inputIndex in validity:
+                (failed, isValid) = self.validInput(table, variable, inputIndex, value)
+                if failed:
+                    del self.errors[errorCount:]
+                    return None
+                if not isValid:
+                    return None
+                validated.add((variable, inputIndex))
+        skipped = 0
+        safeSoFar = ruleIndex['allRules']
+        for (variable, validity, equals, valueRules, ranges, rangeIndex, untested) in ruleIndex['inputs']:
+            if safeSoFar == 0:
+                break
+            value = values[variable]
+            failing = 0                 # The indexed tests which fail for this value
+            safe = untested | equals    # The tests which won't raise an error for this value
+            key = self.indexKey(value)
+            if (equals != 0) and (key is not None):
+                failing |= equals & ~valueRules.get(key, 0)
+            if ranges != 0:
+                if value is None:               # null is not in any interval
+                    failing |= ranges
+                    safe |= ranges
+                elif (type(value) in [float, datetime.date]) and (value == value):
+                    safe |= ranges
+                    for boundType in rangeIndex:
+                        (boundaries, segmentRules, typeRules) = rangeIndex[boundType]
+                        if boundType != type(value):        # Values of different data types are not in the interval
+                            failing |= typeRules
+                            continue
+                        at = bisect.bisect_left(boundaries, value)
+                        if (at < len(boundaries)) and (boundaries[at] == value):
+                            segment = 2 * at + 1
+                        else:
+                            segment = 2 * at
+                        failing |= typeRules & ~segmentRules[segment]
+            skipped |= failing & safeSoFar
+            safeSoFar &= safe
+        candidates = ruleIndex['allRules'] & ~skipped
+        rules = []
+        while candidates != 0:
+            ruleBit = candidates & -candidates
+            rules.append(ruleBit.bit_length() - 1)
+            candidates ^= ruleBit
+        return rules
+
+
+    def sfeelNames(self, compiled):
+        # Return the set of names referenced by some S-FEEL compiled by compileSfeel() (None if it wasn't compiled)
+        (text, tokens) = compiled
+        if tokens is None:
+            return None
+        return set([token.value for token in tokens if token.type == 'NAME'])
+
+
+    def planColumns(self, table):
+        # Plan the column wise evaluation of this Decision Table by decideColumns()
+        # Only single hit (Unique, Any, First) tables can be evaluated column wise, and only if
+        #  - every test, and every input validity test, only references the tested input
+        #  - every rule tests the inputs in the same order
+        # Rules with an output that isn't a fixed value (or with an 'Execute' output) are not evaluated column wise.
+        self.decisionTables[table]['columnPlan'] = None
+        if self.decisionTables[table]['hitPolicy'] not in ['U', 'A', 'F']:
+            return
+        order = {}
+        tests = {}
+        tested = {}
+        for thisRule in range(len(self.rules[table])):
+            for i in range(len(self.rules[table][thisRule]['tests'])):
+                (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+                item = self.glossary[variable]['item']
+                (compiledTest, compiledValue, compiledIn) = self.rules[table][thisRule]['compiledTests'][i]
+                names = self.sfeelNames(compiledTest)
+                if (names is None) or not names.issubset(set([item])):
+                    return
+                (testValidity, validityIsFixed, validityFixedValue) = self.decisionTables[table]['inputValidity'][inputIndex]
+                if (testValidity is not None) and not validityIsFixed:
+                    names = self.sfeelNames(self.decisionTables[table]['compiledValidity'][inputIndex])
+                    if (names is None) or not names.issubset(set([item])):
+                        return
+                if variable not in order:
+                    order[variable] = (inputIndex, i)
+                    tests[variable] = []
+                    tested[variable] = 0
+                order[variable] = max(order[variable], (inputIndex, i))
+                tests[variable].append((thisRule, i))
+                tested[variable] |= 1 << thisRule
+        inputOrder = sorted(order, key=lambda variable: order[variable])
+        for thisRule in range(len(self.rules[table])):
+            lastInput = -1
+            for (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) in self.rules[table][thisRule]['tests']:
+                if inputOrder.index(variable) <= lastInput:
+                    return
+                lastInput = inputOrder.index(variable)
+        outputs = []
+        annotations = []
+        for thisRule in range(len(self.rules[table])):
+            ruleOutputs = []
+            for (variable, result, outputIndex, rank, isFixed, fixedValue, coordinate, sheet) in self.rules[table][thisRule]['outputs']:
+                if (variable == 'Execute') or (not isFixed) or (variable not in self.glossary):
+                    ruleOutputs = None
+                    break
+                item = self.glossary[variable]['item']
+                errorCount = len(self.errors)
+                (failed, retVal) = self.sfeel('{} <- {}'.format(item, result))
+                del self.errors[errorCount:]
+                if failed:
+                    ruleOutputs = None
+                    break
+                thisResult = fixedValue
+                if isinstance(thisResult, str):
+                    if (len(thisResult) > 0) and (thisResult[0] == '"') and (thisResult[-1] == '"'):
+                        thisResult = thisResult[1:-1]
+                validList = self.decisionTables[table]['outputValidity'][outputIndex]
+                if (validList != []) and (thisResult not in validList):
+                    ruleOutputs = None
+                    break
+                ruleOutputs.append((variable, '{}'.format(result), thisResult))
+            outputs.append(ruleOutputs)
+            ruleAnnotations = []
+            if 'annotation' in self.decisionTables[table]:
+                for annotation in range(len(self.decisionTables[table]['annotation'])):
+                    name = self.decisionTables[table]['annotation'][annotation]
+                    text = self.rules[table][thisRule]['annotation'][annotation]
+                    ruleAnnotations.append((name, text))
+            annotations.append(ruleAnnotations)
+        columnPlan = {}
+        columnPlan['order'] = inputOrder
+        columnPlan['tests'] = tests
+        columnPlan['tested'] = tested
+        columnPlan['allRules'] = (1 << len(self.rules[table])) - 1
+        columnPlan['outputs'] = outputs
+        columnPlan['annotations'] = annotations
+        self.decisionTables[table]['columnPlan'] = columnPlan
+        return
+
+
+    def safeTest(self, table, thisRule, i):
+        # Check if this test is an 'item = constant' test of an input without an input validity test
+        # Evaluating these tests can't raise an error, so they can be evaluated in any order and skipped when they can't match
+        (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+        (testValidity, validityIsFixed, validityFixedValue) = self.decisionTables[table]['inputValidity'][inputIndex]
+        if testValidity is not None:
+            return False
+        (text, tokens) = self.rules[table][thisRule]['compiledTests'][i][0]
+        if (tokens is None) or (len(tokens) < 3):
+            return False
+        if (tokens[0].type != 'NAME') or (tokens[0].value != self.glossary[variable]['item']) or (tokens[1].type != 'EQUALS'):
+            return False
+        return [token.type for token in tokens[2:]] in [['STRING'], ['NUMBER'], ['MINUS', 'NUMBER'], ['BOOLEAN'], ['NULL']]
+
+
+    def ruleOverlaps(self, table, firstVariables=None):
+        # Return, for each rule in this Decision Table, the bit mask of the rules which may match the same input data
+        # Two rules can't both match if, for some input, both have indexed tests (see indexRules()) which can't both be true
+        #  - 'item = constant' tests of different constants, or interval tests with no common values
+        # Otherwise, they may overlap
+        # If firstVariables is given (for each rule, the inputs that it tests before any test that could raise an error)
+        # then a rule only counts as not overlapping another rule if it tests such an input, so it fails, without errors, whenever the other rule matches
+        allRules = (1 << len(self.rules[table])) - 1
+        disjoint = [0] * len(self.rules[table])
+        ruleIndex = self.decisionTables[table].get('ruleIndex')
+        if ruleIndex is not None:
+            for (variable, validity, equals, valueRules, ranges, rangeIndex, untested) in ruleIndex['inputs']:
+                for key in valueRules:
+                    others = equals & ~valueRules[key]
+                    rules = valueRules[key]
+                    while rules != 0:
+                        ruleBit = rules & -rules
+                        thisRule = ruleBit.bit_length() - 1
+                        if (firstVariables is None) or (variable in firstVariables[thisRule]):
+                            disjoint[thisRule] |= others
+                        rules ^= ruleBit
+                for boundType in rangeIndex:
+                    (boundaries, segmentRules, typeRules) = rangeIndex[boundType]
+                    overlapping = {}            # The rules in a common segment with each rule
+                    for matching in segmentRules:
+                        rules = matching
+                        while rules != 0:
+                            ruleBit = rules & -rules
+                            thisRule = ruleBit.bit_length() - 1
+                            overlapping[thisRule] = overlapping.get(thisRule, 0) | matching
+                            rules ^= ruleBit
+                    otherTypes = 0              # Values of different data types can't be in both intervals
+                    for otherType in rangeIndex:
+                        if otherType != boundType:
+                            otherTypes |= rangeIndex[otherType][2]
+                    for thisRule in overlapping:
+                        if (firstVariables is None) or (variable in firstVariables[thisRule]):
+                            disjoint[thisRule] |= (typeRules & ~overlapping[thisRule]) | otherTypes
+        return [allRules & ~disjoint[thisRule] for thisRule in range(len(self.rules[table]))]
+
+
+    def buildDAG(self, table):
+        # Compile this single hit (Unique, Any, First) Decision Table into a decision DAG for decideOneTable()
+        # Every distinct test (of the same input variable, with the same input validity) is one condition node, shared by every rule that has that test,
+        # and each node is evaluated at most once per decision, so the same input is never tested against the same condition twice.
+        # Rules are still matched in rule order, so the first matching rule is the one that is executed.
+        # Rules where every test is a safe test can't raise an error, so
+        #  - their tests are evaluated most selective first (the input tested against the most distinct values)
+        #  - they are skipped as soon as any one of their condition nodes is false
+        # Other rules evaluate their tests in column order, as the input validity tests and any errors must be reported in that order.
+        if self.decisionTables[table]['hitPolicy'] not in ['U', 'A', 'F']:
+            return
+        distinct = {}
+        for thisRule in range(len(self.rules[table])):
+            for i in range(len(self.rules[table][thisRule]['tests'])):
+                (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+                if variable not in distinct:
+                    distinct[variable] = set()
+                if self.safeTest(table, thisRule, i):
+                    distinct[variable].add(str(test))
+        nodes = {}
+        skipRules = []          # For each node, the rules that can be skipped when it is false
+        ruleNodes = []          # For each rule, the (node, test) to evaluate, in order
+        for thisRule in range(len(self.rules[table])):
+            theseNodes = []
+            isSafe = True
+            for i in range(len(self.rules[table][thisRule]['tests'])):
+                (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+                condition = (variable, inputIndex, str(test), isFixed)
+                if condition not in nodes:
+                    nodes[condition] = len(nodes)
+                    skipRules.append(0)
+                theseNodes.append((nodes[condition], i, variable))
+                if not self.safeTest(table, thisRule, i):
+                    isSafe = False
+            if isSafe:
+                for (node, i, variable) in theseNodes:
+                    skipRules[node] |= 1 << thisRule
+                theseNodes.sort(key=lambda thisNode: -len(distinct[thisNode[2]]))
+            ruleNodes.append([(node, i) for (node, i, variable) in theseNodes])
+        decisionDAG = {}
+        decisionDAG['nodes'] = len(nodes)
+        decisionDAG['skipRules'] = skipRules
+        decisionDAG['rules'] = ruleNodes
+        self.decisionTables[table]['decisionDAG'] = decisionDAG
+        return
+
+
+    def countDAGnodes(self):
+        # Return the number of condition nodes in each Decision Table that has been compiled into a decision DAG
+        nodes = {}
+        for table in self.decisionTables:
+            decisionDAG = self.decisionTables[table].get('decisionDAG')
+            if decisionDAG is not None:
+                nodes[table] = decisionDAG['nodes']
+        return nodes
+
+
+    def getGlossaryNames(self):
+        """
+        Return the Glossary Names
+
+        This routing returns the Glossary Name - the name of the glossary and the annotation headings
+
+        Args:
+            None
+
+        Returns:
+            str
+
+        """
+        if not self.isLoaded:
+            return []
+        return self.glossaryNames
+
+    
+    def getGlossary(self):
+        """
+        Return the Glossary and current values
+
+        This routine returns the Glossary - each Variable, within each Business Concept.
+
+        Args:
+            None
+
+        Returns:
+            dict:{keys:Business Concept names, value:dict{keys:Variable names, value:tuple(FEELname, current value, [annotations])}}
+
+        """
+        glossary = {}
+        if not self.isLoaded:
+            return glossary
+        for variable in self.glossary:
+            concept = self.glossary[variable]['concept']
+            if concept not in glossary:
+                glossary[concept] = {}
+            FEELname = self.glossary[variable]['item']
+            (failed, itemValue) = self.sfeel('{}'.format(FEELname))
+            if not failed:
+                glossary[concept][variable] = (FEELname, itemValue, self.glossary[variable]['annotations'])
+        return glossary
+
+
+    def getTableGlossary(self, table):
+        """
+        Return the Glossary and current values associated with one Decision Table
+
+        This routine returns the Glossary - each Variable, within each Business Concept.
+
+        Args:
+            decisionTableName
+
+        Returns:
+            dict:{keys:Business Concept names, value:dict{keys:Variable names, value:tuple(FEELname, current value, [annotations])}}
+
+        """
+        glossary = {}
+        if not self.isLoaded:
+            return glossary
+        if table not in self.decisionTables:
+            return glossary
+        if 'inputColumns' in self.decisionTables[table]:
             for i in range(len(self.decisionTables[table]['inputColumns'])):
                 variable = self.decisionTables[table]['inputColumns'][i]['name']
                 concept = self.glossary[variable]['concept']
@@ -4834,6 +6026,9 @@ class DMN():
         replaced = []
         if len(text) == 0:
             return (replaced, text)
+        started = None
+        if self.profiler is not None:
+            started = time.perf_counter()
         at = 0
         to = len(text)
         newText = ''
@@ -4844,6 +6039,8 @@ class DMN():
                 stringEnd = re.search(r'[^\\]"', text[at:])
                 if stringEnd is None:     # Hum, unbounded string
                     newText += text[at:]
+                    if started is not None:
+                        self.profileTime('replaceItems', started)
                     return (replaced, newText)
                 newText += text[at:at + stringEnd.end()]
                 at += stringEnd.end()
@@ -4856,27 +6053,21 @@ class DMN():
                 searchTo = to
             else:
                 searchTo += at
-            for item in self.glossaryItems:
-                thisItem = re.sub(r'\.', r'\\.', item)
-                match = re.search(r'\b' + thisItem + r'\b', text[at:searchTo])
-                if match is not None:
-                    if ((foundAt == -1) or (match.start() < foundAt)):                  # First found or nearer find
-                        foundAt = match.start()
-                        foundLen = len(item)
-                        foundItem = item
-                    elif ((foundAt == match.start()) and (len(item) > foundLen)):   # longer find at same place
-                        foundAt = match.start()
-                        foundLen = len(item)
-                        foundItem = item
-                    else:
-                        continue
+            (variableMatcher, itemMatcher, itemLengths) = self.glossaryMatchers()
+            for start in itemMatcher[0].finditer(text, at, searchTo):
+                thisAt = start.start()
+                items = self.matchNames(itemMatcher, text, thisAt, at, searchTo)      # Shortest first
+                if len(items) > 0:
+                    foundAt = thisAt - at
+                    foundItem = items[-1]
+                    foundLen = len(foundItem)
                     # Check for items with a dot operator
-                    dotOperator = None
                     for i in range(len(self.DMNdotOperators)):
                         if text[at + foundAt + foundLen:].startswith(self.DMNdotOperators[i]):
                             dotOperator = self.DMNdotOperators[i]
                             foundLen += len(dotOperator)
                             break
+                    break
             if foundAt == -1:               # Nothing found
                 newText += text[at:searchTo]
                 at = searchTo
@@ -4897,9 +6088,297 @@ class DMN():
             replaced.append(self.glossaryItems[foundItem])
             newText += sFeelText
             at += foundLen                                          # And skip Variable
+        if started is not None:
+            self.profileTime('replaceItems', started)
         return (replaced, newText)
 
 
+    def columnTest(self, table, thisRule, i):
+        # Evaluate one test in one rule, as decideOneTable() would, against the current value of the tested input
+        # Returns True or False, or None if the test would report an error
+        (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+        (testValidity, validityIsFixed, validityFixedValue) = self.decisionTables[table]['inputValidity'][inputIndex]
+        if testValidity is not None:
+            (failed, testInput) = self.itemValue(variable)
+            if failed:
+                return None
+            (failed, retVal) = self.validInput(table, variable, inputIndex, testInput)
+            if failed or not retVal:
+                return None
+        (compiledTest, compiledValue, compiledIn) = self.rules[table][thisRule]['compiledTests'][i]
+        (failed, retVal) = self.sfeelCompiled(compiledTest)
+        if failed:
+            return None
+        if not isFixed and not retVal and (compiledValue is not None):
+            (failed, newRetVal) = self.sfeelCompiled(compiledValue)
+            if failed:
+                return None
+            if isinstance(newRetVal, list):
+                (failed, retVal) = self.sfeelCompiled(compiledIn)
+                if failed:
+                    return None
+        if retVal:
+            return True
+        return False
+
+
+    def columnTests(self, table, variable, text):
+        # Evaluate every test of one input in a Decision Table, for one value (S-FEEL text) of that input
+        # Returns the bit masks of the rules that pass, and of the rules that would report an error
+        columnPlan = self.decisionTables[table]['columnPlan']
+        item = self.glossary[variable]['item']
+        untested = columnPlan['allRules'] & ~columnPlan['tested'][variable]
+        errorCount = len(self.errors)
+        (failed, retVal) = self.sfeel('{} <- {}'.format(item, text))
+        if failed:
+            del self.errors[errorCount:]
+            return (untested, columnPlan['tested'][variable])
+        passing = untested
+        erroring = 0
+        for (thisRule, i) in columnPlan['tests'][variable]:
+            retVal = self.columnTest(table, thisRule, i)
+            if retVal is None:
+                erroring |= 1 << thisRule
+            elif retVal:
+                passing |= 1 << thisRule
+        del self.errors[errorCount:]
+        return (passing, erroring)
+
+
+    def columnRule(self, table, texts, tested):
+        # Return the rule that decideOneTable() would execute for these values (S-FEEL text) of the inputs
+        # or -1 if the rule can't be executed column wise, or decideOneTable() would report an error
+        columnPlan = self.decisionTables[table]['columnPlan']
+        alive = columnPlan['allRules']          # The rules that have passed every test so far
+        erroring = 0                            # The rules that have reported an error
+        for variable in columnPlan['order']:
+            key = (table, variable, texts[variable])
+            if key not in tested:
+                tested[key] = self.columnTests(table, variable, texts[variable])
+            (passing, failing) = tested[key]
+            erroring |= alive & failing
+            alive &= passing
+        if alive == 0:              # No rules matched, which is an error, or a default
+            return -1
+        ruleBit = alive & -alive
+        if (erroring & (ruleBit - 1)) != 0:     # An earlier rule reported an error
+            return -1
+        thisRule = ruleBit.bit_length() - 1
+        if columnPlan['outputs'][thisRule] is None:
+            return -1
+        return thisRule
+
+
+    def objectArray(self, values, size=None):
+        # Return a numpy array of Python objects - either the list 'values', or 'size' copies of the object 'values'
+        if size is None:
+            array = numpy.empty(len(values), dtype=object)
+            for i in range(len(values)):
+                array[i] = values[i]
+        else:
+            array = numpy.empty(size, dtype=object)
+            array.fill(values)
+        return array
+
+
+    def combineColumns(self, codes):
+        # Combine a list of arrays of factorized codes into a single array of codes, one for each distinct combination
+        # Returns the combined codes and the first row with each combined code
+        combined = numpy.zeros(len(codes[0]), dtype=numpy.int64)
+        for code in codes:
+            combined = combined * (code.max(initial=0) + 1) + code
+            (combined, uniques) = pandas.factorize(combined)
+        (uniques, firstAt) = numpy.unique(combined, return_index=True)
+        return (combined, firstAt)
+
+
+    def decideColumns(self, dfInput, columns, outputs=None):
+        # Make the decision for every row in dfInput, column by column, rather than row by row
+        # The values in each column are factorized, so each test is evaluated once for each distinct value of the tested input
+        # and each Decision Table is evaluated once for each distinct combination of the values of the tested inputs.
+        # Rows that can't be decided column wise are marked as not decided, and must be decided by decide()
+        # Returns None if the data can't be factorized, else a dictionary of arrays (one entry per row)
+        # The 'Result' arrays are only assembled for the Glossary Variables in outputs (default - every Glossary Variable)
+        if not self.isLoaded:           # Let decide() report that there are no rules
+            return None
+        if outputs is None:
+            outputs = list(self.glossary)
+        rows = len(dfInput.index)
+        if (rows == 0) or (len(self.decisions) == 0):
+            return None
+        self.errors = []
+        decided = numpy.ones(rows, dtype=bool)
+        texts = {}                  # The current S-FEEL text of the value of every variable, for every row
+        for variable in self.glossary:
+            texts[variable] = numpy.full(rows, 'null', dtype=object)
+        inputs = {}                 # The input column for each variable
+        for j in range(len(dfInput.columns)):
+            column = dfInput.columns[j]
+            if column in columns:
+                inputs[columns[column]] = j
+            elif column in self.glossary:
+                inputs[column] = j
+        values = dfInput.values
+        rawData = {}                # The factorized input data for each variable
+        for variable in inputs:
+            column = values[:, inputs[variable]]
+            try:
+                (codes, uniques) = pandas.factorize(column)
+                if column.dtype == object:      # True, 1 and 1.0 are the same hash key - but not the same S-FEEL value
+                    (typeCodes, types) = pandas.factorize(numpy.array([type(value) for value in column], dtype=object))
+                    (codes, firstAt) = self.combineColumns([numpy.where(codes < 0, len(uniques), codes), typeCodes])
+                    uniques = [column[at] for at in firstAt]
+                else:
+                    codes = numpy.where(codes < 0, len(uniques), codes)
+                    uniques = list(uniques) + [None]
+            except TypeError:           # Unhashable data
+                return None
+            item = self.glossary[variable]['item']
+            uniqueTexts = []
+            for value in uniques:
+                if pandas.isna(value):      # Map missing data to None
+                    value = None
+                errorCount = len(self.errors)
+                text = self.value2sfeel(value)
+                if text is not None:
+                    (failed, retVal) = self.sfeel('{} <- {}'.format(item, text))
+                    if failed:
+                        text = None
+                del self.errors[errorCount:]
+                uniqueTexts.append(text)
+            texts[variable] = self.objectArray(uniqueTexts + [None])[codes]
+            decided &= (texts[variable] != None)
+            uniqueValues = []
+            for value in uniques:
+                if pandas.isna(value):
+                    value = None
+                uniqueValues.append(value)
+            rawData[variable] = (codes, uniqueValues)
+
+        first = numpy.ones(rows, dtype=bool)            # No Decision Table has been executed for this row
+        lastDecision = numpy.full(rows, -1, dtype=numpy.int64)
+        lastRule = numpy.full(rows, -1, dtype=numpy.int64)
+        tested = {}
+        for thisDecision in range(len(self.decisions)):
+            (table, decisionName, inputTests, decisionAnnotations) = self.decisions[thisDecision]
+            doDecision = decided.copy()
+            for i in range(len(inputTests)):
+                (variable, test, isFixed, fixedValue) = inputTests[i]
+                item = self.glossary[variable]['item']
+                doRows = numpy.nonzero(doDecision)[0]
+                if len(doRows) == 0:
+                    break
+                retVals = numpy.zeros(len(doRows), dtype=bool)
+                isRaw = numpy.zeros(len(doRows), dtype=bool)
+                if isFixed and (variable in rawData):       # The first executed table tests the fixed value against the input data
+                    isRaw = first[doRows]
+                    (codes, uniqueValues) = rawData[variable]
+                    matches = numpy.array([fixedValue == value for value in uniqueValues], dtype=bool)
+                    retVals[isRaw] = matches[codes[doRows[isRaw]]]
+                feelRows = doRows[~isRaw]
+                if len(feelRows) > 0:
+                    names = self.sfeelNames(self.compiledDecisionTests[thisDecision][i])
+                    if (names is None) or not names.issubset(set([item])):
+                        decided[feelRows] = False
+                        retVals[~isRaw] = False
+                    else:
+                        (codes, uniques) = pandas.factorize(texts[variable][feelRows])
+                        feelVals = []
+                        for text in uniques:
+                            errorCount = len(self.errors)
+                            (failed, retVal) = self.sfeel('{} <- {}'.format(item, text))
+                            if not failed:
+                                (failed, retVal) = self.sfeelCompiled(self.compiledDecisionTests[thisDecision][i])
+                            del self.errors[errorCount:]
+                            if failed:
+                                feelVals.append(None)
+                            elif retVal:
+                                feelVals.append(True)
+                            else:
+                                feelVals.append(False)
+                        feelVals = self.objectArray(feelVals)[codes]
+                        decided[feelRows[feelVals == None]] = False
+                        retVals[~isRaw] = (feelVals == True)
+                doDecision[doRows] = retVals
+            doDecision &= decided
+            doRows = numpy.nonzero(doDecision)[0]
+            if len(doRows) == 0:
+                continue
+            columnPlan = self.decisionTables[table]['columnPlan']
+            if columnPlan is None:
+                decided[doRows] = False
+                continue
+            if len(columnPlan['order']) > 0:
+                codes = []
+                for variable in columnPlan['order']:
+                    (code, uniques) = pandas.factorize(texts[variable][doRows])
+                    codes.append(code)
+                (combined, firstAt) = self.combineColumns(codes)
+            else:
+                combined = numpy.zeros(len(doRows), dtype=numpy.int64)
+                firstAt = numpy.zeros(1, dtype=numpy.int64)
+            foundRules = []
+            for at in firstAt:
+                thisRow = doRows[at]
+                thisTexts = {}
+                for variable in columnPlan['order']:
+                    thisTexts[variable] = texts[variable][thisRow]
+                foundRules.append(self.columnRule(table, thisTexts, tested))
+            foundRules = numpy.array(foundRules, dtype=numpy.int64)[combined]
+            decided[doRows[foundRules < 0]] = False
+            for thisRule in numpy.unique(foundRules[foundRules >= 0]):
+                ruleRows = doRows[foundRules == thisRule]
+                for (variable, text, thisResult) in columnPlan['outputs'][thisRule]:
+                    texts[variable][ruleRows] = text
+                lastDecision[ruleRows] = thisDecision
+                lastRule[ruleRows] = thisRule
+                first[ruleRows] = False
+        self.errors = []
+        decided &= (lastRule >= 0)              # No Decision Table was executed
+
+        # Assemble the Result of the last executed Decision Table
+        decidedRows = numpy.nonzero(decided)[0]
+        results = {}
+        for variable in outputs:
+            item = self.glossary[variable]['item']
+            results[variable] = numpy.full(rows, None, dtype=object)
+            (codes, uniques) = pandas.factorize(texts[variable][decidedRows])
+            uniqueResults = []
+            for text in uniques:
+                (failed, thisResult) = self.sfeel('{} <- {}'.format(item, text))
+                if isinstance(thisResult, str):
+                    if (len(thisResult) > 0) and (thisResult[0] == '"') and (thisResult[-1] == '"'):
+                        thisResult = thisResult[1:-1]
+                uniqueResults.append(thisResult)
+            if len(uniqueResults) > 0:
+                results[variable][decidedRows] = self.objectArray(uniqueResults)[codes]
+        self.errors = []
+        executedRules = numpy.full(rows, None, dtype=object)
+        decisionAnnotations = numpy.full(rows, None, dtype=object)
+        ruleAnnotations = numpy.full(rows, None, dtype=object)
+        (codes, firstAt) = self.combineColumns([lastDecision[decidedRows], lastRule[decidedRows]])
+        for code in range(len(firstAt)):
+            thisDecision = lastDecision[decidedRows[firstAt[code]]]
+            thisRule = lastRule[decidedRows[firstAt[code]]]
+            (table, decisionName, inputTests, theseAnnotations) = self.decisions[thisDecision]
+            columnPlan = self.decisionTables[table]['columnPlan']
+            ruleRows = decidedRows[codes == code]
+            for (variable, text, thisResult) in columnPlan['outputs'][thisRule]:
+                if variable in results:
+                    results[variable][ruleRows] = self.objectArray(thisResult, len(ruleRows))
+            ruleId = (self.decisionTables[table]['name'], table, str(self.rules[table][thisRule]['ruleId']))
+            executedRules[ruleRows] = self.objectArray(ruleId, len(ruleRows))
+            decisionAnnotations[ruleRows] = self.objectArray(theseAnnotations, len(ruleRows))
+            ruleAnnotations[ruleRows] = self.objectArray(columnPlan['annotations'][thisRule], len(ruleRows))
+        decision = {}
+        decision['decided'] = decided
+        decision['Result'] = results
+        decision['Executed Rule'] = executedRules
+        decision['DecisionAnnotations'] = decisionAnnotations
+        decision['RuleAnnotations'] = ruleAnnotations
+        return decision
+
+
     def decidePandas(self, dfInput, **kwargs):
         """"
         Process a Pandas DataFrame and make a decision for each row, based upon the input data in each row
@@ -4928,6 +6407,29 @@ class DMN():
                 - return Pandas compliant column headings
                   (convert Glossary names to valid Pandas headings)
 
+            vectorize=False
+
+                - decide every row with the decide() function
+                - by default, rows are decided column by column, with each test evaluated once for each distinct value
+                  of the tested input, and each Decision Table evaluated once for each distinct combination of input values.
+                  Rows which can't be decided column by column (e.g. rules with calculated outputs or 'Execute' outputs,
+                  multi hit Decision Tables, tests that reference other inputs, errors) are decided with the decide() function
+
+            workers=N
+
+                - decide the rows in N worker processes
+                - the loaded rules are copied to each worker process once, when it starts
+                - dfInput is split into chunks of rows, and the results are reassembled in the order of the rows in dfInput
+
+            chunksize=K
+
+                - the number of rows in each chunk passed to a worker process (default - a quarter of the rows per worker)
+
+            outputs=variables
+
+                - variables is a list of Glossary Variables
+                - dfResults will only have columns for these Variables (default - every Glossary Variable)
+
         Returns:
             tuple: (dfStatus, dfResults, dfDecision)
 
@@ -4941,6 +6443,10 @@ class DMN():
                     - param1 is not a Pandas Dataframe: error message - 'param1 is not a Pandas Dataframe'
                     - headings is provided and it is not a dictionary: error message - 'headings is not a dictionary'
                     - if any key in headings cannot be found in the Glossary: error message - "headings Variable 'xx' is not in the Glossary"
+                    - workers is provided and it is not a positive integer: error message - 'workers is not a positive integer'
+                    - chunksize is provided and it is not a positive integer: error message - 'chunksize is not a positive integer'
+                    - outputs is provided and it is not a list: error message - 'outputs is not a list'
+                    - if any Variable in outputs cannot be found in the Glossary: error message - "outputs Variable 'xx' is not in the Glossary"
 
             dfResults is a Pandas DataFrame of the decisions returned by the decide() function
 
@@ -4962,7 +6468,7 @@ class DMN():
 
         dfResults = DataFrame()                                 # An empty DataFrame for errors
         dfDecision = DataFrame()                                # An empty DataFrame for errors
-        args = set(['headings'])                                # The known optional arguements
+        args = set(['headings', 'vectorize', 'workers', 'chunksize', 'outputs'])      # The known optional arguements
         argsDiff = set(kwargs.keys()) - args                    # The passed optional arguments minus the know optional arguments
         if len(argsDiff) > 0:                                   # Something is wrong
             dfStatus = Series(['Invalid args:' + str(tuple(argsDiff))], name='status')
@@ -4980,14 +6486,38 @@ class DMN():
                 if columns[column] not in self.glossary:
                     dfStatus = Series(["headings Variable '" + columns[column] + "' is not in the Glossary"], name='status')
                     return(dfStatus, dfResults, dfDecision)
+        for arg in ['workers', 'chunksize']:
+            if arg in kwargs:
+                if isinstance(kwargs[arg], bool) or not isinstance(kwargs[arg], int) or (kwargs[arg] < 1):
+                    dfStatus = Series([arg + ' is not a positive integer'], name='status')
+                    return(dfStatus, dfResults, dfDecision)
+        outputs = None
+        if 'outputs' in kwargs:                # Only return these Glossary Variables
+            outputs = kwargs['outputs']
+            if not isinstance(outputs, list):
+                dfStatus = Series(['outputs is not a list'], name='status')
+                return(dfStatus, dfResults, dfDecision)
+            for variable in outputs:
+                if variable not in self.glossary:
+                    dfStatus = Series(["outputs Variable '" + str(variable) + "' is not in the Glossary"], name='status')
+                    return(dfStatus, dfResults, dfDecision)
+        if (kwargs.get('workers', 1) > 1) and (len(dfInput.index) > 0):       # Decide the rows in worker processes
+            return self.decidePandasWorkers(dfInput, columns, outputs, kwargs)
+        return self.pandasFrames(*self.decidePandasRows(dfInput, columns, outputs, kwargs))
+
+
+    def decidePandasRows(self, dfInput, columns, outputs, kwargs):
+        # Decide each row of dfInput (the arguments have been checked by decidePandas())
+        # Returns the status of each row, the results for each Variable heading, and the decision details, as one list per column
         pandasStrict = False
         if 'strict' in kwargs:                  # Return valid Pandas column headings
             if kwargs['strict']:
                 pandasStrict = True
         variables = {}
-        columnTyped = {}
-        pandasColumns = {}
+        headings = {}
         for variable in self.glossary:
+            if (outputs is not None) and (variable not in outputs):
+                continue
             heading = variable
             if pandasStrict:            # Convert Glossary variables into valid Pandas column headings
                 heading = heading.replace('(', '').replace(')', '').replace('[', '').replace(']', '').replace('{', '').replace('}', '')
@@ -4995,113 +6525,712 @@ class DMN():
                 while heading.find('__') != -1:
                     heading = heading.replace('__', '_')
             variables[variable] = heading
-            columnTyped[variable] = False
-            pandasColumns[heading] = pandas.Series([], dtype='str')         # Set a default data type of str
-        dfResults = DataFrame(pandasColumns)                                # A DataFrame with columns and data types
+            headings[heading] = variable
+        decision = None
+        if kwargs.get('vectorize', True):       # Decide the rows column by column
+            decision = self.decideColumns(dfInput, columns, outputs)
+
+        # Accumulate the results in one list per column, and build the DataFrames once, at the end
+        status = []
+        results = {}
+        for heading in headings:
+            results[heading] = []
+        decisions = {}
+        for column in ['RuleName', 'TableName', 'RuleID', 'DecisionAnnotations', 'RuleAnnotations']:
+            decisions[column] = []
+        values = dfInput.values
+        for thisRow in range(len(dfInput.index)):         # Iterate over each row in the dfInput Data Frame
+            if (decision is not None) and decision['decided'][thisRow]:        # This row has been decided column by column
+                status.append('no errors')
+                for heading in headings:
+                    results[heading].append(decision['Result'][headings[heading]][thisRow])
+                (ruleName, tableName, ruleID) = decision['Executed Rule'][thisRow]
+                decisions['RuleName'].append(ruleName)
+                decisions['TableName'].append(tableName)
+                decisions['RuleID'].append(ruleID)
+                decisions['DecisionAnnotations'].append(decision['DecisionAnnotations'][thisRow])
+                decisions['RuleAnnotations'].append(decision['RuleAnnotations'][thisRow])
+                continue
+            data = {}
+            for j in range(len(dfInput.columns)):              # Map each column to a Glossary Variable
+                column = dfInput.columns[j]
+                if column in columns:
+                    variable = columns[column]
+                elif column in self.glossary:
+                    variable = column
+                else:
+                    continue
+                if pandas.isna(values[thisRow, j]):     # Map missing data to None
+                    data[variable] = None
+                else:
+                    data[variable] = values[thisRow, j]     # else assign the value
+            (thisStatus, newData) = self.decide(data, outputs=outputs, finalOnly=True)       # Make a decision about this row
+
+            if (thisStatus != {}) and ('errors' in thisStatus):     # Handle errors
+                status.append('|'.join(thisStatus['errors']))
+                for heading in headings:
+                    results[heading].append(None)
+                for column in decisions:
+                    decisions[column].append(None)
+            else:
+                status.append('no errors')
+                if isinstance(newData, list):                       # Find the last 'Result' - result of last decision rule
+                    dmnData = newData[-1]['Result']
+                    (ruleName, tableName, ruleID) = dmnDecision = newData[-1]['Executed Rule']
+                    dmnDecisionAnnotations = None
+                    if 'DecisionAnnotations' in newData[-1]:
+                        dmnDecisionAnnotations = newData[-1]['DecisionAnnotations']
+                    dmnRuleAnnotations = None
+                    if 'RuleAnnotations' in newData[-1]:
+                        dmnRuleAnnotations = newData[-1]['RuleAnnotations']
+                else:
+                    dmnData = newData['Result']                     # Grab the only 'Result'
+                    (ruleName, tableName, ruleID) = dmnDecision = newData['Executed Rule']
+                    dmnDecisionAnnotations = None
+                    if 'DecisionAnnotations' in newData:
+                        dmnDecisionAnnotations = newData['DecisionAnnotations']
+                    dmnRuleAnnotations = None
+                    if 'RuleAnnotations' in newData:
+                        dmnRuleAnnotations = newData['RuleAnnotations']
+                for heading in headings:
+                    results[heading].append(dmnData[headings[heading]])         # Return this value
+                decisions['RuleName'].append(ruleName)                          # The Decision data which explain the decision
+                decisions['TableName'].append(tableName)
+                decisions['RuleID'].append(ruleID)
+                decisions['DecisionAnnotations'].append(dmnDecisionAnnotations)
+                decisions['RuleAnnotations'].append(dmnRuleAnnotations)
+        return (status, results, decisions)
+
+
+    def pandasFrames(self, status, results, decisions):
+        # Build the decidePandas() status Series, and results and decision DataFrames, from one list per column
+        dfStatus = Series(status, name='status')                                # Build the 'dfStatus' series
+        dfResults = DataFrame(results, dtype=object)
+        for heading in results:         # Assign a Pandas data type to each column, from the first non-null value, if there are no null values
+            dataType = None
+            for value in results[heading]:
+                if value is None:
+                    dataType = None
+                    break
+                if dataType is not None:
+                    continue
+                if isinstance(value, str) or isinstance(value, int) or isinstance(value, float) or isinstance(value, bool):
+                    dataType = type(value)
+                elif isinstance(value, datetime.datetime):
+                    dataType = 'datetime64[ns]'
+                elif isinstance(value, datetime.timedelta):
+                    dataType = 'timedelta64[ns]'
+                else:
+                    dataType = 'category'
+            if dataType is not None:
+                try:
+                    dfResults[heading] = dfResults[heading].astype(dataType)
+                except (TypeError, ValueError):         # Leave the column as Python objects
+                    pass
+        dfDecision = DataFrame(decisions, dtype=object)
+        dfResults = dfResults.reset_index()                                         # Add a sequential index to dfResults
+        dfDecision = dfDecision.reset_index()                                       # Add a sequential index to dfDecision
+        return(dfStatus, dfResults, dfDecision)                                 # Return the status, results and decisions
+
+
+
+    def decidePandasWorkers(self, dfInput, columns, outputs, kwargs):
+        # Decide the rows of dfInput, in chunks, in a pool of worker processes, each with its own copy of the loaded rules
+        # The workers return the values for each row, so the DataFrames, and their data types, are built once, from every row
+        workers = kwargs['workers']
+        rows = len(dfInput.index)
+        chunksize = kwargs.get('chunksize', max(1, -(-rows // (workers * 4))))
+        chunks = []
+        for at in range(0, rows, chunksize):
+            chunks.append(dfInput.iloc[at:at + chunksize])
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(pickle.dumps(self),)) as executor:
+            chunkDecisions = list(executor.map(decidePandasChunk, chunks, [(columns, outputs, kwargs)] * len(chunks)))
+        (status, results, decisions) = chunkDecisions[0]
+        for (chunkStatus, chunkResults, chunkDecision) in chunkDecisions[1:]:
+            status += chunkStatus
+            for heading in results:
+                results[heading] += chunkResults[heading]
+            for column in decisions:
+                decisions[column] += chunkDecision[column]
+        return self.pandasFrames(status, results, decisions)
+
+
+    def decideFile(self, inFilename, outFilename, **kwargs):
+        """
+        Make a decision for each row in a CSV file or Excel workbook, writing the decisions to a CSV file or Excel workbook
+
+        This routine reads the rows of param1 in chunks, decides each chunk with decidePandas()
+        and writes each row, followed by it's decision, to param2 as each chunk is decided,
+        so that only one chunk of rows is ever held in memory
+
+        Args:
+            param1 (str): The name of the CSV file (.csv) or Excel workbook (.xlsx) of rows of data (with headers)
+            param2 (str): The name of the CSV file (.csv) or Excel workbook (.xlsx) to be created
+
+                - each row in param2 is the matching row from param1, followed by the columns of dfResults from decidePandas()
+                  (one per Glossary Variable, or per Variable in outputs), followed by the column 'status' ('no errors' or the errors for that row)
+
+            OPTIONAL
+
+            headings=columns, outputs=variables, vectorize=False
+
+                - as for decidePandas()
+
+            chunksize=K
+
+                - the number of rows read, decided and written at a time (default - 10000)
+
+            sheet=name
+
+                - the worksheet to read, if param1 is an Excel workbook (default - the active worksheet)
+
+            dtype=types
+
+                - the column data types, if param1 is a CSV file (passed to pandas.read_csv())
+
+        Returns:
+            dict: status
+
+            'status' is a dictionary of different status information.
+            status['rows'] is the number of rows decided and status['rowErrors'] is the number of those rows that had errors.
+            If the key 'errors' is present in the status dictionary,
+            then decideFile() encountered one or more errors and status['errors'] is the list of those errors
+
+        """
+
+        status = {}
+        args = set(['headings', 'vectorize', 'outputs', 'chunksize', 'sheet', 'dtype'])       # The known optional arguements
+        argsDiff = set(kwargs.keys()) - args                    # The passed optional arguments minus the know optional arguments
+        if len(argsDiff) > 0:                                   # Something is wrong
+            status['errors'] = ['Invalid args:' + str(tuple(argsDiff))]
+            return status
+        if not self.isLoaded:
+            status['errors'] = ['No rulesBook has been loaded']
+            return status
+        inType = os.path.splitext(str(inFilename))[1].lower()
+        outType = os.path.splitext(str(outFilename))[1].lower()
+        if inType not in ['.csv', '.xlsx', '.xlsm']:
+            status['errors'] = ["'{!s}' is not a CSV file or Excel workbook".format(inFilename)]
+            return status
+        if outType not in ['.csv', '.xlsx']:
+            status['errors'] = ["'{!s}' is not a CSV file or Excel workbook".format(outFilename)]
+            return status
+        chunksize = kwargs.get('chunksize', 10000)
+        if isinstance(chunksize, bool) or not isinstance(chunksize, int) or (chunksize < 1):
+            status['errors'] = ['chunksize is not a positive integer']
+            return status
+        pandasArgs = {}
+        for arg in ['headings', 'vectorize', 'outputs']:
+            if arg in kwargs:
+                pandasArgs[arg] = kwargs[arg]
+        try:
+            chunks = self.fileChunks(inFilename, inType, chunksize, kwargs.get('sheet'), kwargs.get('dtype'))
+            dfChunk = next(chunks)
+        except Exception as e:
+            status['errors'] = ["No readable file named '{!s}'! ({!s})".format(inFilename, e)]
+            return status
+        (dfStatus, dfResults, dfDecision) = self.decidePandas(dfChunk.iloc[0:0], **pandasArgs)      # Check the arguments
+        if len(dfStatus.index) > 0:
+            status['errors'] = list(dfStatus)
+            return status
+        header = list(dfChunk.columns) + list(dfResults.columns[1:]) + ['status']
+        try:
+            if outType == '.csv':
+                outFile = open(outFilename, 'wt', newline='')
+                writer = csv.writer(outFile, dialect=csv.excel)
+                writeRow = writer.writerow
+            else:
+                outFile = openpyxl.Workbook(write_only=True)
+                ws = outFile.create_sheet()
+                writeRow = ws.append
+            writeRow(header)
+        except Exception as e:
+            status['errors'] = ["Cannot create file named '{!s}'! ({!s})".format(outFilename, e)]
+            return status
+        rows = rowErrors = 0
+        while dfChunk is not None:
+            (dfStatus, dfResults, dfDecision) = self.decidePandas(dfChunk, **pandasArgs)
+            dfResults = dfResults.drop(columns='index')
+            inValues = dfChunk.values
+            outValues = dfResults.values
+            for thisRow in range(len(dfChunk.index)):
+                row = [self.fileValue(value) for value in list(inValues[thisRow]) + list(outValues[thisRow])] + [dfStatus.iloc[thisRow]]
+                if outType == '.csv':
+                    row = ['' if value is None else value for value in row]
+                writeRow(row)
+                if dfStatus.iloc[thisRow] != 'no errors':
+                    rowErrors += 1
+            rows += len(dfChunk.index)
+            dfChunk = next(chunks, None)
+        if outType == '.csv':
+            outFile.close()
+        else:
+            outFile.save(outFilename)
+        status['rows'] = rows
+        status['rowErrors'] = rowErrors
+        return status
+
+
+    def fileChunks(self, inFilename, inType, chunksize, sheet, dtype):
+        # Yield the rows of a CSV file, or an Excel worksheet (read only), as DataFrames of chunksize rows
+        # An empty file is one empty DataFrame
+        if inType == '.csv':
+            reader = pandas.read_csv(inFilename, chunksize=chunksize, dtype=dtype)
+            empty = True
+            with reader:
+                for dfChunk in reader:
+                    empty = False
+                    yield dfChunk
+            if empty:
+                yield pandas.read_csv(inFilename, nrows=0)
+            return
+        wb = load_workbook(filename=inFilename, read_only=True, data_only=True)
+        try:
+            if sheet is None:
+                ws = wb.active
+            else:
+                ws = wb[sheet]
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, ())
+            while len(header) > 0 and header[-1] is None:     # Trailing empty cells
+                header = header[:-1]
+            chunk = []
+            empty = True
+            for row in rows:
+                chunk.append(row[:len(header)])
+                if len(chunk) == chunksize:
+                    empty = False
+                    yield DataFrame(chunk, columns=header)
+                    chunk = []
+            if (len(chunk) > 0) or empty:
+                yield DataFrame(chunk, columns=header)
+        finally:
+            wb.close()
+
+
+    def fileValue(self, value):
+        # Convert a value from a DataFrame into a value that can be written to a CSV file or Excel workbook
+        if isinstance(value, numpy.generic):
+            value = value.item()
+        if (value is None) or (isinstance(value, float) and math.isnan(value)) or (value is pandas.NaT) or (value is pandas.NA):
+            return None
+        if isinstance(value, (str, bool, int, float, datetime.date, datetime.time, datetime.timedelta)):
+            return value
+        return str(value)
+
+
+    def setProfiler(self, profiler):
+        """
+        Profile each Decision Table run
+
+        This routine turns on (or off) the profiling of the Decision Tables run by decide() and decideTables()
+        (and by the rows that decidePandas() decides with decide()). After each Decision Table is run
+        the profiler is called with a dictionary describing that run. Decisions returned from the decision cache run no Decision Tables.
+        Profiling is off by default, and costs next to nothing when it is off.
+
+        Args:
+            param1 (callable): The function to call with the profile of each Decision Table run (None turns profiling off).
+                The function is called in the thread that made the decision, so it must be thread safe if decisions are made in many threads.
+                The profiler is not copied to worker processes, nor saved by saveCompiled()
+
+        Returns:
+            dict: status
+
+            'status' is a dictionary of different status information.
+            Currently only status['error'] is implemented.
+            If the key 'error' is present in the status dictionary,
+            then setProfiler() encountered one or more errors and status['error'] is the list of those errors
+
+        The keys to each profile dictionary are
+            - 'table' - the name of the Decision Table
+            - 'time' - the wall time, in seconds, to run the Decision Table, including any 'Execute' child Decision Tables
+            - 'rules' - a dictionary of the rule ids of the rules that had tests evaluated and the number of tests evaluated for each rule
+            - 'sfeelParses' - the number of S-FEEL texts parsed
+            - 'sfeelEvaluations' - the number of compiled S-FEEL expressions evaluated
+            - 'replaceItems', 'replaceItemsTime' - the number of times, and seconds spent, replacing Glossary items with their values in outputs
+            - 'data2sfeel', 'data2sfeelTime' - the number of times, and seconds spent, checking output text is valid S-FEEL
+
+            The counts and times are for this Decision Table only - each 'Execute' child Decision Table has its own profile,
+            which is reported before the profile of the Decision Table that executed it.
+
+        """
+
+        status = {}
+        if (profiler is not None) and not callable(profiler):
+            status['errors'] = ['profiler is not callable']
+            return status
+        self.profiler = profiler
+        return status
+
+
+    def setCoverage(self, collect=True):
+        """
+        Collect rule coverage statistics
+
+        This routine turns on (or off) the counting, for every rule in every Decision Table, of how often the rule matched,
+        how often each test in the rule was evaluated and how often each test was the first test in the rule to fail,
+        and, for every Decision Table, how often it was run and how often its default output values were used.
+        The counts are for the Decision Tables run by decide() and decideTables() (and by the rows that decidePandas() decides with decide()).
+        Decisions returned from the decision cache run no Decision Tables. Turning coverage on starts the counts from zero.
+        Coverage is off by default.
+
+        Args:
+            param1 (bool): True turns the collection of rule coverage statistics on, False turns it off (and discards the counts)
+
+        Returns:
+            dict: status
+
+            'status' is a dictionary of different status information.
+            Currently only status['error'] is implemented.
+            If the key 'error' is present in the status dictionary,
+            then setCoverage() encountered one or more errors and status['error'] is the list of those errors
+
+        NOTE: The counts are not copied to, or from, worker processes, nor saved by saveCompiled()
+
+        """
+
+        status = {}
+        if not isinstance(collect, bool):
+            status['errors'] = ['collect is not True or False']
+            return status
+        with self.coverageLock:
+            if collect:
+                self.coverage = collections.Counter()
+            else:
+                self.coverage = None
+        return status
+
+
+    def getCoverage(self):
+        """
+        Get the rule coverage statistics
+
+        Returns:
+            tuple: (dfTables, dfRules, dfTests)
+
+            dfTables is a Pandas DataFrame with one row for each Decision Table
+
+                - column 'Table' is the name of the Decision Table
+                - column 'Runs' is the number of times the Decision Table was run
+                - column 'Defaults' is the number of times no rule matched and the default output values were used
+
+            dfRules is a Pandas DataFrame with one row for each rule in each Decision Table
+
+                - column 'Table' is the name of the Decision Table
+                - column 'RuleID' is the rule id of the rule
+                - column 'Matched' is the number of times the rule matched (rules that never match are dead rules, or untested rules)
+
+            dfTests is a Pandas DataFrame with one row for each test in each rule in each Decision Table
+
+                - column 'Table' is the name of the Decision Table
+                - column 'RuleID' is the rule id of the rule
+                - column 'Variable' is the input Variable being tested
+                - column 'Test' is the test
+                - column 'Evaluated' is the number of times the test was evaluated
+                - column 'FailedFirst' is the number of times the test was the first test in the rule to fail.
+                  With a decision DAG (see load()) a test that is shared by many rules is evaluated once per decision,
+                  but counted as failing first for each rule that it rejects. Rules that are skipped, without being tested,
+                  by the decision DAG or the input index, have no test that failed first
+
+            Use DataFrame.to_csv() to save the statistics as CSV files
+
+        """
+
+        with self.coverageLock:
+            coverage = collections.Counter()
+            if self.coverage is not None:
+                coverage.update(self.coverage)
+        tables = []
+        rules = []
+        tests = []
+        for table in self.decisionTables:
+            tables.append((table, coverage[('run', table)], coverage[('default', table)]))
+            for thisRule in range(len(self.rules.get(table, []))):
+                ruleId = self.rules[table][thisRule]['ruleId']
+                rules.append((table, ruleId, coverage[('matched', table, thisRule)]))
+                for i in range(len(self.rules[table][thisRule]['tests'])):
+                    (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+                    tests.append((table, ruleId, variable, test, coverage[('tested', table, thisRule, i)], coverage[('failed', table, thisRule, i)]))
+        dfTables = DataFrame(tables, columns=['Table', 'Runs', 'Defaults'])
+        dfRules = DataFrame(rules, columns=['Table', 'RuleID', 'Matched'])
+        dfTests = DataFrame(tests, columns=['Table', 'RuleID', 'Variable', 'Test', 'Evaluated', 'FailedFirst'])
+        return (dfTables, dfRules, dfTests)
+
+
+    def optimizeRuleOrder(self, dfInput=None, **kwargs):
+        """
+        Reorder the rules in Unique and Any hit policy Decision Tables, so the rules that match most often are tested first
+
+        In a Unique or Any hit policy Decision Table the order of the rules doesn't change the decision, but decide()
+        tests the rules in order and stops at the first rule that matches. This routine uses rule coverage statistics
+        (see setCoverage()), or the decisions made for a sample of input data, to change the order in which decide()
+        tests the rules - most often matched rules first - and the order of the tests in each rule - most often failed tests first.
+        Only tests that can't raise an error ('item = constant' tests of inputs without an input validity list) are reordered;
+        every other test is still tested after them, in column order.
+        A rule is never moved ahead of an earlier rule unless the two rules can't both match the same input data
+        ('item = constant' tests of different constants, or interval tests with no common values, of the same input)
+        and that test of the moved rule is tested before any test that could raise an error,
+        so Unique hit policy Decision Tables with overlapping rules still make the same decisions, without new errors.
+        The rule ids, and the 'Executed Rule' of each decision, are not changed.
+        The new order is kept by saveCompiled() and discarded when new rules are loaded.
+
+        Args:
+            param1 (dataframe): A Pandas dataframe of a sample of the rows of data about which decisions will be made (see decidePandas()).
+                If param1 is None, then the rule coverage statistics collected since setCoverage(True) are used
+
+            OPTIONAL
+
+            headings=columns
+
+                - columns is a dictionary where each keys match a column name from dfInput and the value matches a Variable from the Glossary (see decidePandas())
+
+        Returns:
+            dict: status
+
+            'status' is a dictionary of different status information.
+            If the key 'error' is present in the status dictionary,
+            then optimizeRuleOrder() encountered one or more errors and status['error'] is the list of those errors
+            status['reordered'] is the list of the Decision Tables whose rules are now tested in a different order
+
+        NOTE: Errors in rules (e.g. invalid input data) may be reported for different rules, or not reported,
+        if the rules, or tests, are tested in a different order.
+        This routine changes the loaded rules, so call it before the rules are shared by many threads.
+
+        """
+
+        status = {}
+        args = set(['headings'])                                # The known optional arguements
+        argsDiff = set(kwargs.keys()) - args                    # The passed optional arguments minus the know optional arguments
+        if len(argsDiff) > 0:                                   # Something is wrong
+            status['errors'] = ['Invalid args:' + str(tuple(argsDiff))]
+            return status
+        if not self.isLoaded:
+            status['errors'] = ['No rulesBook has been loaded']
+            return status
+        if dfInput is None:             # Use the coverage statistics that have been collected
+            with self.coverageLock:
+                if self.coverage is None:
+                    status['errors'] = ['Rule coverage statistics are not being collected - see setCoverage()']
+                    return status
+                coverage = collections.Counter(self.coverage)
+        else:                           # Collect coverage statistics for the sample, using decide(), without the decision cache
+            if not isinstance(dfInput, DataFrame):
+                status['errors'] = ['param1 is not a Pandas DataFrame']
+                return status
+            with self.coverageLock:
+                previousCoverage = self.coverage
+                self.coverage = collections.Counter()
+            cacheSize = self.cacheSize
+            self.cacheSize = 0
+            try:
+                (dfStatus, dfResults, dfDecision) = self.decidePandas(dfInput, vectorize=False, **kwargs)
+            finally:
+                self.cacheSize = cacheSize
+                with self.coverageLock:
+                    coverage = self.coverage
+                    self.coverage = previousCoverage
+            if (len(dfInput.index) > 0) and (len(dfResults.index) == 0):       # decidePandas() reported an error
+                status['errors'] = [dfStatus[0]]
+                return status
+        status['reordered'] = []
+        for table in self.decisionTables:
+            if self.decisionTables[table]['hitPolicy'] not in ['U', 'A']:
+                continue
+            rules = self.rules.get(table, [])
+            # Most often failed tests first, otherwise in column order - but only tests that can't raise an error (see safeTest())
+            # Every other test is tested after them, in column order, so any error is raised by the same test as before
+            testOrders = []
+            firstVariables = []         # The inputs tested by each rule before any test that could raise an error
+            for thisRule in range(len(rules)):
+                thisFailureRates = []
+                safeTests = []
+                otherTests = []
+                for i in range(len(rules[thisRule]['tests'])):
+                    evaluated = coverage[('tested', table, thisRule, i)]
+                    failed = coverage[('failed', table, thisRule, i)]
+                    thisFailureRates.append(min(1.0, failed / max(1, evaluated)))
+                    if self.safeTest(table, thisRule, i):
+                        safeTests.append(i)
+                    else:
+                        otherTests.append(i)
+                testOrder = sorted(safeTests, key=lambda i: -thisFailureRates[i]) + otherTests
+                if self.expectedTests(testOrder, thisFailureRates) >= self.expectedTests(range(len(thisFailureRates)), thisFailureRates):
+                    testOrder = list(range(len(thisFailureRates)))
+                testOrders.append(testOrder)
+                # The tests up to, and including, the first test that isn't safe (it can only raise an input validity error
+                # for an input which an earlier rule, that tests the same input, would have failed on too)
+                firstTests = []
+                for i in testOrder:
+                    firstTests.append(i)
+                    if i not in safeTests:
+                        break
+                theseVariables = set()
+                for i in firstTests:
+                    variable = rules[thisRule]['tests'][i][0]
+                    if all([(j in firstTests) for j in range(len(rules[thisRule]['tests'])) if rules[thisRule]['tests'][j][0] == variable]):
+                        theseVariables.add(variable)
+                firstVariables.append(theseVariables)
+            # Most often matched rules first, otherwise in rule order - but a rule is never moved ahead of an earlier rule
+            # unless it fails, without raising an error, whenever that earlier rule matches
+            # (so a Unique table with overlapping rules still makes the same decisions)
+            overlaps = self.ruleOverlaps(table, firstVariables)
+            waiting = []            # The number of earlier rules, that this rule can't be moved ahead of, that are still to be placed
+            blocking = [0] * len(rules)         # The later rules that can't be moved ahead of each rule
+            for thisRule in range(len(rules)):
+                earlier = overlaps[thisRule] & ((1 << thisRule) - 1)
+                waiting.append(bin(earlier).count('1'))
+                while earlier != 0:
+                    ruleBit = earlier & -earlier
+                    blocking[ruleBit.bit_length() - 1] |= 1 << thisRule
+                    earlier ^= ruleBit
+            ready = []
+            for thisRule in range(len(rules)):
+                if waiting[thisRule] == 0:
+                    heapq.heappush(ready, (-coverage[('matched', table, thisRule)], thisRule))
+            ruleOrder = []
+            while len(ready) > 0:
+                (matched, thisRule) = heapq.heappop(ready)
+                ruleOrder.append(thisRule)
+                later = blocking[thisRule]          # The later rules which can't be moved ahead of this rule
+                while later != 0:
+                    ruleBit = later & -later
+                    laterRule = ruleBit.bit_length() - 1
+                    waiting[laterRule] -= 1
+                    if waiting[laterRule] == 0:
+                        heapq.heappush(ready, (-coverage[('matched', table, laterRule)], laterRule))
+                    later ^= ruleBit
+            ruleRank = [0] * len(rules)
+            for rank in range(len(ruleOrder)):
+                ruleRank[ruleOrder[rank]] = rank
+            reordered = (ruleOrder != list(range(len(rules))))
+            for thisRule in range(len(rules)):
+                if testOrders[thisRule] != list(range(len(testOrders[thisRule]))):
+                    reordered = True
+            if not reordered:
+                self.decisionTables[table].pop('ruleOrder', None)
+                self.decisionTables[table].pop('ruleRank', None)
+                continue
+            for thisRule in range(len(rules)):
+                rules[thisRule]['testOrder'] = testOrders[thisRule]
+            decisionDAG = self.decisionTables[table].get('decisionDAG')
+            if decisionDAG is not None:         # Walk the condition nodes of each rule in the same order as the tests
+                for thisRule in range(len(rules)):
+                    decisionDAG['rules'][thisRule].sort(key=lambda nodeTest: testOrders[thisRule].index(nodeTest[1]))
+            self.decisionTables[table]['ruleOrder'] = ruleOrder
+            self.decisionTables[table]['ruleRank'] = ruleRank
+            status['reordered'].append(table)
+        self.clearCache()
+        return status
+
+
+    def expectedTests(self, testOrder, failureRates):
+        # Return the expected number of tests evaluated, if the tests of a rule are evaluated in this order and the first failure ends the rule
+        expected = 0.0
+        reached = 1.0
+        for i in testOrder:
+            expected += reached
+            reached *= 1.0 - failureRates[i]
+        return expected
+
+
+    def setCache(self, maxSize=1024, timeToLive=None):
+        """
+        Cache decisions
+
+        This routine turns on (or off) the caching of the decisions made by decide() and decideTables().
+        Repeated calls with the same input data return a copy of the cached decision, without running the Decision Tables again.
+
+        Args:
+            param1 (int): The maximum number of decisions to cache - the least recently used decision is discarded when the cache is full (0 turns caching off)
+            param2 (float): The number of seconds that a decision stays in the cache (None means until it is discarded or the rules are reloaded)
+
+        Returns:
+            dict: status
+
+            'status' is a dictionary of different status information.
+            Currently only status['error'] is implemented.
+            If the key 'error' is present in the status dictionary,
+            then setCache() encountered one or more errors and status['error'] is the list of those errors
 
-        status = []
-        noDecision = True
-        for index, row in dfInput.iterrows():         # Iterate over each row in the dfInput Data Frame
-            data = {}
-            for column in row.keys():                          # Map each column to a Glossary Variable
-                if column in columns:
-                    variable = columns[column]
-                elif column in self.glossary:
-                    variable = column
-                else:
-                    continue
-                if pandas.isna(row[column]):            # Map missing data to None
-                    data[variable] = None
-                else:
-                    data[variable] = row[column]        # else assign the value
-            (thisStatus, newData) = self.decide(data)       # Make a decision about this row
+        NOTE: Only decisions that do not call now() or today(), and which made no errors, are cached.
+        The cache is cleared whenever new rules are loaded.
 
-            if (thisStatus != {}) and ('errors' in thisStatus):     # Handle errors
-                status.append('|'.join(thisStatus['errors']))
-                pandasData = {}
-                for variable in variables:
-                    pandasData[variables[variable]] = None
-                pandasData = pandas.DataFrame.from_dict(pandasData, orient='index')
-                pandasData = pandasData.transpose()
-                dfResults = pandas.concat([dfResults, pandasData])     # And append it to dfResults - the output Data Frame
-                decisionData = {}
-                decisionData['RuleName'] = None
-                decisionData['TableName'] = None
-                decisionData['RuleID'] = None
-                decisionData['DecisionAnnotations'] = None
-                decisionData['RuleAnnotations']  = None
-                decisionData = pandas.DataFrame.from_dict(decisionData, orient='index')
-                decisionData = decisionData.transpose()
-                if noDecision:
-                    dfDecision = decisionData
-                    noDecision = False
-                else:
-                    dfDecision = pandas.concat([dfDecision, decisionData])
-            else:
-                status.append('no errors')
-                if isinstance(newData, list):                       # Find the last 'Result' - result of last decision rule
-                    dmnData = newData[-1]['Result']
-                    (ruleName, tableName, ruleID) = dmnDecision = newData[-1]['Executed Rule']
-                    dmnDecisionAnnotations = None
-                    if 'DecisionAnnotations' in newData[-1]:
-                        dmnDecisionAnnotations = newData[-1]['DecisionAnnotations']
-                    dmnRuleAnnotations = None
-                    if 'RuleAnnotations' in newData[-1]:
-                        dmnRuleAnnotations = newData[-1]['RuleAnnotations']
-                else:
-                    dmnData = newData['Result']                     # Grab the only 'Result'
-                    (ruleName, tableName, ruleID) = dmnDecision = newData['Executed Rule']
-                    dmnDecisionAnnotations = None
-                    if 'DecisionAnnotations' in newData:
-                        dmnDecisionAnnotations = newData['DecisionAnnotations']
-                    dmnRuleAnnotations = None
-                    if 'RuleAnnotations' in newData:
-                        dmnRuleAnnotations = newData['RuleAnnotations']
-                pandasData = {}                                 # Create Pandas DataFrame compatible data
-                typeColumns = False                             # And assign a Pandas data type to the columns if this is the first non-null value
-                dataTypes = {}
-                for variable in variables:
-                    if not columnTyped[variable]:
-                        if dmnData[variable] is not None:
-                            value = dmnData[variable]
-                            if isinstance(value, str) or isinstance(value, int) or isinstance(value, float) or isinstance(value, bool):
-                                dataTypes[variables[variable]] = type(value)
-                            elif isinstance(value, datetime.datetime):
-                                dataTypes[variables[variable]] = 'datetime64'
-                            elif isinstance(value, datetime.timedelta):
-                                dataTypes[variables[variable]] = 'timedelta[ns]'
-                            else:
-                                dataTypes[variables[variable]] = 'category'
-                            columnTyped[variable] = True
-                            typeColumns = True
-                    pandasData[variables[variable]] = dmnData[variable]         # Return this value
-                pandasData = pandas.DataFrame.from_dict(pandasData, orient='index')
-                pandasData = pandasData.transpose()
-                dfResults = pandas.concat([dfResults, pandasData])     # And append these values to dfResults - the output Data Frame
-                if typeColumns:                                                 # Assign data types to any column for which we have new data types
-                    dfResults = dfResults.astype(dataTypes)
-                decisionData = {}                                               # Create the Decision data which explain the decision
-                decisionData['RuleName'] = ruleName
-                decisionData['TableName'] = tableName
-                decisionData['RuleID'] = ruleID
-                decisionData['DecisionAnnotations'] = dmnDecisionAnnotations
-                decisionData['RuleAnnotations'] = dmnRuleAnnotations
-                decisionData = pandas.DataFrame.from_dict(decisionData, orient='index')
-                decisionData = decisionData.transpose()
-            if noDecision:
-                    dfDecision = decisionData
-                    noDecision = False
-            else:
-                dfDecision = pandas.concat([dfDecision, decisionData])
+        """
 
-        dfStatus = Series(status, name='status')                                # Build the 'dfStatus' series 
-        dfResults = dfResults.reset_index()                                         # Add a sequential index to dfResults
-        dfDecision = dfDecision.reset_index()                                       # Add a sequential index to dfDecision
-        return(dfStatus, dfResults, dfDecision)                                 # Return the status, results and decisions
+        status = {}
+        if isinstance(maxSize, bool) or not isinstance(maxSize, int) or (maxSize < 0):
+            status['errors'] = ['maxSize is not a non-negative integer']
+            return status
+        if (timeToLive is not None) and (isinstance(timeToLive, bool) or not isinstance(timeToLive, (int, float)) or (timeToLive <= 0)):
+            status['errors'] = ['timeToLive is not a positive number']
+            return status
+        self.cacheSize = maxSize
+        self.cacheTTL = timeToLive
+        self.clearCache()
+        return status
+
+
+    def clearCache(self):
+        """
+        Clear the decision cache
+
+        This routine discards every cached decision and resets the hit and miss counters
 
+        """
+
+        with self.cacheLock:
+            self.cache = collections.OrderedDict()
+            self.cacheHits = 0
+            self.cacheMisses = 0
+
+
+    def getCacheStats(self):
+        """
+        Get the decision cache statistics
+
+        Returns:
+            dict: keys 'hits', 'misses', 'size', 'maxSize' and 'timeToLive'
+
+        """
+
+        with self.cacheLock:
+            return {'hits':self.cacheHits, 'misses':self.cacheMisses, 'size':len(self.cache), 'maxSize':self.cacheSize, 'timeToLive':self.cacheTTL}
+
+
+    def cacheGet(self, key):
+        # Return a copy of a cached decision, or None if this decision isn't cached (or has expired)
+        with self.cacheLock:
+            if key in self.cache:
+                (expires, decision) = self.cache[key]
+                if (expires is None) or (expires > time.monotonic()):
+                    self.cache.move_to_end(key)
+                    self.cacheHits += 1
+                    return copy.deepcopy(decision)
+                del self.cache[key]
+            self.cacheMisses += 1
+        return None
+
+
+    def cachePut(self, key, decision, checkDecision):
+        # Cache a copy of this decision, if it can't have been changed by the current date/time
+        if (checkDecision and not self.decisionDeterministic) or ('errors' in decision[0]):
+            return
+        for table in self.tableStatus:
+            if (self.tableStatus[table] != 'idle') and not self.decisionTables[table]['deterministic']:
+                return
+        if self.cacheTTL is None:
+            expires = None
+        else:
+            expires = time.monotonic() + self.cacheTTL
+        decision = copy.deepcopy(decision)
+        with self.cacheLock:
+            self.cache[key] = (expires, decision)
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cacheSize:
+                self.cache.popitem(last=False)
 
 
-    def decide(self, data):
+    def decide(self, data, outputs=None, finalOnly=False):
         """
         Make a decision
 
@@ -5121,6 +7250,18 @@ class DMN():
                   unless those input 'Variables' are also output 'Variables' in a preceeding, executed, DMN rules table.
                   In which case, those output values will be used as the input values for the current DMN rules table.
 
+            OPTIONAL
+
+            outputs=variables
+
+                - variables is a list of Glossary Variables
+                - each 'Result' will only contain these Variables (default - every Glossary Variable)
+
+            finalOnly=True
+
+                - only return the decision dictionary of the final decision,
+                  rather than a list of decision dictionaries, one for each DMN rules table executed
+
         Returns:
             tuple: (status, newData)
 
@@ -5174,8 +7315,20 @@ class DMN():
             status['errors'] = self.errors
             self.errors = []
             return (status, {})
-        self.initGlossary()
+        if outputs is not None:
+            if not isinstance(outputs, list):
+                self.errors.append('outputs is not a list')
+            else:
+                for variable in outputs:
+                    if variable not in self.glossary:
+                        self.errors.append("outputs Variable '{!s}' is not in the Glossary".format(variable))
+            if len(self.errors) > 0:
+                status = {}
+                status['errors'] = self.errors
+                self.errors = []
+                return (status, {})
         validData = True
+        assignments = []
         for variable in data:
             value = data[variable]
             if variable in self.glossary:
@@ -5215,34 +7368,57 @@ class DMN():
                 status['errors'] = self.errors
                 self.errors = []
                 return (status, {})
-            # Convert the passed Python data to it's FEEL equivalent and store, as a value, in pySFeel
-            sFeelValue = self.value2sfeel(value)
-            if sFeelValue is None:
-                validData = False
+            # Convert the passed Python data to it's pySFeel equivalent, or failing that, it's FEEL equivalent
+            (isPython, pythonValue) = self.value2python(value)
+            if isPython and (item in self.nameItems):
+                assignments.append((item, value, None, pythonValue))
             else:
-                # Store the value of this FEEL text in pySFeel (for possible later pySFeel manipulation)
-                (failed, retVal) = self.sfeel('{} <- {}'.format(item, sFeelValue))
-                if failed:
-                    self.errors.append("Bad S-FEEL when storing value '{} <- {}'".format(item, sFeelValue))
+                sFeelValue = self.value2sfeel(value)
+                if sFeelValue is None:
+                    validData = False
+                else:
+                    assignments.append((item, value, sFeelValue, None))
         if not validData:
             self.errors.append("Input variable '{!s}' has is invalid S-FEEL value '{!s}'".format(variable, data[variable]))
             status = {}
             status['errors'] = self.errors
             self.errors = []
             return (status, {})
+        cacheKey = None
+        if self.cacheSize > 0:
+            cacheKey = []
+            for (item, value, sFeelValue, pythonValue) in assignments:
+                if sFeelValue is None:
+                    sFeelValue = self.value2sfeel(value)
+                cacheKey.append((item, sFeelValue))
+            cacheKey = (None, tuple(sorted(cacheKey)))
+            decision = self.cacheGet(cacheKey)
+            if decision is not None:
+                return self.projectDecision(decision, outputs, finalOnly)
+        self.initGlossary()
+        for (item, value, sFeelValue, pythonValue) in assignments:
+            if sFeelValue is None:          # Store the value directly in pySFeel
+                self.parser.names[item] = pythonValue
+                continue
+            # Store the value of this FEEL text in pySFeel (for possible later pySFeel manipulation)
+            (failed, retVal) = self.sfeel('{} <- {}'.format(item, sFeelValue))
+            if failed:
+                self.errors.append("Bad S-FEEL when storing value '{} <- {}'".format(item, sFeelValue))
 
         # Initialize the status so we can detect circular references
         for table in self.decisionTables:
-            self.decisionTables[table]['status'] = 'idle'
-            self.decisionTables[table]['recursionCount'] = 0
+            self.tableStatus[table] = 'idle'
+            self.recursionCount[table] = 0
 
         # Process each decision table in order
         self.allResults = []
         first = True
-        for (table, thisDecision, inputTests, decisionAnnotations) in self.decisions:
+        for thisDecision in range(len(self.decisions)):
+            (table, decisionName, inputTests, decisionAnnotations) = self.decisions[thisDecision]
             doDecision = True
             if len(inputTests) > 0:
-                for (variable, test, isFixed, fixedValue) in inputTests:
+                for i in range(len(inputTests)):
+                    (variable, test, isFixed, fixedValue) = inputTests[i]
                     failed = False
                     if isFixed and first and (variable in data):     # The input value must match this fixed value
                         if fixedValue == data[variable]:
@@ -5250,7 +7426,7 @@ class DMN():
                         else:
                             retVal = False
                     else:           # The input value must match this FEEL expression
-                        (failed, retVal) = self.sfeel('{}'.format(test))
+                        (failed, retVal) = self.sfeelCompiled(self.compiledDecisionTests[thisDecision][i])
                         if failed:
                             self.errors.append("Bad S-FEEL when doing Decision Table test '{}' for table '{!s}'".format(test, table))
                     if not retVal:      # The input value is not a match for this Decison Table
@@ -5270,10 +7446,140 @@ class DMN():
             status['errors'] = self.errors
             self.errors = []
         if len(self.allResults) == 1:
-            return (status, self.allResults[0])
+            decision = (status, self.allResults[0])
+        else:
+            decision = (status, self.allResults)
+        if cacheKey is not None:
+            self.cachePut(cacheKey, decision, True)
+        return self.projectDecision(decision, outputs, finalOnly)
+
+
+
+    def projectDecision(self, decision, outputs, finalOnly):
+        # Return just the final decision and/or just the 'Result' outputs that were asked for,
+        # with each 'Result' as a plain dictionary (only the Variables being returned are fetched from the snapshot)
+        (status, newData) = decision
+        if finalOnly and isinstance(newData, list) and (len(newData) > 0):
+            newData = newData[-1]
+        if isinstance(newData, list):
+            decisions = newData
         else:
-            return (status, self.allResults)
+            decisions = [newData]
+        projected = []
+        for thisDecision in decisions:
+            if isinstance(thisDecision.get('Result'), DecisionResult):
+                thisDecision = thisDecision.copy()
+                if outputs is None:
+                    thisDecision['Result'] = dict(thisDecision['Result'])
+                else:
+                    thisDecision['Result'] = dict(thisDecision['Result'].project(outputs))
+            projected.append(thisDecision)
+        if isinstance(newData, list):
+            return (status, projected)
+        return (status, projected[0])
+
+
+    def decideIter(self, iterable, **kwargs):
+        """
+        Make a decision for each dictionary of data from an iterable, lazily
+
+        This routine is a generator. It takes each dictionary of data from param1, as it is needed,
+        runs it through the decide() function and yields the decision, so a stream of records
+        (e.g. from a message queue consumer, or a file reader) can be decided without first building a list or a DataFrame
+
+        Args:
+            param1 (iterable): An iterable (list, generator, file reader etc.) of dictionaries of data about which decisions need to be made.
+                Each dictionary is passed to the decide() function
 
+            OPTIONAL
+
+            outputs=variables
+
+                - variables is a list of Glossary Variables
+                - each 'Result' will only contain these Variables (default - every Glossary Variable)
+
+            finalOnly=True
+
+                - only yield the decision dictionary of the final decision for each dictionary of data
+
+            workers=N
+
+                - decide the dictionaries of data in N worker processes
+                - the loaded rules are copied to each worker process once, when it starts
+                - the dictionaries of data are taken from param1 in chunks, and the decisions are yielded in the order of the dictionaries in param1
+                - at most 2 * N chunks are being decided, or waiting to be yielded, at any time
+
+            chunksize=K
+
+                - the number of dictionaries of data in each chunk passed to a worker process (default 100)
+
+        Returns:
+            generator: of tuples (status, newData)
+
+            status and newData are the values returned by the decide() function for each dictionary of data in param1
+
+            If the optional arguments are invalid, then the generator yields a single tuple (status, {}),
+            where status['errors'] is the list of errors
+                - an invalid optional argument is passed to decideIter(): error message - 'Invalid args:xxxxx'
+                - workers is provided and it is not a positive integer: error message - 'workers is not a positive integer'
+                - chunksize is provided and it is not a positive integer: error message - 'chunksize is not a positive integer'
+                - outputs is provided and it is not a list: error message - 'outputs is not a list'
+                - if any Variable in outputs cannot be found in the Glossary: error message - "outputs Variable 'xx' is not in the Glossary"
+
+        """
+
+        errors = []
+        args = set(['outputs', 'finalOnly', 'workers', 'chunksize'])        # The known optional arguements
+        argsDiff = set(kwargs.keys()) - args                    # The passed optional arguments minus the know optional arguments
+        if len(argsDiff) > 0:                                   # Something is wrong
+            errors.append('Invalid args:' + str(tuple(argsDiff)))
+        for arg in ['workers', 'chunksize']:
+            if arg in kwargs:
+                if isinstance(kwargs[arg], bool) or not isinstance(kwargs[arg], int) or (kwargs[arg] < 1):
+                    errors.append(arg + ' is not a positive integer')
+        outputs = kwargs.get('outputs')
+        if outputs is not None:
+            if not isinstance(outputs, list):
+                errors.append('outputs is not a list')
+            else:
+                for variable in outputs:
+                    if variable not in self.glossary:
+                        errors.append("outputs Variable '{!s}' is not in the Glossary".format(variable))
+        if len(errors) > 0:
+            status = {}
+            status['errors'] = errors
+            yield (status, {})
+            return
+        finalOnly = kwargs.get('finalOnly', False)
+        workers = kwargs.get('workers', 1)
+        if workers == 1:                # Decide each dictionary of data as it arrives
+            for data in iterable:
+                yield self.decide(data, outputs, finalOnly)
+            return
+
+        # Decide chunks of dictionaries of data in a pool of worker processes, each with its own copy of the loaded rules
+        chunksize = kwargs.get('chunksize', 100)
+        pending = collections.deque()           # The chunks being decided, in the order of the dictionaries in the iterable
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(pickle.dumps(self),)) as executor:
+            try:
+                chunk = []
+                for data in iterable:
+                    chunk.append(data)
+                    if len(chunk) < chunksize:
+                        continue
+                    pending.append(executor.submit(decideIterChunk, chunk, outputs, finalOnly))
+                    chunk = []
+                    while len(pending) >= 2 * workers:          # Don't read ahead too far
+                        for decision in pending.popleft().result():
+                            yield decision
+                if len(chunk) > 0:
+                    pending.append(executor.submit(decideIterChunk, chunk, outputs, finalOnly))
+                while len(pending) > 0:
+                    for decision in pending.popleft().result():
+                        yield decision
+            finally:                    # Don't decide chunks that will never be yielded
+                for future in pending:
+                    future.cancel()
 
 
     def decideTables(self, data, listOfTables):
@@ -5366,8 +7672,8 @@ class DMN():
                 status['errors'] = self.errors
                 self.errors = []
                 return (status, {})
-        self.initGlossary()
         validData = True
+        assignments = []
         for variable in data:
             value = data[variable]
             if variable in self.glossary:
@@ -5407,26 +7713,47 @@ class DMN():
                 status['errors'] = self.errors
                 self.errors = []
                 return (status, {})
-            # Convert the passed Python data to it's FEEL equivalent and store, as a value, in pySFeel
-            sFeelValue = self.value2sfeel(value)
-            if sFeelValue is None:
-                validData = False
+            # Convert the passed Python data to it's pySFeel equivalent, or failing that, it's FEEL equivalent
+            (isPython, pythonValue) = self.value2python(value)
+            if isPython and (item in self.nameItems):
+                assignments.append((item, value, None, pythonValue))
             else:
-                # Store the value of this FEEL text in pySFeel (for possible later pySFeel manipulation)
-                (failed, retVal) = self.sfeel('{} <- {}'.format(item, sFeelValue))
-                if failed:
-                    self.errors.append("Bad S-FEEL when storing value '{} <- {}'".format(item, sFeelValue))
+                sFeelValue = self.value2sfeel(value)
+                if sFeelValue is None:
+                    validData = False
+                else:
+                    assignments.append((item, value, sFeelValue, None))
         if not validData:
             self.errors.append("Input variable '{!s}' has is invalid S-FEEL value '{!s}'".format(variable, data[variable]))
             status = {}
             status['errors'] = self.errors
             self.errors = []
             return (status, {})
+        cacheKey = None
+        if self.cacheSize > 0:
+            cacheKey = []
+            for (item, value, sFeelValue, pythonValue) in assignments:
+                if sFeelValue is None:
+                    sFeelValue = self.value2sfeel(value)
+                cacheKey.append((item, sFeelValue))
+            cacheKey = (tuple(listOfTables), tuple(sorted(cacheKey)))
+            decision = self.cacheGet(cacheKey)
+            if decision is not None:
+                return self.projectDecision(decision, None, False)
+        self.initGlossary()
+        for (item, value, sFeelValue, pythonValue) in assignments:
+            if sFeelValue is None:          # Store the value directly in pySFeel
+                self.parser.names[item] = pythonValue
+                continue
+            # Store the value of this FEEL text in pySFeel (for possible later pySFeel manipulation)
+            (failed, retVal) = self.sfeel('{} <- {}'.format(item, sFeelValue))
+            if failed:
+                self.errors.append("Bad S-FEEL when storing value '{} <- {}'".format(item, sFeelValue))
 
         # Initialize the status so we can detect circular references
         for table in self.decisionTables:
-            self.decisionTables[table]['status'] = 'idle'
-            self.decisionTables[table]['recursionCount'] = 0
+            self.tableStatus[table] = 'idle'
+            self.recursionCount[table] = 0
 
         # Process each decision table in order
         self.allResults = []
@@ -5446,22 +7773,164 @@ class DMN():
             status['errors'] = self.errors
             self.errors = []
         if len(self.allResults) == 1:
-            return (status, self.allResults[0])
+            decision = (status, self.allResults[0])
         else:
-            return (status, self.allResults)
+            decision = (status, self.allResults)
+        if cacheKey is not None:
+            self.cachePut(cacheKey, decision, False)
+        return self.projectDecision(decision, None, False)
+
+
+    def newResult(self, table, assembling):
+        # Create the 'Result' for this Decision Table, from a snapshot of the pySFeel variables
+        result = DecisionResult(self.variableItems, self.parser.names.copy())
+        for variable in self.expressionVariables:
+            item = self.glossary[variable]['item']
+            (failed, thisResult) = self.itemValue(variable)
+            if failed:
+                self.errors.append("Bad S-FEEL when fetching value for item '{}' when {} 'Result' for table '{!s}'".format(item, assembling, table))
+                return None
+            if isinstance(thisResult, str):
+                if (len(thisResult) > 0) and (thisResult[0] == '"') and (thisResult[-1] == '"'):
+                    thisResult = thisResult[1:-1]
+            result[variable] = thisResult
+        return result
+
+
+    def checkValidity(self, table, thisRule, i, validated):
+        # Check the input validity of the input variable for this test in this rule
+        # Returns True if the input value is valid, or there is no validity test; otherwise reports the error and returns False
+        # The input values don't change while a Decision Table is being evaluated, so each input is only checked once,
+        # with the (variable, inputIndex) of every valid input being added to validated
+        (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+        (testValidity, validityIsFixed, validityFixedValue) = self.decisionTables[table]['inputValidity'][inputIndex]
+        if testValidity is None:        # There is no validity test for this input variable
+            return True
+        if (variable, inputIndex) in validated:
+            return True
+        item = self.glossary[variable]['item']
+        (failed, testInput) = self.itemValue(variable)
+        if failed:
+            self.errors.append("Bad S-FEEL when fetching value for item '{!s}' when testing input validity for variable '{!s}' in table '{!s}'".format(item, variable, table))
+            return False
+        (failed, retVal) = self.validInput(table, variable, inputIndex, testInput)
+        if failed:          # Report the bad S-FEEL
+            if sheet is None:
+                self.errors.append("Bad S-FEEL for validity '{}' for item '{!s}' in table '{!s}' for rule '{!s}'".format(testValidity, item, table, thisRule))
+            else:
+                self.errors.append("Bad S-FEEL for validity '{}' for item '{!s}' in table '{!s}' for rule '{!s}' at '{!s}' on sheet '{!s}'".format(testValidity, item, table, thisRule, coordinate, sheet))
+            return False
+        if not retVal:          # The S-FEEL returned False
+            if sheet is None:
+                message = "Variable {!s} has S-FEEL input value '{!s}' which does not match input validity list '{!s}' for decision table '{!s}'"
+                self.errors.append(message.format(item, repr(testInput), testValidity, table))
+            else:
+                message = "Variable {!s} has S-FEEL input value '{!s}' which does not match input validity list '{!s}' for decision table '{!s}' at '{!s}' on sheet '{!s}'"
+                self.errors.append(message.format(item, repr(testInput), testValidity, table, coordinate, sheet))
+            return False
+        validated.add((variable, inputIndex))
+        return True
+
+
+    def ruleTest(self, table, thisRule, i):
+        # Evaluate this test in this rule - returns (failed, retVal), having reported the error if failed
+        (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
+        # print('testing:', table, variable, test, isFixed, fixedValue)
+        (compiledTest, compiledValue, compiledIn) = self.rules[table][thisRule]['compiledTests'][i]
+        if self.profiler is not None:
+            self.profileRule(table, thisRule)
+        if self.coverage is not None:
+            self.countCoverage(('tested', table, thisRule, i))
+        (failed, retVal) = self.sfeelCompiled(compiledTest)
+        if isFixed:
+            return (False, retVal)
+        if failed:
+            item = self.glossary[variable]['item']
+            self.errors.append("Bad S-FEEL when when testing '{}' for item '{!s}' in table '{!s}' for rule '{!s}'".format(str(test), item, table, thisRule))
+            return (True, None)
+        if not retVal:
+            if compiledValue is not None:       # The test was 'item = something' - check if something is a list
+                (failed, newRetVal) = self.sfeelCompiled(compiledValue)
+                if not failed and isinstance(newRetVal, list):      # And if that's a list, try 'item in something'
+                    (failed, retVal) = self.sfeelCompiled(compiledIn)
+                    if failed:
+                        retVal = False
+        return (False, retVal)
 
 
     def decideOneTable(self, table, decisionAnnotations, parentPolicy):
+        # Use Decision Table 'table' to make a decision, reporting the profile of this Decision Table run if there is a profiler
+        if self.profiler is None:
+            return self.runOneTable(table, decisionAnnotations, parentPolicy)
+        parentProfile = self.profile
+        profile = {}
+        profile['table'] = table
+        profile['time'] = 0.0
+        profile['rules'] = {}
+        profile['sfeelParses'] = 0
+        profile['sfeelEvaluations'] = 0
+        profile['replaceItems'] = 0
+        profile['replaceItemsTime'] = 0.0
+        profile['data2sfeel'] = 0
+        profile['data2sfeelTime'] = 0.0
+        self.profile = profile
+        started = time.perf_counter()
+        try:
+            return self.runOneTable(table, decisionAnnotations, parentPolicy)
+        finally:
+            profile['time'] = time.perf_counter() - started
+            self.profile = parentProfile
+            profiler = self.profiler
+            if profiler is not None:
+                profiler(profile)
+
+
+    def profileCount(self, counter):
+        # Count one more S-FEEL parse or evaluation in the Decision Table being profiled
+        profile = self.profile
+        if profile is not None:
+            profile[counter] += 1
+
+
+    def profileTime(self, function, started):
+        # Add the time since started to the time spent in this function in the Decision Table being profiled
+        profile = self.profile
+        if profile is not None:
+            profile[function] += 1
+            profile[function + 'Time'] += time.perf_counter() - started
+
+
+    def profileRule(self, table, thisRule):
+        # Count one more test evaluated for this rule in the Decision Table being profiled
+        profile = self.profile
+        if profile is not None:
+            ruleId = self.rules[table][thisRule]['ruleId']
+            profile['rules'][ruleId] = profile['rules'].get(ruleId, 0) + 1
+
+
+    def countCoverage(self, key, keys=None):
+        # Count this rule coverage event (and these rule coverage events)
+        with self.coverageLock:
+            coverage = self.coverage
+            if coverage is None:
+                return
+            coverage[key] += 1
+            if keys is not None:
+                for key in keys:
+                    coverage[key] += 1
+
+
+    def runOneTable(self, table, decisionAnnotations, parentPolicy):
         # Use Decision Table 'table' to make a decision
-        # print('decideOneTable', table, decisionAnnotations, parentPolicy, self.decisionTables[table]['status'], self.decisionTables[table]['recursionCount'])
+        # print('decideOneTable', table, decisionAnnotations, parentPolicy, self.tableStatus[table], self.recursionCount[table])
 
         # Check for circular references, or decision that have already been made
-        if self.decisionTables[table]['status'] == 'being processed':
-            self.decisionTables[table]['recursionCount'] += 1
-            if self.decisionTables[table]['recursionCount'] > 100:
+        if self.tableStatus[table] == 'being processed':
+            self.recursionCount[table] += 1
+            if self.recursionCount[table] > 100:
                 self.errors.append("Recursion Count exceeded for Decision Table '{!s}'".format(table))
                 return None
-        self.decisionTables[table]['status'] = 'being processed'
+        self.tableStatus[table] = 'being processed'
         if parentPolicy is None:
             thisHitPolicy = self.decisionTables[table]['hitPolicy']
         else:
@@ -5495,62 +7964,69 @@ class DMN():
 
         ranks = {}
         foundRule = None
-        for thisRule in range(len(self.rules[table])):      # Every rule (row) in this Decision Table
-            for i in range(len(self.rules[table][thisRule]['tests'])):      # Every test in this decision rule
-                (variable, test, inputIndex, isFixed, fixedValue, testType, coordinate, sheet) = self.rules[table][thisRule]['tests'][i]
-                item = self.glossary[variable]['item']
-                (testValidity, validityIsFixed, validityFixedValue) = self.decisionTables[table]['inputValidity'][inputIndex]
-                if testValidity is not None:        # There is a validity test for this input variable
-                    (failed, testInput) = self.sfeel('{}'.format(item))
-                    if failed:
-                        self.errors.append("Bad S-FEEL when fetching value for item '{!s}' when testing input validity for variable '{!s}' in table '{!s}'".format(item, variable, table))
-                        self.decisionTables[table]['status'] = 'done'
-                        self.decisionTables[table]['recursionCount'] = 0
-                        return None
-                    if validityIsFixed:             # The input (Python data) must match a fixed value
-                        if testInput != validityFixedValue:           # The Python data does not match the fixed valid value
-                            retVal = False
-                        else:
-                            retVal = True
+        validated = set()           # The inputs that have passed their input validity test
+        theseRules = self.candidateRules(table, validated)         # Only the rules that may match the input data
+        ruleOrder = None
+        if thisHitPolicy in ['U', 'A']:     # Rule order doesn't change the decision - test the rules in the optimized order
+            ruleOrder = self.decisionTables[table].get('ruleOrder')
+        if ruleOrder is not None:
+            if theseRules is None:
+                theseRules = ruleOrder
+            else:
+                theseRules = sorted(theseRules, key=self.decisionTables[table]['ruleRank'].__getitem__)
+        elif theseRules is None:
+            theseRules = range(len(self.rules[table]))
+        decisionDAG = self.decisionTables[table].get('decisionDAG')
+        if (decisionDAG is not None) and (thisHitPolicy in ['U', 'A', 'F']):
+            # Walk the decision DAG - evaluating each condition node at most once
+            tested = {}
+            skipped = 0
+            for thisRule in theseRules:      # Every candidate rule (row) in this Decision Table, in rule order
+                if skipped & (1 << thisRule):
+                    continue
+                for (node, i) in decisionDAG['rules'][thisRule]:
+                    if node in tested:
+                        retVal = tested[node]
                     else:
-                        (failed, retVal) = self.sfeel('{}'.format(testValidity))        # Execute the input validity test of variable as S-FEEL
-                    if failed:          # Report the bad S-FEEL
-                        if sheet is None:
-                            self.errors.append("Bad S-FEEL for validity '{}' for item '{!s}' in table '{!s}' for rule '{!s}'".format(testValidity, item, table, thisRule))
-                        else:
-                            self.errors.append("Bad S-FEEL for validity '{}' for item '{!s}' in table '{!s}' for rule '{!s}' at '{!s}' on sheet '{!s}'".format(testValidity, item, table, thisRule, coordinate, sheet))
-                        self.decisionTables[table]['status'] = 'done'
-                        self.decisionTables[table]['recursionCount'] = 0
-                        return None
-                    if not retVal:          # The S-FEEL returned False
-                        if sheet is None:
-                            message = "Variable {!s} has S-FEEL input value '{!s}' which does not match input validity list '{!s}' for decision table '{!s}'"
-                            self.errors.append(message.format(item, repr(testInput), testValidity, table))
-                        else:
-                            message = "Variable {!s} has S-FEEL input value '{!s}' which does not match input validity list '{!s}' for decision table '{!s}' at '{!s}' on sheet '{!s}'"
-                            self.errors.append(message.format(item, repr(testInput), testValidity, table, coordinate, sheet))
-                        self.decisionTables[table]['status'] = 'done'
-                        self.decisionTables[table]['recursionCount'] = 0
-                        return None
-                # print('testing:', table, variable, test, item, isFixed, fixedValue)
-                (failed, retVal) = self.sfeel(str(test))
-                if not isFixed:
-                    if failed:
-                        self.errors.append("Bad S-FEEL when when testing '{}' for item '{!s}' in table '{!s}' for rule '{!s}'".format(str(test), item, table, thisRule))
-                        self.decisionTables[table]['status'] = 'done'
-                        self.decisionTables[table]['recursionCount'] = 0
-                        return None
+                        if not self.checkValidity(table, thisRule, i, validated):
+                            self.tableStatus[table] = 'done'
+                            self.recursionCount[table] = 0
+                            return None
+                        (failed, retVal) = self.ruleTest(table, thisRule, i)
+                        if failed:
+                            self.tableStatus[table] = 'done'
+                            self.recursionCount[table] = 0
+                            return None
+                        tested[node] = retVal
+                        if not retVal:
+                            skipped |= decisionDAG['skipRules'][node]
                     if not retVal:
-                        if test.startswith(self.glossary[variable]['item']):    # Check if the rest of the test is a list
-                            restOfTest = test[len(self.glossary[variable]['item']):].strip()               # And if that's a list, try variable in restOfTest
-                            if restOfTest.startswith('='):
-                                (failed, newRetVal) = self.sfeel(str(restOfTest[1:]))
-                                if not failed and isinstance(newRetVal, list):
-                                    (failed, retVal) = self.sfeel(str(self.glossary[variable]['item'] + ' in ' + restOfTest[1:]))
-                                    if failed:
-                                        retVal = False
+                        if self.coverage is not None:
+                            self.countCoverage(('failed', table, thisRule, i))
+                        break
+                else:
+                    ranks[thisRule] = [thisRule]
+                    break
+            theseRules = []
+        for thisRule in theseRules:      # Every candidate rule (row) in this Decision Table
+            if ruleOrder is not None:
+                theseTests = self.rules[table][thisRule]['testOrder']
+            else:
+                theseTests = range(len(self.rules[table][thisRule]['tests']))
+            for i in theseTests:      # Every test in this decision rule
+                if not self.checkValidity(table, thisRule, i, validated):
+                    self.tableStatus[table] = 'done'
+                    self.recursionCount[table] = 0
+                    return None
+                (failed, retVal) = self.ruleTest(table, thisRule, i)
+                if failed:
+                    self.tableStatus[table] = 'done'
+                    self.recursionCount[table] = 0
+                    return None
                 if not retVal:
                     # print('failed')
+                    if self.coverage is not None:
+                        self.countCoverage(('failed', table, thisRule, i))
                     break
             else:
                 # We found a hit it may be one of many
@@ -5565,8 +8041,14 @@ class DMN():
                     for i in range(len(self.rules[table][thisRule]['outputs'])):
                         (variable, result, outputIndex, rank, isFixed, fixedValue, coordinate, sheet) = self.rules[table][thisRule]['outputs'][i]
                         if (variable != 'Execute') and (rank is None):
+                            item = self.glossary[variable]['item']
+                            output = None
+                            if not isFixed:
+                                output = self.outputValue(table, thisRule, i)
                             if isFixed:
                                 result = fixedValue
+                            elif output is not None:
+                                result = output[1]
                             else:
                                 (replaced, result) = self.replaceItems(result)      # Replace BusinessConcept.Attribute references with actual values
                                 sfeelText = self.data2sfeel(None, None, result, True)           # See if this is valid S-FEEL
@@ -5582,8 +8064,8 @@ class DMN():
                                         self.errors.append("Bad S-FEEL getting value for ranking for item '{}' in table '{!s}' for rule '{!s}'".format(item, table, thisRule))
                                     else:
                                         self.errors.append("Bad S-FEEL getting value for ranking for item '{}' in table '{!s}' at '{!s}' on sheet '{!s}' for rule '{!s}'".format(item, table, coordinate, sheet, thisRule))
-                                    self.decisionTables[table]['status'] = 'done'
-                                    self.decisionTables[table]['recursionCount'] = 0
+                                    self.tableStatus[table] = 'done'
+                                    self.recursionCount[table] = 0
                                     return None
                             rank = None
                             if result in self.decisionTables[table]['outputValidity'][outputIndex]:
@@ -5604,27 +8086,23 @@ class DMN():
                     if thisRank not in ranks:
                         ranks[thisRank] = []
                     ranks[thisRank].append(thisRule)
+        if self.coverage is not None:
+            self.countCoverage(('run', table), [('matched', table, thisRule) for rank in ranks for thisRule in ranks[rank]])
         if not haveDefaults and (len(ranks.keys()) == 0):
             self.errors.append("No rules matched the input data for decision table '{!s}'".format(table))
-            self.decisionTables[table]['status'] = 'done'
-            self.decisionTables[table]['recursionCount'] = 0
+            self.tableStatus[table] = 'done'
+            self.recursionCount[table] = 0
             return None
         newData = {}
-        newData['Result'] = {}
+        newData['Result'] = self.newResult(table, 'assembling')
+        if newData['Result'] is None:
+            self.tableStatus[table] = 'done'
+            self.recursionCount[table] = 0
+            return None
         annotations = []
-        for variable in self.glossary:
-            item = self.glossary[variable]['item']
-            (failed, thisResult) = self.sfeel('{}'.format(item))
-            if failed:
-                self.errors.append("Bad S-FEEL when fetching value for item '{}' when assembling 'Result' for table '{!s}'".format(item, table))
-                self.decisionTables[table]['status'] = 'done'
-                self.decisionTables[table]['recursionCount'] = 0
-                return None
-            if isinstance(thisResult, str):
-                if (len(thisResult) > 0) and (thisResult[0] == '"') and (thisResult[-1] == '"'):
-                    thisResult = thisResult[1:-1]
-            newData['Result'][variable] = thisResult
         if len(ranks.keys()) == 0:      # Have defaults
+            if self.coverage is not None:
+                self.countCoverage(('default', table))
             for (variable, result) in defaultValues:
                 sfeelText = self.data2sfeel(None, None, result, True)           # See if this is valid S-FEEL
                 if sfeelText is None:               # Not valid FEEL - make this a FEEL string
@@ -5638,14 +8116,14 @@ class DMN():
                 (failed, retVal) = self.sfeel('{} <- {}'.format(item, result))
                 if failed:
                     self.errors.append("Bad S-FEEL assigning value to variable '{} <- {}' when assembling 'Result' for table '{!s}'".format(item, result, table))
-                    self.decisionTables[table]['status'] = 'done'
-                    self.decisionTables[table]['recursionCount'] = 0
+                    self.tableStatus[table] = 'done'
+                    self.recursionCount[table] = 0
                     return None
                 (failed, thisResult) = self.sfeel('{}'.format(item))
                 if failed:
                     self.errors.append("Bad S-FEEL fetching value'{}' for 'Result' for table '{!s}'".format(item, table))
-                    self.decisionTables[table]['status'] = 'done'
-                    self.decisionTables[table]['recursionCount'] = 0
+                    self.tableStatus[table] = 'done'
+                    self.recursionCount[table] = 0
                     return None
                 if isinstance(thisResult, str):
                     if (len(thisResult) > 0) and (thisResult[0] == '"') and (thisResult[-1] == '"'):
@@ -5686,7 +8164,12 @@ class DMN():
                 # except:
                 #     print("Result: table '{!s}', rule '{!s}', variable '{!s}', result '{!s}' ({!s}/{!s})".format(table, foundRule, variable, result.encode('utf-8', errors='ignore'), isFixed, fixedValue.encode('utf=8', errors='ignore')))
                 # result is a string of valid FEEL tokens, but may be an invalid expression
+                output = None
                 if not isFixed:
+                    output = self.outputValue(table, foundRule, i)
+                if output is not None:
+                    result = output[0]
+                elif not isFixed:
                     (replaced, result) = self.replaceItems(result)      # Replace BusinessConcept.Attribute references with actual values
                     sfeelText = self.data2sfeel(None, None, result, True)           # See if this is valid S-FEEL
                     if sfeelText is None:               # Not valid FEEL - make this a FEEL string
@@ -5706,8 +8189,8 @@ class DMN():
                                 self.errors.append("Invalid child table '{!s}' in 'Execute' column in Decision Table '{!s}'".format(childTable, table))
                             else:
                                 self.errors.append("Invalid child table '{!s}' in 'Execute' column in Decision Table '{!s}' at '{!s}' on sheet '{!s}'".format(childTable, table, coordinate, sheet))
-                            self.decisionTables[table]['status'] = 'done'
-                            self.decisionTables[table]['recursionCount'] = 0
+                            self.tableStatus[table] = 'done'
+                            self.recursionCount[table] = 0
                             return None
                         childDecisionAnnotations = []
                         if 'annotation' in self.decisionTables[table]:
@@ -5721,18 +8204,11 @@ class DMN():
                         else:
                             return None
                         # Reset the Result outputs to reflect the child decision
-                        for variable in self.glossary:
-                            item = self.glossary[variable]['item']
-                            (failed, thisResult) = self.sfeel('{}'.format(item))
-                            if failed:
-                                self.errors.append("Bad S-FEEL when fetching value for item '{}' when re-assembling 'Result' for table '{!s}'".format(item, table))
-                                self.decisionTables[table]['status'] = 'done'
-                                self.decisionTables[table]['recursionCount'] = 0
-                                return None
-                            if isinstance(thisResult, str):
-                                if (len(thisResult) > 0) and (thisResult[0] == '"') and (thisResult[-1] == '"'):
-                                    thisResult = thisResult[1:-1]
-                            newData['Result'][variable] = thisResult
+                        newData['Result'] = self.newResult(table, 're-assembling')
+                        if newData['Result'] is None:
+                            self.tableStatus[table] = 'done'
+                            self.recursionCount[table] = 0
+                            return None
                         ruleId = (self.decisionTables[table]['name'], table, str(self.rules[table][foundRule]['ruleId']))
                         if 'annotation' in self.decisionTables[table]:
                             for annotation in range(len(self.decisionTables[table]['annotation'])):
@@ -5751,20 +8227,28 @@ class DMN():
                     continue
                 # Evalutate the result and store the value
                 item = self.glossary[variable]['item']
-                (failed, retVal) = self.sfeel('{} <- {}'.format(item, result))
+                if isFixed:
+                    (failed, retVal) = self.sfeelCompiled(self.rules[table][foundRule]['compiledOutputs'][i])
+                elif output is not None:
+                    self.parser.names[item] = output[1]
+                    failed = False
+                else:
+                    (failed, retVal) = self.sfeel('{} <- {}'.format(item, result))
                 if failed:
                     self.errors.append("Bad S-FEEL assigning value to variable '{} <- {}' when assembling 'Result' for table '{!s}'".format(item, result, table))
-                    self.decisionTables[table]['status'] = 'done'
-                    self.decisionTables[table]['recursionCount'] = 0
+                    self.tableStatus[table] = 'done'
+                    self.recursionCount[table] = 0
                     return None
                 if isFixed:
                     thisResult = fixedValue
+                elif output is not None:
+                    thisResult = output[1]
                 else:
                     (failed, thisResult) = self.sfeel('{}'.format(item))
                     if failed:
                         self.errors.append("Bad S-FEEL fetching value'{}' for 'Result' for table '{!s}'".format(item, table))
-                        self.decisionTables[table]['status'] = 'done'
-                        self.decisionTables[table]['recursionCount'] = 0
+                        self.tableStatus[table] = 'done'
+                        self.recursionCount[table] = 0
                         return None
                 if isinstance(thisResult, str):
                     if (len(thisResult) > 0) and (thisResult[0] == '"') and (thisResult[-1] == '"'):
@@ -5774,8 +8258,8 @@ class DMN():
                     if thisResult not in validList:
                         message = "Variable '{!s}' has output value '{!s}' which does not match validity list '{!s}' in table '{!s}'"
                         self.errors.append(message.format(variable, repr(thisResult), repr(validList), table))
-                        self.decisionTables[table]['status'] = 'done'
-                        self.decisionTables[table]['recursionCount'] = 0
+                        self.tableStatus[table] = 'done'
+                        self.recursionCount[table] = 0
                         return None
                 # print('Setting returned value for', variable, 'to', thisResult, 'in Decision Table', "'{!s}'".format(table))
                 newData['Result'][variable] = thisResult
@@ -5809,7 +8293,12 @@ class DMN():
                         (variable, result, outputIndex, rank, isFixed, fixedValue, coordinate, sheet) = self.rules[table][foundRule]['outputs'][k]
                         # result is a string of valid FEEL tokens, but may be a valid expression
                         # print("Result: table '{!s}', rule '{!s}', variable '{!s}', result '{!s}'".format(table, foundRule, variable, result))
+                        output = None
                         if not isFixed:
+                            output = self.outputValue(table, foundRule, k)
+                        if output is not None:
+                            result = output[0]
+                        elif not isFixed:
                             (replaced, result) = self.replaceItems(result)      # Replace BusinessConcept.Attribute references with actual values
                             sfeelText = self.data2sfeel(None, None, result, True)           # See if this is valid S-FEEL
                             if sfeelText is None:               # Not valid FEEL - make this a FEEL string
@@ -5829,8 +8318,8 @@ class DMN():
                                         self.errors.append("Invalid child table '{!s}' in 'Execute' column in Decision Table '{!s}'".format(childTable, table))
                                     else:
                                         self.errors.append("Invalid child table '{!s}' in 'Execute' column in Decision Table '{!s}' at '{!s}' on sheet '{!s}'".format(childTable, table, coordinate, sheet))
-                                    self.decisionTables[table]['status'] = 'done'
-                                    self.decisionTables[table]['recursionCount'] = 0
+                                    self.tableStatus[table] = 'done'
+                                    self.recursionCount[table] = 0
                                     return None
                                 childDecisionAnnotations = []
                                 if 'annotation' in self.decisionTables[table]:
@@ -5846,11 +8335,11 @@ class DMN():
                                 # Reset the Result outputs to reflect the child decision
                                 for variable in self.glossary:
                                     item = self.glossary[variable]['item']
-                                    (failed, thisResult) = self.sfeel('{}'.format(item))
+                                    (failed, thisResult) = self.itemValue(variable)
                                     if failed:
                                         self.errors.append("Bad S-FEEL when fetching value for item '{}' when re-assembling 'Result' for table '{!s}'".format(item, table))
-                                        self.decisionTables[table]['status'] = 'done'
-                                        self.decisionTables[table]['recursionCount'] = 0
+                                        self.tableStatus[table] = 'done'
+                                        self.recursionCount[table] = 0
                                         return None
                                     if isinstance(thisResult, str):
                                         if (len(thisResult) > 0) and (thisResult[0] == '"') and (thisResult[-1] == '"'):
@@ -5910,11 +8399,13 @@ class DMN():
                                     self.errors.append("Bad S-FEEL fetching value'{}' in Decision Table '{!s}' for rule '{!s}'".format(item, table, foundRule))
                                 else:
                                     self.errors.append("Bad S-FEEL fetching value'{}' in Decision Table '{!s}' at '{!s}' on sheet '{!s}' for rule '{!s}'".format(item, table, coordinate, sheet, foundRule))
-                                self.decisionTables[table]['status'] = 'done'
-                                self.decisionTables[table]['recursionCount'] = 0
+                                self.tableStatus[table] = 'done'
+                                self.recursionCount[table] = 0
                                 return None
                             if isFixed:
                                 thisOutput = fixedValue
+                            elif output is not None:
+                                thisOutput = output[1]
                             else:
                                 (failed, thisOutput) = self.sfeel('{}'.format(result))
                                 if failed:
@@ -5922,8 +8413,8 @@ class DMN():
                                         self.errors.append("Bad S-FEEL value'{}' in Decision Table '{!s}' for rule '{!s}'".format(result, table, foundRule))
                                     else:
                                         self.errors.append("Bad S-FEEL value'{}' in Decision Table '{!s}' at '{!s}' on sheet '{!s}' for rule '{!s}'".format(result, table, coordinate, sheet, foundRule))
-                                    self.decisionTables[table]['status'] = 'done'
-                                    self.decisionTables[table]['recursionCount'] = 0
+                                    self.tableStatus[table] = 'done'
+                                    self.recursionCount[table] = 0
                                     return None
                             if isinstance(oldValue, list):
                                 if isinstance(thisOutput, list):
@@ -5937,6 +8428,12 @@ class DMN():
                             sfeelText = self.list2sfeel(newList)           # See if this is valid S-FEEL
                             (failed, retVal) = self.sfeel('{} <- {}'.format(item, sfeelText))
                             isFixed = False
+                            output = None
+                        elif isFixed:
+                            (failed, retVal) = self.sfeelCompiled(self.rules[table][foundRule]['compiledOutputs'][k])
+                        elif output is not None:
+                            self.parser.names[item] = output[1]
+                            failed = False
                         else:
                             (failed, retVal) = self.sfeel('{} <- {}'.format(item, result))
                         if failed:
@@ -5944,11 +8441,13 @@ class DMN():
                                 self.errors.append("Bad S-FEEL assigning value to variable '{} <- {}' in Decision Table '{!s}' for rule '{!s}'".format(item, result, table, foundRule))
                             else:
                                 self.errors.append("Bad S-FEEL assigning value to variable '{} <- {}' in Decision Table '{!s}' at '{!s}' on sheet '{!s}' for rule '{!s}'".format(item, result, table, coordinate, sheet, foundRule))
-                            self.decisionTables[table]['status'] = 'done'
-                            self.decisionTables[table]['recursionCount'] = 0
+                            self.tableStatus[table] = 'done'
+                            self.recursionCount[table] = 0
                             return None
                         if isFixed:
                             thisOutput = fixedValue
+                        elif output is not None:
+                            thisOutput = output[1]
                         else:
                             (failed, thisOutput) = self.sfeel('{}'.format(item))
                             if failed:
@@ -5956,8 +8455,8 @@ class DMN():
                                     self.errors.append("Bad S-FEEL fetching value'{}' in Decision Table '{!s}' for rule '{!s}'".format(item, table, foundRule))
                                 else:
                                     self.errors.append("Bad S-FEEL fetching value'{}' in Decision Table '{!s}' at '{!s}' on sheet '{!s}' for rule '{!s}'".format(item, table, coordinate, sheet, foundRule))
-                                self.decisionTables[table]['status'] = 'done'
-                                self.decisionTables[table]['recursionCount'] = 0
+                                self.tableStatus[table] = 'done'
+                                self.recursionCount[table] = 0
                                 return None
                         if isinstance(thisOutput, str):
                             if (len(thisOutput) > 1) and (thisOutput[0] == '"') and (thisOutput[-1] == '"'):
@@ -5997,8 +8496,8 @@ class DMN():
             for variable in newData['Result']:
                 # print('Setting returned value for', variable, 'to', str(newData['Result'][variable]), 'in Decision Table', "'{!s}'".format(table))
                 pass
-        self.decisionTables[table]['status'] = 'done'
-        self.decisionTables[table]['recursionCount'] = 0
+        self.tableStatus[table] = 'done'
+        self.recursionCount[table] = 0
         return newData
 
 
@@ -6450,6 +8949,164 @@ class DMN():
         return(testStatus, results)
 
 
+class AsyncDMN():
+    """
+    An asyncio front end for a DMN with loaded rules
+
+    Decisions are made in a pool of threads (sharing the DMN - each thread has its own evaluation context),
+    or a pool of worker processes (each with its own copy of the loaded rules), so the event loop is never blocked.
+    Requests to decide() that arrive together (in the same pass of the event loop) are sent to the pool as one batch,
+    so, under load, the cost of handing work to the pool is shared by many decisions.
+
+    """
+
+    def __init__(self, dmnRules, workers=4, processes=False, batchSize=64):
+        """
+        Create an asyncio front end for a DMN with loaded rules
+
+        Args:
+            param1 (DMN): A DMN with loaded rules (load(), use(), loadXML(), useXML() or loadCompiled())
+
+            OPTIONAL
+
+            workers=N
+
+                - the number of threads, or worker processes, making decisions (default 4)
+
+            processes=True
+
+                - make decisions in worker processes, rather than threads
+                - the loaded rules are copied to each worker process once, when it starts
+
+            batchSize=K
+
+                - the largest number of requests sent to a thread or worker process at once (default 64)
+
+        Raises:
+            TypeError: param1 is not a DMN
+            ValueError: param1 has no loaded rules, or workers or batchSize is not a positive integer
+
+        """
+
+        if not isinstance(dmnRules, DMN):
+            raise TypeError('param1 is not a DMN')
+        if not dmnRules.isLoaded:
+            raise ValueError('No rulesBook has been loaded')
+        for (arg, value) in [('workers', workers), ('batchSize', batchSize)]:
+            if isinstance(value, bool) or not isinstance(value, int) or (value < 1):
+                raise ValueError(arg + ' is not a positive integer')
+        self.dmnRules = dmnRules
+        self.batchSize = batchSize
+        if processes:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=initWorker, initargs=(pickle.dumps(dmnRules),))
+            self.decideBatch = decideWorkerBatch
+        else:
+            self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+            self.decideBatch = lambda batch: decideBatch(dmnRules, batch)
+        self.pending = []               # The requests waiting to be sent to the pool - (data, outputs, finalOnly, future)
+        self.flushing = None            # The event loop that will send the pending requests to the pool
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, excType, excValue, traceback):
+        await self.close()
+
+
+    async def decide(self, data, outputs=None, finalOnly=False):
+        """
+        Make a decision, without blocking the event loop
+
+        Args:
+            param1 (dict): The dictionary of data about which a decision is being made - see DMN.decide()
+
+            OPTIONAL
+
+            outputs=variables, finalOnly=True - see DMN.decide()
+
+        Returns:
+            tuple: (status, newData) - see DMN.decide()
+
+        """
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((data, outputs, finalOnly, future))
+        if len(self.pending) >= self.batchSize:
+            self.flush()
+        elif self.flushing is None:     # Send this request, and any that arrive with it, once every ready task has had a turn
+            self.flushing = loop
+            loop.call_soon(self.flush)
+        return await future
+
+
+    async def decideMany(self, rows, outputs=None, finalOnly=False):
+        """
+        Make a decision for each dictionary of data in a list, without blocking the event loop
+
+        The list is split into batches, which are decided at the same time in the pool
+
+        Args:
+            param1 (list): The list of dictionaries of data about which decisions are being made - see DMN.decide()
+
+            OPTIONAL
+
+            outputs=variables, finalOnly=True - see DMN.decide()
+
+        Returns:
+            list: of tuples (status, newData), one for each dictionary of data in param1 - see DMN.decide()
+
+        """
+
+        loop = asyncio.get_running_loop()
+        batches = []
+        for at in range(0, len(rows), self.batchSize):
+            batch = [(data, outputs, finalOnly) for data in rows[at:at + self.batchSize]]
+            batches.append(loop.run_in_executor(self.executor, self.decideBatch, batch))
+        decisions = []
+        for batch in await asyncio.gather(*batches):
+            decisions += batch
+        return decisions
+
+
+    def flush(self):
+        # Send the pending requests to the pool, as one batch, and pass each decision back to its request when the batch is decided
+        self.flushing = None
+        if len(self.pending) == 0:
+            return
+        requests = self.pending
+        self.pending = []
+        loop = requests[0][3].get_loop()
+        batch = [(data, outputs, finalOnly) for (data, outputs, finalOnly, future) in requests]
+        decided = loop.run_in_executor(self.executor, self.decideBatch, batch)
+        def finished(decided):
+            if decided.cancelled():
+                for (data, outputs, finalOnly, future) in requests:
+                    future.cancel()
+                return
+            if decided.exception() is not None:
+                for (data, outputs, finalOnly, future) in requests:
+                    if not future.done():
+                        future.set_exception(decided.exception())
+                return
+            for (request, decision) in zip(requests, decided.result()):
+                future = request[3]
+                if not future.done():
+                    future.set_result(decision)
+        decided.add_done_callback(finished)
+
+
+    async def close(self):
+        """
+        Wait for the pending decisions and shut down the pool of threads or worker processes
+        """
+
+        self.flush()
+        await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+
 if __name__ == '__main__':
 
     dmnRules = DMN()
@@ -1,2 +1,2 @@
 from .DMNrules import DMN
-
+from .DMNrules import AsyncDMN
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+'''
+A script to make a decision for every row in a CSV file or Excel workbook, in chunks of rows, using pyDMNrules.
+
+
+SYNOPSIS
+$ pyDMNrules-batch [-c chunksize] [-s sheet] [-H column=Variable] [-t column] [-o Variable] rulesFilename inFilename outFilename
+
+REQUIRED
+rulesFilename
+The name of the DMN rules - an Excel workbook (.xlsx), a DMN compliant XML file (.dmn or .xml) or a saveCompiled() file
+
+inFilename
+The name of the CSV file (.csv) or Excel workbook (.xlsx) of rows of data (with headers)
+
+outFilename
+The name of the output CSV file (.csv) or Excel workbook (.xlsx)
+
+
+OPTIONS
+-c chunksize|--chunksize=chunksize
+The number of rows read, decided and written at a time (default 10000)
+
+-s sheet|--sheet=sheet
+The worksheet to read from inFilename, if it is an Excel workbook (default - the active worksheet)
+
+-H column=Variable|--heading=column=Variable
+Map a column in inFilename to a Glossary Variable (may be repeated)
+
+-t column|--text=column
+Read this column in a CSV inFilename as text, not numbers - e.g. codes and postcodes (may be repeated)
+
+-o Variable|--output=Variable
+Only output this Glossary Variable (may be repeated - default, every Glossary Variable)
+'''
+
+# Import all the modules that make life easy
+import os
+import sys
+import argparse
+from .DMNrules import DMN
+
+
+def main():
+    '''
+The main code
+Parse the command line arguments, load the rules and decide every row in the input file
+    '''
+
+    # Get the script name (without the '.py' extension)
+    progName = os.path.basename(sys.argv[0])
+    if progName.endswith('.py'):
+        progName = progName[0:-3]        # Strip off the .py ending
+
+    # Define the command line options
+    parser = argparse.ArgumentParser(prog=progName)
+    parser.add_argument('rulesFilename', help='The name of the DMN rules (Excel workbook, DMN XML file or compiled rules file)')
+    parser.add_argument('inFilename', help='The name of the CSV file or Excel workbook of data (with headers)')
+    parser.add_argument('outFilename', help='The name of the output CSV file or Excel workbook')
+    parser.add_argument('-c', '--chunksize', type=int, default=10000, help='The number of rows read, decided and written at a time')
+    parser.add_argument('-s', '--sheet', help='The worksheet to read, if inFilename is an Excel workbook')
+    parser.add_argument('-H', '--heading', action='append', default=[], help='column=Variable - map a column to a Glossary Variable')
+    parser.add_argument('-t', '--text', action='append', default=[], help='Read this CSV column as text')
+    parser.add_argument('-o', '--output', action='append', default=[], help='Only output this Glossary Variable')
+
+    # Parse the command line options
+    args = parser.parse_args()
+    rulesFilename = args.rulesFilename
+    inFilename = args.inFilename
+    outFilename = args.outFilename
+
+    # Load the rules
+    dmnRules = DMN()
+    rulesType = os.path.splitext(rulesFilename)[1].lower()
+    if rulesType in ['.xlsx', '.xlsm']:
+        status = dmnRules.load(rulesFilename)
+    elif rulesType in ['.dmn', '.xml']:
+        status = dmnRules.loadXML(rulesFilename)
+    else:
+        status = dmnRules.loadCompiled(rulesFilename)
+    if 'errors' in status:
+        print(status['errors'], file=sys.stderr)
+        return 1
+
+    # Decide every row
+    kwargs = {}
+    kwargs['chunksize'] = args.chunksize
+    if args.sheet is not None:
+        kwargs['sheet'] = args.sheet
+    if len(args.heading) > 0:
+        headings = {}
+        for heading in args.heading:
+            (column, equals, variable) = heading.partition('=')
+            if equals == '':
+                print("Invalid heading '{!s}' - must be column=Variable".format(heading), file=sys.stderr)
+                return 1
+            headings[column] = variable
+        kwargs['headings'] = headings
+    if len(args.text) > 0:
+        kwargs['dtype'] = dict.fromkeys(args.text, str)
+    if len(args.output) > 0:
+        kwargs['outputs'] = args.output
+    status = dmnRules.decideFile(inFilename, outFilename, **kwargs)
+    if 'errors' in status:
+        print(status['errors'], file=sys.stderr)
+        return 1
+    print('{!s} rows decided, {!s} with errors'.format(status['rows'], status['rowErrors']))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
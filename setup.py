@@ -5,7 +5,7 @@ with open('README.md', 'r') as fh:
 
 setuptools.setup(
     name='pyDMNrules',
-    version='1.4.4',
+    version='1.5.0',
     author='Russell McDonell',
     author_email='russell.mcdonell@c-cost.com',
     description='An implementation of DMN in Python. DMN rules are read from an Excel workbook',
@@ -19,6 +19,9 @@ setuptools.setup(
         'Operating System :: OS Independent',
     ],
     python_requires='>=3.6',
-    install_requires=['datetime', 'pySFeel','openpyxl', 'pandas'],
+    install_requires=['datetime', 'pySFeel','openpyxl', 'pandas', 'numpy'],
+    entry_points={
+        'console_scripts': ['pyDMNrules-batch=pyDMNrules.batch:main'],
+    },
 )
 
@@ -2,7 +2,13 @@ import pyDMNrules
 from openpyxl import load_workbook
 import csv
 import pandas as pd
+import numpy
 import datetime
+import pickle
+import json
+import concurrent.futures
+import asyncio
+import pytest
 
 class TestClass:
     def test_HPV1(self):
@@ -2258,3 +2264,734 @@ class TestClass:
         for i in range(len(testStatus)):
             assert 'errors' not in testStatus[i]
 
+    def test_compiledRules(self):
+        '''
+        Check that every rule is compiled when loaded and that repeated decisions are consistent
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        assert 'errors' not in status
+        for table in dmnRules.rules:
+            for rule in dmnRules.rules[table]:
+                assert len(rule['compiledTests']) == len(rule['tests'])
+                assert len(rule['compiledOutputs']) == len(rule['outputs'])
+        data = {}
+        data['Participant Age'] = 36
+        data['In Test of Cure'] = True
+        data['Hysterectomy Flag'] = False
+        data['Cancer Flag'] = False
+        data['HPV-V'] = 'V0'
+        data['Current Participant Risk Category'] = 'low'
+        for i in range(3):
+            (status, newData) = dmnRules.decide(data)
+            assert 'errors' not in status
+            assert newData['Result']['Test Risk Code'] == 'L'
+            assert newData['Result']['Next Rule'] == 'CervicalRisk2'
+
+    def test_ruleIndex(self):
+        '''
+        Check that indexed 'item = constant' tests only skip rules that can't match
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/AN-SNAP V4 grouper (DMN).xlsx')
+        assert 'errors' not in status
+        data = {}
+        data['Multidisciplinary'] = True
+        data['Admitted Flag'] = False
+        data['Care Type'] = 'Rehabilitation'
+        data['Patient Age'] = 19
+        data['Assessment Only'] = False
+        data['AROC code'] = '7'
+        (status, newData) = dmnRules.decide(data)
+        assert 'errors' not in status
+        (decision, table, rule) = newData[-1]['Executed Rule']
+        assert rule == 'Non-Admitted Adult Rehab Rule 5'
+        assert dmnRules.decisionTables[table]['ruleIndex'] is not None
+        candidates = dmnRules.candidateRules(table)
+        assert len(candidates) < len(dmnRules.rules[table])
+        assert candidates == sorted(candidates)
+        ruleIds = [dmnRules.rules[table][thisRule]['ruleId'] for thisRule in candidates]
+        assert rule in ruleIds
+
+    def test_rangeIndex(self):
+        '''
+        Check that indexed range tests, including those in Crosstab tables, only skip rules that can't match
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleCrosstab.xlsx')
+        assert 'errors' not in status
+        assert dmnRules.decisionTables['Discount']['ruleIndex'] is not None
+        for (orderSize, discount) in [(9, 0.05), (10, 0.1), (11, 0.1)]:
+            data = {}
+            data['Customer'] = 'Business'
+            data['OrderSize'] = orderSize
+            data['Delivery'] = 'slow'
+            (status, newData) = dmnRules.decide(data)
+            assert 'errors' not in status
+            assert newData['Result']['Discount'] == discount
+            candidates = dmnRules.candidateRules('Discount')
+            assert len(candidates) == 1
+
+    def test_decideColumns(self):
+        '''
+        Check that deciding a Pandas DataFrame column by column gives the same results as deciding it row by row
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleRows.xlsx')
+        assert 'errors' not in status
+        rows = []
+        for customer in ['Business', 'Private', 'Government', 'Other']:
+            for orderSize in [1, 9, 10, 11, None]:
+                for delivery in ['sameday', 'slow']:
+                    rows.append({'Customer':customer, 'OrderSize':orderSize, 'Delivery':delivery})
+        dfInput = pd.DataFrame(rows)
+        decision = dmnRules.decideColumns(dfInput, {})
+        assert decision['decided'].sum() > 0
+        assert decision['decided'].sum() < len(rows)
+        (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput)
+        (rowStatus, rowResults, rowDecision) = dmnRules.decidePandas(dfInput, vectorize=False)
+        assert dfStatus.equals(rowStatus)
+        assert dfResults.equals(rowResults)
+        assert dfDecision.equals(rowDecision)
+
+    def test_decidePandasAssembly(self):
+        '''
+        Check that decidePandas() returns one row of results, and one row of decision details, for each input row
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleRows.xlsx')
+        assert 'errors' not in status
+        rows = []
+        for customer in ['Business', 'Other', 'Private']:
+            for orderSize in [1, None, 11]:
+                rows.append({'Customer':customer, 'OrderSize':orderSize, 'Delivery':'slow'})
+        dfInput = pd.DataFrame(rows)
+        for vectorize in [True, False]:
+            (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput, vectorize=vectorize)
+            assert len(dfStatus) == len(rows)
+            assert len(dfResults) == len(rows)
+            assert len(dfDecision) == len(rows)
+            assert list(dfResults['index']) == list(range(len(rows)))
+            for index, value in dfStatus.items():
+                if value == 'no errors':
+                    assert dfDecision.loc[index, 'TableName'] == 'Discount'
+                    assert dfResults.loc[index, 'Discount'] is not None
+                else:
+                    assert dfDecision.loc[index, 'TableName'] is None
+                    assert dfResults.loc[index, 'Discount'] is None
+
+    def test_decidePandasUnloaded(self):
+        '''
+        Check that decidePandas() reports that no rules have been loaded, for each input row
+        '''
+        dmnRules = pyDMNrules.DMN()
+        dfInput = pd.DataFrame([{'Customer':'Business', 'OrderSize':5, 'Delivery':'slow'}] * 3)
+        for vectorize in [True, False]:
+            (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput, vectorize=vectorize)
+            assert list(dfStatus) == ['No rulesBook has been loaded'] * 3
+
+    def test_decidePandasWorkers(self):
+        '''
+        Check that deciding a Pandas DataFrame in worker processes gives the same results, in the same order
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleRows.xlsx')
+        assert 'errors' not in status
+        rows = []
+        for customer in ['Business', 'Private', 'Government', 'Other']:
+            for orderSize in [1, 9, 10, 11, None]:
+                for delivery in ['sameday', 'slow']:
+                    rows.append({'Customer':customer, 'OrderSize':orderSize, 'Delivery':delivery})
+        dfInput = pd.DataFrame(rows)
+        (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput)
+        (workerStatus, workerResults, workerDecision) = dmnRules.decidePandas(dfInput, workers=2, chunksize=7)
+        assert workerStatus.equals(dfStatus)
+        assert workerResults.equals(dfResults)
+        assert workerDecision.equals(dfDecision)
+        # The first chunk has a row with errors (None), and the rows of the second chunk have text and numbers in the Delivery column
+        rows = [{'Customer':'Other', 'OrderSize':20, 'Delivery':'slow'}]
+        rows += [{'Customer':'Business', 'OrderSize':20, 'Delivery':'slow'}] * 6
+        for delivery in ['slow', 5, 'sameday', 2.5]:
+            rows.append({'Customer':'Business', 'OrderSize':20, 'Delivery':delivery})
+        dfInput = pd.DataFrame(rows)
+        (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput, workers=1)
+        (workerStatus, workerResults, workerDecision) = dmnRules.decidePandas(dfInput, workers=2, chunksize=7)
+        assert workerStatus.equals(dfStatus)
+        assert workerResults.equals(dfResults)
+        assert list(workerResults['Delivery']) == [None, 'slow', 'slow', 'slow', 'slow', 'slow', 'slow', 'slow', 5.0, 'sameday', 2.5]
+        assert workerDecision.equals(dfDecision)
+        (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput, workers=0)
+        assert dfStatus[0] == 'workers is not a positive integer'
+
+    def test_pickleXML(self):
+        '''
+        Check that rules loaded from a DMN XML file can be copied to a worker process (pickled)
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.loadXML('../pyDMNrules/simulation.dmn')
+        assert 'errors' not in status
+        workerRules = pickle.loads(pickle.dumps(dmnRules))
+        data = {}
+        data['Season'] = 'Summer'
+        data['How many guests'] = 5
+        data['Guests with children'] = True
+        (status, newData) = workerRules.decide(data)
+        assert 'errors' not in status
+        assert newData == dmnRules.decide(data)[1]
+        assert newData[-1]['Result']['Dish'] == 'Light Salad and a nice Steak'
+
+    def test_saveCompiled(self, tmp_path):
+        '''
+        Check that saved compiled rules make the same decisions as the workbook they were compiled from
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/Example1.xlsx')
+        assert 'errors' not in status
+        compiledFile = str(tmp_path / 'Example1.rules')
+        status = dmnRules.saveCompiled(compiledFile)
+        assert 'errors' not in status
+        compiledRules = pyDMNrules.DMN()
+        status = compiledRules.loadCompiled(compiledFile)
+        assert 'errors' not in status
+        data = {}
+        data['Applicant Age'] = 63
+        data['Medical History'] = 'bad'
+        assert compiledRules.decide(data) == dmnRules.decide(data)
+        assert compiledRules.getGlossary() == dmnRules.getGlossary()
+        badFile = str(tmp_path / 'bad.rules')
+        with open(badFile, 'wb') as bad:
+            bad.write(b'not compiled rules')
+        status = compiledRules.loadCompiled(badFile)
+        assert 'errors' in status
+
+    def test_threadedDecide(self):
+        '''
+        Check that one DMN can be shared by many threads, each making their own decisions
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        assert 'errors' not in status
+        rows = []
+        for participantAge in [20, 36, 50, 75]:
+            for hpv in ['V0', 'V1', 'V2', 'V9']:
+                for riskCategory in ['low', 'high']:
+                    data = {}
+                    data['Participant Age'] = participantAge
+                    data['In Test of Cure'] = False
+                    data['Hysterectomy Flag'] = False
+                    data['Cancer Flag'] = False
+                    data['HPV-V'] = hpv
+                    data['Current Participant Risk Category'] = riskCategory
+                    rows.append(data)
+        expected = [dmnRules.decide(data) for data in rows * 4]
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            decisions = list(executor.map(dmnRules.decide, rows * 4))
+        assert decisions == expected
+
+    def test_decisionCache(self):
+        '''
+        Check that cached decisions are the same as uncached decisions, and are copies
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/Example1.xlsx')
+        assert 'errors' not in status
+        status = dmnRules.setCache(maxSize=2)
+        assert 'errors' not in status
+        data = {}
+        data['Applicant Age'] = 63
+        data['Medical History'] = 'bad'
+        (status, newData) = dmnRules.decide(data)
+        assert 'errors' not in status
+        assert newData['Result']['Applicant Risk Rating'] == 'High'
+        newData['Result']['Applicant Risk Rating'] = 'Changed'
+        (status, newData) = dmnRules.decide(data)
+        assert newData['Result']['Applicant Risk Rating'] == 'High'
+        stats = dmnRules.getCacheStats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        for age in [20, 40, 60]:
+            data['Applicant Age'] = age
+            dmnRules.decide(data)
+        assert dmnRules.getCacheStats()['size'] == 2
+        status = dmnRules.load('../pyDMNrules/Example1.xlsx')
+        assert dmnRules.getCacheStats()['size'] == 0
+        status = dmnRules.setCache(maxSize=-1)
+        assert 'errors' in status
+
+    def test_replaceVariable(self):
+        '''
+        Check that Variables are replaced with their BusinessConcept.Attribute (nearest and longest first), but not inside strings
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        assert 'errors' not in status
+        (replaced, text) = dmnRules.replaceVariable('Participant Age >= 60 and "Participant Age" != Current Participant Risk Category')
+        assert replaced == ['Participant Age', 'Current Participant Risk Category']
+        assert text == 'Participant.participantAge  >= 60 and "Participant Age" != Participant.currentParticipantRiskCategory '
+        (replaced, text) = dmnRules.replaceVariable('Participant Age.year')
+        assert text == 'Participant.participantAge.year '
+        (replaced, text) = dmnRules.replaceVariable('Participant Agent')
+        assert replaced == []
+
+    def test_glossaryReset(self):
+        '''
+        Check that every decision starts with every Glossary item set to null
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/Example1.xlsx')
+        assert 'errors' not in status
+        data = {}
+        data['Applicant Age'] = 63
+        data['Medical History'] = 'bad'
+        (status, newData) = dmnRules.decide(data)
+        assert newData['Result']['Medical History'] == 'bad'
+        del data['Medical History']
+        (status, newData) = dmnRules.decide(data)
+        assert 'errors' in status
+        assert status['errors'][0] == "No rules matched the input data for decision table 'Applicant Risk Rating'"
+
+    def test_value2python(self):
+        '''
+        Check that Python values passed directly to pySFeel are the values that pySFeel would get from their S-FEEL text
+        '''
+        dmnRules = pyDMNrules.DMN()
+        values = [None, True, 7, -2.5, 'abc', '', "it's", datetime.date(2021, 3, 4), datetime.datetime(2021, 3, 4, 5, 6, 7),
+                  datetime.time(5, 6, 7), datetime.timedelta(days=3, seconds=65), [1, 'a', [2.5]], {'a':1, 'b':'x'},
+                  ('[', 1, 5, ')'), ('(', datetime.date(2021, 1, 1), datetime.date(2022, 1, 1), ']')]
+        for value in values:
+            (isPython, pythonValue) = dmnRules.value2python(value)
+            assert isPython
+            (failed, sFeelValue) = dmnRules.sfeel(dmnRules.value2sfeel(value))
+            assert not failed
+            assert repr(pythonValue) == repr(sFeelValue)
+        (isPython, pythonValue) = dmnRules.value2python('"a FEEL string"')
+        assert not isPython
+        (isPython, pythonValue) = dmnRules.value2python(float('nan'))
+        assert not isPython
+
+    def test_numpyValues(self):
+        '''
+        Check that numpy scalars, as pulled out of a DataFrame, are passed to pySFeel as the equivalent Python values
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/Example1.xlsx')
+        assert 'errors' not in status
+        (isPython, pythonValue) = dmnRules.value2python(numpy.float64(63))
+        assert isPython
+        assert type(pythonValue) == float
+        (isPython, pythonValue) = dmnRules.value2python(numpy.str_('bad'))
+        assert isPython
+        assert type(pythonValue) == str
+        for age in [numpy.float64(63), numpy.float64(24)]:
+            data = {}
+            data['Applicant Age'] = age
+            data['Medical History'] = numpy.str_('bad')
+            (status, newData) = dmnRules.decide(data)
+            assert 'errors' not in status
+            assert newData['Result']['Applicant Risk Rating'] == dmnRules.decide({'Applicant Age':float(age), 'Medical History':'bad'})[1]['Result']['Applicant Risk Rating']
+        dfInput = pd.DataFrame({'Applicant Age':[63.0, 24.0], 'Medical History':['bad', 'bad']})
+        for row in dfInput.itertuples(index=False):
+            (status, newData) = dmnRules.decide({'Applicant Age':row[0], 'Medical History':row[1]})
+            assert 'errors' not in status
+        assert newData['Result']['Applicant Risk Rating'] == 'Medium'
+
+    def test_lazyResult(self):
+        '''
+        Check that the lazily assembled 'Result' is returned as a dictionary of every Glossary Variable
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        assert 'errors' not in status
+        data = {}
+        data['Participant Age'] = 36
+        data['In Test of Cure'] = True
+        data['Hysterectomy Flag'] = False
+        data['Cancer Flag'] = False
+        data['HPV-V'] = 'V0'
+        data['Current Participant Risk Category'] = 'low'
+        (status, newData) = dmnRules.decide(data)
+        assert 'errors' not in status
+        result = newData['Result']
+        assert isinstance(result, dict)
+        assert list(result) == list(dmnRules.getGlossary()['Participant']) + list(dmnRules.getGlossary()['PathTest']) + list(dmnRules.getGlossary()['Response'])
+        assert result['Next Rule'] == 'CervicalRisk2'
+        assert result['Participant Age'] == 36.0
+        assert json.loads(json.dumps(result)) == result
+        assert 'Cyto-S' in result
+        assert 'Unknown' not in result
+        (status, newData) = dmnRules.decide(data, outputs=['Next Rule'])
+        assert 'errors' not in status
+        assert isinstance(newData['Result'], dict)
+        assert newData['Result'] == {'Next Rule':'CervicalRisk2'}
+        (status, newData) = dmnRules.decideTables(data, ['FirstTestOfCervicalRisk'])
+        assert 'errors' not in status
+        assert isinstance(newData['Result'], dict)
+        json.dumps(newData['Result'])
+        dmnRules.setCache(maxSize=10)
+        for i in range(2):        # Decide, then get the decision from the decision cache
+            (status, newData) = dmnRules.decide(data)
+            assert 'errors' not in status
+            assert isinstance(newData['Result'], dict)
+            assert json.loads(json.dumps(newData['Result']))['Next Rule'] == 'CervicalRisk2'
+        assert dmnRules.getCacheStats()['hits'] == 1
+
+    def test_outputs(self):
+        '''
+        Check that decide() and decidePandas() can return just the final decision and just some Variables
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleExecuteByRows1.xlsx')
+        assert 'errors' not in status
+        data = {}
+        data['Patient Birthdate'] = datetime.date(year=1952, month=11, day=11)
+        data['Admission Date'] = datetime.date(year=2021, month=1, day=16)
+        (status, allData) = dmnRules.decide(data)
+        assert 'errors' not in status
+        (status, newData) = dmnRules.decide(data, outputs=['Age Group', 'Computed Patient Age'], finalOnly=True)
+        assert 'errors' not in status
+        assert newData['Executed Rule'] == allData[-1]['Executed Rule']
+        assert dict(newData['Result']) == {'Age Group':13, 'Computed Patient Age':69}
+        (status, newData) = dmnRules.decide(data, outputs=['Age Group'])
+        assert len(newData) == len(allData)
+        assert list(newData[-1]['Result']) == ['Age Group']
+        (status, newData) = dmnRules.decide(data, outputs=['Unknown'])
+        assert status['errors'] == ["outputs Variable 'Unknown' is not in the Glossary"]
+        dfInput = pd.DataFrame([data, data])
+        (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput, outputs=['Age Group'])
+        assert list(dfResults.columns) == ['index', 'Age Group']
+        assert list(dfResults['Age Group']) == [13, 13]
+        (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput, outputs='Age Group')
+        assert dfStatus[0] == 'outputs is not a list'
+
+    def test_decisionDAG(self):
+        '''
+        Check that Decision Tables compiled into decision DAGs make the same decisions
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        assert 'errors' not in status
+        assert 'decisionDAG' not in status
+        dagRules = pyDMNrules.DMN()
+        status = dagRules.load('../pyDMNrules/ExampleHPV.xlsx', decisionDAG=True)
+        assert 'errors' not in status
+        assert status['decisionDAG']['FirstTestOfCervicalRisk'] > 0
+        for age in [20, 36, 75]:
+            for hpv in ['V0', 'V1', 'V2', 'V9', 'V7']:
+                data = {}
+                data['Participant Age'] = age
+                data['In Test of Cure'] = False
+                data['Hysterectomy Flag'] = False
+                data['Cancer Flag'] = False
+                data['HPV-V'] = hpv
+                data['Current Participant Risk Category'] = 'low'
+                (status, newData) = dmnRules.decide(data)
+                (dagStatus, dagData) = dagRules.decide(data)
+                assert dagStatus == status
+                if isinstance(newData, dict):
+                    newData = [newData]
+                    dagData = [dagData]
+                assert [decision['Executed Rule'] for decision in dagData] == [decision['Executed Rule'] for decision in newData]
+                assert [dict(decision['Result']) for decision in dagData] == [dict(decision['Result']) for decision in newData]
+        status = dagRules.loadXML('../pyDMNrules/simulation.dmn', decisionDAG=True)
+        assert 'errors' not in status
+        assert status['decisionDAG']['Dish'] > 0
+        (status, newData) = dagRules.decide({'Season':'Winter', 'How many guests':4, 'Guests with children':True})
+        assert 'errors' not in status
+
+    def test_inputValidity(self):
+        '''
+        Check that input validity lists and ranges checked in Python match the S-FEEL validity tests
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/AN-SNAP V4 grouper (DMN).xlsx')
+        assert 'errors' not in status
+        dmnRules.initGlossary()
+        values = [None, True, False, 0.0, 1.0, 4.0, 4.5, 13.0, 91.0, 92.0, -1.0, float('nan'), '1', '8.1', 'x', [1.0], datetime.date(year=2021, month=1, day=16)]
+        checked = 0
+        for table in dmnRules.decisionTables:
+            for inputIndex in range(len(dmnRules.decisionTables[table]['inputValidity'])):
+                check = dmnRules.decisionTables[table]['validityChecks'][inputIndex]
+                if check is None:
+                    continue
+                (checkType, item, checkValues, boundType) = check
+                for variable in dmnRules.glossary:
+                    if dmnRules.glossary[variable]['item'] == item:
+                        break
+                for value in values:
+                    dmnRules.parser.names[item] = value
+                    compiled = dmnRules.decisionTables[table]['compiledValidity'][inputIndex]
+                    assert dmnRules.validInput(table, variable, inputIndex, value) == dmnRules.sfeelCompiled(compiled)
+                    checked += 1
+        assert checked > 0
+
+    def test_outputExpressions(self):
+        '''
+        Check that output expressions are classified, compiled and folded when the rules are loaded
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleExecuteByRows1.xlsx')
+        assert 'errors' not in status
+        outputTypes = set()
+        for table in dmnRules.rules:
+            for thisRule in dmnRules.rules[table]:
+                for outputExpression in thisRule['outputExpressions']:
+                    if outputExpression is not None:
+                        outputTypes.add(outputExpression[0])
+        assert outputTypes == set(['expression', 'reference'])
+        assert dmnRules.compileOutput('"Stew"') == ('constant', '"Stew"', 'Stew', None)
+        assert dmnRules.compileOutput('today()') is None
+        (outputType, result, compiled, items) = dmnRules.compileOutput('( 2 * ( 3 + 1 ) ) + ( Data.Admission_Date ).year')
+        assert outputType == 'expression'
+        assert items == ['Data.Admission_Date']
+        assert [token.value for token in compiled[1]][:3] == ['(', '8.0', ')']
+        data = {}
+        data['Patient Birthdate'] = datetime.date(year=1952, month=11, day=11)
+        data['Admission Date'] = datetime.date(year=2021, month=1, day=16)
+        (status, newData) = dmnRules.decide(data)
+        assert 'errors' not in status
+        assert newData[-1]['Result']['Computed Patient Age'] == 69
+        assert newData[-1]['Result']['Age Group'] == 13
+
+    def test_decideFile(self, tmp_path):
+        '''
+        Check that decideFile() decides a CSV file, in chunks, into a CSV file or an Excel workbook
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/Subacute NWAU21 calculator (DMN).xlsx')
+        assert 'errors' not in status
+        headings = {'Expected AN-SNAP V4 code':'AN-SNAP V4.0', 'Same-day admitted care':'Same Day Admission'}
+        dtype = {'Expected AN-SNAP V4 code':str, 'Hospital Remoteness':str, 'Postcode':str, 'SA2':str,
+                 'Funding Source':str, 'Indigenous Status':str, 'State':str}
+        dfExpected = pd.read_csv('../pyDMNrules/subAcuteExtract.csv')
+        for outFilename in [str(tmp_path / 'costed.csv'), str(tmp_path / 'costed.xlsx')]:
+            status = dmnRules.decideFile('../pyDMNrules/subAcuteExtract.csv', outFilename, headings=headings, outputs=['NWAU21'], chunksize=4, dtype=dtype)
+            assert status == {'rows':len(dfExpected.index), 'rowErrors':0}
+            if outFilename.endswith('.csv'):
+                dfOutput = pd.read_csv(outFilename)
+            else:
+                dfOutput = pd.read_excel(outFilename)
+            assert list(dfOutput.columns) == list(dfExpected.columns) + ['NWAU21', 'status']
+            assert list(dfOutput['status']) == ['no errors'] * len(dfExpected.index)
+            for thisRow in range(len(dfExpected.index)):
+                assert (int(dfOutput['NWAU21'][thisRow] * 10000.0 + 0.5) / 10000.0) == (int(float(dfExpected['Expected NWAU21'][thisRow]) * 10000.0 + 0.5) / 10000.0)
+        status = dmnRules.decideFile('../pyDMNrules/subAcuteExtract.csv', str(tmp_path / 'costed.txt'))
+        assert status['errors'] == ["'{!s}' is not a CSV file or Excel workbook".format(tmp_path / 'costed.txt')]
+        status = dmnRules.decideFile('../pyDMNrules/subAcuteExtract.csv', str(tmp_path / 'costed.csv'), chunksize=0)
+        assert status['errors'] == ['chunksize is not a positive integer']
+        status = pyDMNrules.DMN().decideFile('../pyDMNrules/subAcuteExtract.csv', str(tmp_path / 'costed.csv'), chunksize=4)
+        assert status['errors'] == ['No rulesBook has been loaded']
+
+    def test_decideIter(self):
+        '''
+        Check that deciding an iterable of dictionaries, lazily and in worker processes, gives the same decisions, in the same order
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleRows.xlsx')
+        assert 'errors' not in status
+        rows = []
+        for customer in ['Business', 'Private', 'Government', 'Other']:
+            for orderSize in [1, 9, 10, 11, None]:
+                for delivery in ['sameday', 'slow']:
+                    rows.append({'Customer':customer, 'OrderSize':orderSize, 'Delivery':delivery})
+        decisions = dmnRules.decideIter(iter(rows))
+        assert not isinstance(decisions, list)
+        assert [repr(decision) for decision in decisions] == [repr(dmnRules.decide(data)) for data in rows]
+        decisions = list(dmnRules.decideIter((data for data in rows), workers=2, chunksize=7, outputs=['Discount'], finalOnly=True))
+        assert [repr(decision) for decision in decisions] == [repr(dmnRules.decide(data, ['Discount'], True)) for data in rows]
+        decisions = list(dmnRules.decideIter(rows, workers=0))
+        assert decisions == [({'errors':['workers is not a positive integer']}, {})]
+
+    def test_AsyncDMN(self):
+        '''
+        Check that decisions made with AsyncDMN, in threads and in worker processes, match decide()
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleRows.xlsx')
+        assert 'errors' not in status
+        rows = []
+        for customer in ['Business', 'Private', 'Government', 'Other']:
+            for orderSize in [1, 9, 10, 11, None]:
+                for delivery in ['sameday', 'slow']:
+                    rows.append({'Customer':customer, 'OrderSize':orderSize, 'Delivery':delivery})
+        expected = [repr(dmnRules.decide(data)) for data in rows]
+
+        async def decideAll(processes):
+            async with pyDMNrules.AsyncDMN(dmnRules, workers=2, processes=processes, batchSize=7) as asyncRules:
+                decisions = await asyncio.gather(*[asyncRules.decide(data) for data in rows])
+                assert [repr(decision) for decision in decisions] == expected
+                decisions = await asyncRules.decideMany(rows)
+                assert [repr(decision) for decision in decisions] == expected
+                (status, newData) = await asyncRules.decide(rows[0], outputs=['Discount'])
+                assert repr((status, newData)) == repr(dmnRules.decide(rows[0], outputs=['Discount']))
+
+        asyncio.run(decideAll(False))
+        asyncio.run(decideAll(True))
+        with pytest.raises(ValueError):
+            pyDMNrules.AsyncDMN(dmnRules, workers=0)
+        with pytest.raises(ValueError):
+            pyDMNrules.AsyncDMN(pyDMNrules.DMN())
+
+    def test_setProfiler(self):
+        '''
+        Check that the profiler is called with the profile of each Decision Table run
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        assert 'errors' not in status
+        data = {}
+        data['Participant Age'] = 36
+        data['In Test of Cure'] = True
+        data['Hysterectomy Flag'] = False
+        data['Cancer Flag'] = False
+        data['HPV-V'] = 'V0'
+        data['Current Participant Risk Category'] = 'low'
+        profiles = []
+        status = dmnRules.setProfiler(profiles.append)
+        assert 'errors' not in status
+        (status, newData) = dmnRules.decide(data)
+        assert 'errors' not in status
+        assert len(profiles) == 1
+        assert profiles[0]['table'] == newData['Executed Rule'][1]
+        assert profiles[0]['time'] > 0.0
+        assert newData['Executed Rule'][2] in profiles[0]['rules']
+        assert profiles[0]['sfeelEvaluations'] >= sum(profiles[0]['rules'].values())
+        status = dmnRules.setProfiler(None)
+        (status, newData) = dmnRules.decide(data)
+        assert len(profiles) == 1
+        status = dmnRules.setProfiler('profiler')
+        assert status['errors'] == ['profiler is not callable']
+        workerRules = pickle.loads(pickle.dumps(dmnRules))
+        assert workerRules.profiler is None
+
+    def test_coverage(self):
+        '''
+        Check that rule coverage statistics count matched rules, evaluated tests, failed tests and defaults
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        assert 'errors' not in status
+        data = {}
+        data['Participant Age'] = 36
+        data['In Test of Cure'] = True
+        data['Hysterectomy Flag'] = False
+        data['Cancer Flag'] = False
+        data['HPV-V'] = 'V0'
+        data['Current Participant Risk Category'] = 'low'
+        status = dmnRules.setCoverage(True)
+        assert 'errors' not in status
+        for decision in range(3):
+            (status, newData) = dmnRules.decide(data)
+            assert 'errors' not in status
+        (dfTables, dfRules, dfTests) = dmnRules.getCoverage()
+        table = newData['Executed Rule'][1]
+        assert dfTables.loc[dfTables['Table'] == table, 'Runs'].iloc[0] == 3
+        assert dfTables.loc[dfTables['Table'] == table, 'Defaults'].iloc[0] == 0
+        assert len(dfRules.index) == 27
+        matched = dfRules[dfRules['Matched'] > 0]
+        assert list(matched['RuleID']) == [newData['Executed Rule'][2]]
+        assert matched['Matched'].iloc[0] == 3
+        assert dfTests['Evaluated'].sum() > 0
+        assert dfTests.loc[dfTests['RuleID'] == newData['Executed Rule'][2], 'FailedFirst'].sum() == 0
+        failed = dfTests.groupby('RuleID')['FailedFirst'].sum()
+        for ruleId in dfRules.loc[dfRules['Matched'] == 0, 'RuleID']:
+            assert failed.get(ruleId, 0) in [0, 3]
+        status = dmnRules.setCoverage(False)
+        (dfTables, dfRules, dfTests) = dmnRules.getCoverage()
+        assert dfRules['Matched'].sum() == 0
+        status = dmnRules.setCoverage('yes')
+        assert status['errors'] == ['collect is not True or False']
+
+    def test_optimizeRuleOrder(self):
+        '''
+        Check that reordering the rules, and tests, of Unique hit policy Decision Tables evaluates fewer tests and makes the same decisions
+        '''
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/AN-SNAP V4 grouper (DMN).xlsx')
+        assert 'errors' not in status
+        dfInput = pd.read_excel('../pyDMNrules/SubacuteExtract.xlsx')
+        dfInput['Long term care'] = False
+        dfInput.loc[dfInput['Length of Stay'] > 92, 'Long term care'] = True
+        dfInput['First Phase'] = False
+        thisPatient = thisEpisode = None
+        for index, row in dfInput.iterrows():
+            if ((row['Patient UR'] != thisPatient) or (row['Episode Start Date'] != thisEpisode)):
+                thisPatient = row['Patient UR']
+                thisEpisode = row['Episode Start Date']
+                if row['Phase Type'] == 'Unstable':
+                    dfInput.loc[index, 'First Phase'] = True
+        profiles = []
+        dmnRules.setProfiler(profiles.append)
+        (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput, vectorize=False)
+        testsBefore = sum([sum(profile['rules'].values()) for profile in profiles])
+        dmnRules.setProfiler(None)
+        status = dmnRules.optimizeRuleOrder()
+        assert status['errors'] == ['Rule coverage statistics are not being collected - see setCoverage()']
+        status = dmnRules.optimizeRuleOrder(dfInput)
+        assert 'errors' not in status
+        assert len(status['reordered']) > 0
+        profiles = []
+        dmnRules.setProfiler(profiles.append)
+        (reorderedStatus, reorderedResults, reorderedDecision) = dmnRules.decidePandas(dfInput, vectorize=False)
+        assert sum([sum(profile['rules'].values()) for profile in profiles]) <= testsBefore
+        assert reorderedStatus.equals(dfStatus)
+        assert reorderedResults.equals(dfResults)
+        assert reorderedDecision.equals(dfDecision)
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        assert 'errors' not in status
+        rows = []
+        for participantAge in [20, 36, 50, 75]:
+            for inTestOfCure in [True, False]:
+                for hpv in ['V0', 'V1', 'V2', 'V9']:
+                    for riskCategory in ['low', 'high']:
+                        rows.append({'Participant Age':participantAge, 'In Test of Cure':inTestOfCure, 'Hysterectomy Flag':False, 'Cancer Flag':False,
+                                     'HPV-V':hpv, 'Current Participant Risk Category':riskCategory})
+        dfInput = pd.DataFrame(rows)
+        profiles = []
+        dmnRules.setProfiler(profiles.append)
+        (dfStatus, dfResults, dfDecision) = dmnRules.decidePandas(dfInput, vectorize=False)
+        testsBefore = sum([sum(profile['rules'].values()) for profile in profiles])
+        status = dmnRules.optimizeRuleOrder(dfInput)
+        assert 'errors' not in status
+        profiles.clear()
+        (reorderedStatus, reorderedResults, reorderedDecision) = dmnRules.decidePandas(dfInput, vectorize=False)
+        assert sum([sum(profile['rules'].values()) for profile in profiles]) < testsBefore
+        assert reorderedStatus.equals(dfStatus)
+        assert reorderedResults.equals(dfResults)
+        assert reorderedDecision.equals(dfDecision)
+        # Overlapping rules in a Unique hit policy Decision Table are never reordered
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        data = {}
+        data['Participant Age'] = 36
+        data['In Test of Cure'] = True
+        data['Hysterectomy Flag'] = False
+        data['Cancer Flag'] = False
+        data['HPV-V'] = 'V0'
+        data['Current Participant Risk Category'] = 'low'
+        dmnRules.setCoverage(True)
+        (status, newData) = dmnRules.decide(data)
+        status = dmnRules.optimizeRuleOrder()
+        assert 'errors' not in status
+        sheetRules = pyDMNrules.DMN()
+        status = sheetRules.load('../pyDMNrules/ExampleHPV.xlsx')
+        for hpv in ['V0', 'V1', 'V2', 'V9']:
+            data['HPV-V'] = hpv
+            (status, reorderedData) = dmnRules.decide(data)
+            (status, newData) = sheetRules.decide(data)
+            assert reorderedData['Executed Rule'] == newData['Executed Rule']
+        # Tests that can raise an error (input validity) are not reordered, so a moved rule can't raise new errors
+        dmnRules = pyDMNrules.DMN()
+        status = dmnRules.load('../pyDMNrules/ExampleRows.xlsx')
+        assert 'errors' not in status
+        dfInput = pd.DataFrame([{'Customer':'Private', 'OrderSize':'n/a', 'Delivery':delivery} for delivery in ['sameday', 'slow'] * 20])
+        status = dmnRules.optimizeRuleOrder(dfInput)
+        assert 'errors' not in status
+        data = {}
+        data['Customer'] = 'Business'
+        data['OrderSize'] = 5
+        data['Delivery'] = 'fast'
+        (status, newData) = dmnRules.decide(data)
+        assert 'errors' not in status
+        assert newData['Result']['Discount'] == 0.05
+        assert newData['Executed Rule'] == ('Determine Discount', 'Discount', '1')